@@ -6,31 +6,191 @@ Package entry point for perfbench.
 This module contains the CLI parsing and top-level orchestration.
 """
 from datetime import datetime
+import os
 import sys
+import json
 import argparse
 import math
-from perfbench.core.initializer import initialize_environment
-from perfbench.core.script_processor import process_slurm_script
-from perfbench.core.validator import validate_environment
+# 启动路径只导入轻量模块；各子命令/选项的处理模块在执行时才导入，
+# reportlab、pypdf、numpy、yaml 只在生成报告（或扩展性扫描）时载入。
+# 启动耗时与启动路径载入的模块由 python -m perfbench.bench.startup 检查
+from perfbench.utils.constants import ARCHIVE_SUFFIX, DEFAULT_SUBMIT_WORKERS
 from perfbench.utils.logger import setup_logging
 from perfbench.utils.progress_bar import StepProgress
-from perfbench.utils.result_handler import calculate_parallelism, get_platform_config, Result
-from perfbench.report.certificate_generator import generate_certificate
+from perfbench.utils import profiler
 
 
 def parse_arguments():
-    parser = argparse.ArgumentParser(description='PerfBench - SLURM集群性能基准测试工具')
+    parser = argparse.ArgumentParser(description='PerfBench - SLURM集群性能基准测试工具',
+                                     epilog='子命令: perfbench report <job_dir>  为已提交的作业等待结束并生成报告；'
+                                            'perfbench hpl <script>  按作业规模生成 HPL.dat；'
+                                            f'perfbench archive <job_dir>  把输出目录打包为单个 {ARCHIVE_SUFFIX} 归档')
     parser.add_argument('-init', action='store_true', help='初始化工具环境')
     parser.add_argument('-s', '--script', type=str, help='SLURM脚本路径')
     parser.add_argument('-t', '--interval', type=int, help='性能采集时间间隔（秒）')
     parser.add_argument('-o', '--output', type=str, help='输出目录路径')
-    parser.add_argument('-v', action='store_true', help='运行工具适配性测试')
+    parser.add_argument('--monitor-engine', type=str, choices=['async', 'bash'], default='async',
+                        help='登录节点监控引擎：async（asyncio 并发采样，默认）或 bash（monitor_login.sh 轮询）')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='自适应采样间隔：排队或指标平稳时退避，状态变化或指标突变时收紧到 -t（仅 async 引擎）')
+    parser.add_argument('--min-interval', type=float, default=None, help='自适应采样间隔下限（秒），默认等于 -t')
+    parser.add_argument('--max-interval', type=float, default=None, help='自适应采样间隔上限（秒），默认 300')
+    parser.add_argument('--snapshot-ttl', type=float, default=None,
+                        help='sinfo 等集群级查询在登录节点共享缓存中的有效期（秒），默认等于 -t，0 表示不使用缓存（仅 async 引擎）')
+    parser.add_argument('--raw-retention', type=float, default=None,
+                        help='原始采样的保留时长（秒），更早的采样汇总为 1 分钟/10 分钟聚合后丢弃，默认全部保留（仅 async 引擎）')
+    parser.add_argument('--probe-budget', type=float, default=None,
+                        help='监控探针累计耗时占墙钟时间的比例上限（如 0.05），超出时停用 sinfo/scontrol 并拉长采样间隔（仅 async 引擎）')
+    parser.add_argument('--probe-p99', type=float, default=None,
+                        help='监控探针耗时 p99 的上限（秒），超出时同样逐级限流（仅 async 引擎）')
+    parser.add_argument('--fom-parsers', type=str, default=None,
+                        help='跟踪作业输出文件（--output）时使用的应用指标解析器，逗号分隔（hpl,lammps,key_value），'
+                             '默认全部，none 表示不跟踪（仅 async 引擎）')
+    parser.add_argument('--node-sampler', action='store_true',
+                        help='在作业的每个计算节点上启动 /proc 采样器（CPU 利用率、内存、网络速率）')
+    parser.add_argument('--node-interval', type=float, default=0.5, help='计算节点采样间隔（秒），默认 0.5')
+    parser.add_argument('--sweep-nodes', type=str, default=None,
+                        help='扩展性扫描：逗号分隔的节点数列表（如 1,2,4,8），为每个节点数生成并提交一个脚本变体')
+    parser.add_argument('--weak-scale', action='append', default=None, metavar='VAR=EXPR',
+                        help='弱扩展规则（可重复），如 NX=64*N：为每个变体导出随节点数 N 变化的环境变量；不指定时为强扩展')
+    parser.add_argument('--submit', nargs='+', default=None, metavar='SCRIPT',
+                        help='批量提交模式：并发提交多个 SLURM 脚本，输出 {脚本: jobid} 映射（JSON）')
+    parser.add_argument('--submit-workers', type=int, default=DEFAULT_SUBMIT_WORKERS,
+                        help=f'批量提交（含扩展性扫描）的并发数，默认 {DEFAULT_SUBMIT_WORKERS}')
+    parser.add_argument('--submit-rate', type=float, default=None, help='每秒最多提交次数，默认不限制')
+    parser.add_argument('--max-jobs', type=int, default=None,
+                        help='本用户队列中的作业数上限（类似 MaxSubmitJobs），达到上限时等待作业离队后再提交')
+    parser.add_argument('--no-wait', action='store_true',
+                        help='提交后立即返回，不等待作业结束；之后用 perfbench report <job_dir> 生成报告')
+    add_profile_argument(parser)
+    parser.add_argument('-v', action='store_true',
+                        help='运行工具适配性测试：提交一批测试作业，测量 sbatch/sacct/sstat/squeue/sinfo 的响应时间、'
+                             '排队与记账延迟，并给出监控参数建议（结果写入 -o 目录，默认当前目录）')
+    parser.add_argument('--burst', type=int, default=5, help='-v 提交的测试作业数，默认 5')
+    parser.add_argument('--bench-timeout', type=float, default=600, help='-v 等待测试作业结束的最长时间（秒），默认 600')
     parser.add_argument('--force', action='store_true', help='跳过 SLURM 环境检测（仅用于调试）')
     parser.add_argument('--version', action='version', version='%(prog)s 1.0.0')
     return parser
 
 
+def parse_report_arguments(argv):
+    parser = argparse.ArgumentParser(prog='perfbench report', description='等待已提交的作业结束并生成报告')
+    parser.add_argument('job_dir', help=f'PerfBench 输出目录（perfbench_YYYYMMDD_HHMMSS）或其 {ARCHIVE_SUFFIX} 归档')
+    parser.add_argument('--no-wait', action='store_true', help='作业尚未结束时直接报错退出，而不是等待')
+    parser.add_argument('--timeout', type=float, default=None, help='最长等待时间（秒）')
+    add_profile_argument(parser)
+    return parser.parse_args(argv)
+
+
+def add_profile_argument(parser):
+    parser.add_argument('--profile', nargs='?', const='trace', default=None, choices=['trace', 'cprofile'],
+                        help=f'记录各阶段与主要操作的耗时，写入输出目录的 {profiler.TRACE_FILE}（Chrome trace 格式）；'
+                             f'cprofile 时另外写出 {profiler.CPROFILE_FILE}')
+
+
+def start_profile(args):
+    if args.profile:
+        profiler.start(cprofile=args.profile == 'cprofile')
+
+
+def stop_profile(logger, out_dir):
+    for path in profiler.stop(out_dir):
+        logger.info(f"已写出耗时剖析: {path}")
+
+
+def parse_archive_arguments(argv):
+    parser = argparse.ArgumentParser(prog='perfbench archive',
+                                     description=f'把已结束作业的输出目录打包为单个压缩归档（{ARCHIVE_SUFFIX}），报告可直接从归档生成')
+    parser.add_argument('job_dir', help='PerfBench 输出目录（perfbench_YYYYMMDD_HHMMSS）')
+    parser.add_argument('-o', '--output', type=str, default=None, help=f'归档路径，默认为 <job_dir>{ARCHIVE_SUFFIX}')
+    parser.add_argument('--remove', action='store_true', help='打包并校验通过后删除原目录')
+    return parser.parse_args(argv)
+
+
+def archive_main(argv):
+    """
+    perfbench archive <job_dir>：监控结束后把输出目录打包为单个归档
+    """
+    from perfbench.core.job_waiter import monitor_alive
+    from perfbench.utils.archive import create_archive
+
+    args = parse_archive_arguments(argv)
+    logger = setup_logging()
+    try:
+        if monitor_alive(args.job_dir):
+            logger.error(f"{args.job_dir} 的监控进程仍在运行，请在作业结束后再打包")
+            sys.exit(1)
+        path, stats = create_archive(args.job_dir, args.output, remove=args.remove)
+        logger.info(f"已打包 {stats['files']} 个文件（{stats['bytes_before']} 字节）为 {path}"
+                    f"（{stats['members']} 个成员，{stats['bytes_after']} 字节）")
+    except Exception as e:
+        logger.error(f"打包失败: {str(e)}")
+        sys.exit(1)
+
+
+def wait_with_progress(progress, job_dir, jobid, timeout=None):
+    """
+    阻塞等待作业结束，进度条显示作业的实时状态
+    """
+    from perfbench.core.job_waiter import wait_for_job
+
+    def on_update(state, elapsed):
+        progress.show(f"作业 {jobid}: {state or '未知'}，已等待 {int(elapsed)}s")
+    return wait_for_job(job_dir, jobid, on_update=on_update, timeout=timeout)
+
+
+def report_main(argv):
+    """
+    perfbench report <job_dir>：载入作业句柄，等待作业结束（如需要）后生成报告
+    """
+    from perfbench.core.job_waiter import load_handle, job_status
+    from perfbench.utils.archive import output_dir_for
+
+    args = parse_report_arguments(argv)
+    logger = setup_logging()
+    progress = StepProgress(["监控中", "监控完成", "报告生成中", "报告生成完成"])
+    start_profile(args)
+    try:
+        handle = load_handle(args.job_dir)
+        progress.next()  # 1. 监控中
+        state, finished, _ = job_status(args.job_dir, handle["jobid"])
+        if not finished:
+            if args.no_wait:
+                logger.error(f"作业 {handle['jobid']} 尚未结束（状态: {state}）")
+                sys.exit(1)
+            state = wait_with_progress(progress, args.job_dir, handle["jobid"], timeout=args.timeout)
+        progress.next(f"作业状态: {state}")  # 2. 监控完成
+        progress.next("报告生成中")  # 3. 报告生成中
+        generate_certificate_for_test(logger, args.job_dir, handle["script_info"], handle["interval"])
+        progress.finish()  # 4. 报告生成完成
+    except Exception as e:
+        logger.error(f"执行过程中发生错误: {str(e)}")
+        sys.exit(1)
+    finally:
+        stop_profile(logger, output_dir_for(args.job_dir))
+
+
+def hpl_main(argv):
+    """
+    perfbench hpl <script>：按作业申请的节点与进程数生成 HPL.dat
+    """
+    from perfbench.utils.hpl_config import main as hpl_config_main
+
+    setup_logging()
+    sys.exit(hpl_config_main(argv, prog='perfbench hpl'))
+
+
+# 子命令 -> 处理函数
+SUBCOMMANDS = {
+    'report': report_main,
+    'archive': archive_main,
+    'hpl': hpl_main,
+}
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
     parser = parse_arguments()
     args = parser.parse_args()
     logger = setup_logging()
@@ -46,25 +206,56 @@ def main():
         "报告生成完成"
     ]
     progress = StepProgress(steps)
+    # 耗时剖析的输出目录：-s 时为作业输出目录，扩展性扫描时为扫描目录
+    profile_dir = args.output or os.getcwd()
+    start_profile(args)
 
     try:
         if args.init:
+            from perfbench.core.initializer import initialize_environment
             initialize_environment(force=args.force)
             return
 
         if args.v:
-            validate_environment(force=args.force)
+            from perfbench.core.validator import validate_environment
+            if not validate_environment(force=args.force, out_dir=args.output, burst=args.burst,
+                                        timeout=args.bench_timeout):
+                sys.exit(1)
+            return
+
+        if args.submit:
+            from perfbench.core.bulk_submit import submit_jobs
+            jobids = submit_jobs(args.submit, **submit_options_from_args(args))
+            print(json.dumps(jobids, indent=2, ensure_ascii=False))
+            if not all(jobids.values()):
+                sys.exit(1)
             return
 
         if args.script:
             if not args.interval or not args.output:
                 logger.error("请提供采集间隔(-t)和输出目录(-o)参数")
                 sys.exit(1)
+            if args.sweep_nodes:
+                from perfbench.core.sweep import run_sweep, parse_node_counts
+                sweep_dir, _ = run_sweep(args.script, parse_node_counts(args.sweep_nodes), args.interval, args.output,
+                                         weak_rules=args.weak_scale, monitor_engine=args.monitor_engine,
+                                         monitor_options=monitor_options_from_args(args),
+                                         node_interval=args.node_interval if args.node_sampler else None,
+                                         submit_options=submit_options_from_args(args))
+                profile_dir = sweep_dir
+                logger.info(f"扩展性扫描已完成，输出目录: {sweep_dir}")
+                return
+            from perfbench.core.script_processor import process_slurm_script
+            from perfbench.core.job_waiter import load_handle
             progress.next()  # 1. 读取用户提交脚本
             # 解析和生成监控脚本
             progress.next("监控脚本生成中")  # 2. 监控脚本生成中
             # process_slurm_script 内部包含所有后续步骤（除了报告生成）
-            job_dir, script_info = process_slurm_script(args.script, args.interval, args.output)
+            job_dir, script_info = process_slurm_script(args.script, args.interval, args.output,
+                                                   monitor_engine=args.monitor_engine,
+                                                   monitor_options=monitor_options_from_args(args),
+                                                   node_interval=args.node_interval if args.node_sampler else None)
+            profile_dir = job_dir
             """
             info = {
                 'job_name': None,
@@ -79,13 +270,16 @@ def main():
             }
             """
             progress.next("作业提交")  # 3. 作业提交
-            # 监控中（此处为启动监控脚本后）
-            progress.next("监控中")  # 4. 监控中
-            # 监控完成（此处可根据后处理或监控脚本退出信号完善）
-            progress.next("监控完成")  # 5. 监控完成
+            jobid = load_handle(job_dir)["jobid"]
+            if args.no_wait:
+                logger.info(f"作业 {jobid} 已提交，监控在后台运行；作业结束后执行 perfbench report {job_dir} 生成报告")
+                return
+            progress.next("监控中")  # 4. 监控中：进度条显示作业的实时状态
+            state = wait_with_progress(progress, job_dir, jobid)
+            progress.next(f"作业状态: {state}")  # 5. 监控完成
             logger.info(f"PerfBench流程已完成，输出目录: {job_dir}")
             progress.next("报告生成中")  # 6. 报告生成中
-            generate_certificate_for_test(logger, job_dir, script_info, args)
+            generate_certificate_for_test(logger, job_dir, script_info, args.interval)
             progress.finish()  # 7. 报告生成完成
             return
 
@@ -95,32 +289,83 @@ def main():
     except Exception as e:
         logger.error(f"执行过程中发生错误: {str(e)}")
         sys.exit(1)
+    finally:
+        stop_profile(logger, profile_dir)
+
+def monitor_options_from_args(args):
+    """
+    从命令行参数中取出传给登录节点监控引擎的附加参数
+    """
+    return {
+        "adaptive": args.adaptive,
+        "min_interval": args.min_interval,
+        "max_interval": args.max_interval,
+        "snapshot_ttl": args.snapshot_ttl,
+        "raw_retention": args.raw_retention,
+        "probe_budget": args.probe_budget,
+        "probe_p99": args.probe_p99,
+        "fom_parsers": args.fom_parsers,
+    }
+
+def submit_options_from_args(args):
+    """
+    从命令行参数中取出批量提交的并发与限流参数
+    """
+    return {
+        "max_workers": args.submit_workers,
+        "rate": args.submit_rate,
+        "max_jobs": args.max_jobs,
+    }
+
+def generate_certificate_for_test(logger, job_dir, script_info, interval):
+    from perfbench.utils.archive import output_dir_for
+    from perfbench.utils.result_handler import calculate_parallelism, get_platform_config, load_job_result
+    from perfbench.report.certificate_generator import generate_certificate
+    from perfbench.report.performance_report import generate_performance_report
+    from perfbench.utils.fom import load_fom_records, summarize_fom
 
-def generate_certificate_for_test(logger, job_dir, script_info, args):
     platform_config = get_platform_config() # 获取平台配置-platform_config.yaml
 
     parallelism_info = calculate_parallelism(platform_name=platform_config['platform_name'], node_num=script_info['nodes'])
     logger.info(f"计算得到的并行度: {parallelism_info}")
             
-    # 解析sacct结果
-    sacct_result = Result(cmd_name="sacct", out_dir=job_dir, interval=args.interval)
-    sacct_result.parse_sacct()
-    elapsed_time = sacct_result.get_elapsed_time() # 本次作业的运行时间
+    # 解析sacct结果（增量模式：重复生成报告时只解析新增的采样，不会重复追加行；记账存储关闭时改用 scontrol）
+    job_result = load_job_result(job_dir, interval)
+    elapsed_time = job_result.get_elapsed_time() if job_result is not None else None # 本次作业的运行时间
             
-    para_eff = float(
-    float(platform_config["compared_cores"] * platform_config["compared_run_time"])
-        / float((parallelism_info["core_num"] // 10000) * elapsed_time)
-    ) * 100
+    if elapsed_time:
+        para_eff = float(
+        float(platform_config["compared_cores"] * platform_config["compared_run_time"])
+            / float((parallelism_info["core_num"] // 10000) * elapsed_time)
+        ) * 100
+        eff = f"{para_eff:.2f}%({platform_config['compared_cores']} Nodes)"
+    else:
+        logger.warning("没有作业运行时间，证书中的并行效率记为 N/A")
+        eff = f"N/A({platform_config['compared_cores']} Nodes)"
             
     report_info = {
         "platform": platform_config["platform_name"],
         "node_num": script_info['nodes'],
         "app_name": script_info['job_name'],
         "core_num": parallelism_info["core_num"],
-        "eff": f"{para_eff:.2f}%({platform_config['compared_cores']} Nodes)",
+        "eff": eff,
         "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
-    generate_certificate(report_info, job_dir)
+    # 应用自身报告的性能指标（作业输出文件中的 HPL Gflops、LAMMPS timesteps/s 等）
+    try:
+        fom = summarize_fom(load_fom_records(job_dir))["headline"]
+    except (OSError, ValueError) as e:
+        logger.warning(f"解析应用性能指标失败: {e}")
+        fom = None
+    if fom is not None:
+        logger.info(f"应用性能指标: {fom['label']}")
+        report_info["fom"] = fom["label"]
+    # 归档只读，证书与报告写到去掉后缀的同名目录
+    generate_certificate(report_info, output_dir_for(job_dir))
+    try:
+        generate_performance_report(job_dir, interval)
+    except Exception as e:
+        logger.warning(f"性能报告生成失败: {e}")
 
 if __name__ == '__main__':
     main()
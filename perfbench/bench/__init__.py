@@ -0,0 +1 @@
+"""perfbench.bench package."""
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线的 SLURM 命令替身：sbatch/sacct/sstat/sinfo/scontrol/squeue/seff/scancel。
+
+FakeSlurm 在临时目录中生成一组 shell 包装脚本（放到 PATH 最前面），每个脚本都以
+`python -S fake_slurm.py <命令> ...` 执行本文件（只依赖标准库，不导入 perfbench，启动开销接近真实的 CLI 调用）。
+作业状态按墙钟时间推演：提交后排队 pending 秒，运行 runtime 秒后 COMPLETED（scancel 之后为 CANCELLED）；
+运行期间有 batch、extern 与 steps 个 srun 作业步，MaxRSS/AveCPU 随运行时间增长。
+所有状态保存在 FAKE_SLURM_DIR（config.json、jobs/<jobid>.json）中，多个进程并发调用也能看到一致的队列。
+能力探测（perfbench.utils.capabilities）用到的 --version、--help、sacct --helpformat、scontrol show config 也有对应的输出。
+
+输出格式与真实命令保持一致（sacct/sstat 的 -P 管道表、sinfo -N -o "%N %t %f"、scontrol 的 Key=Value、seff 的 "键: 值"），
+latency 参数为每次调用附加的延迟（秒），用于模拟繁忙的 slurmctld。
+
+用法：
+    with FakeSlurm(pending=1, runtime=10) as fake:
+        ...  # 子进程中的 sbatch/sacct/... 即为替身
+"""
+
+import fcntl
+import getpass
+import json
+import os
+import re
+import shutil
+import stat
+import sys
+import tempfile
+import time
+
+COMMANDS = ("sbatch", "sacct", "sstat", "sinfo", "scontrol", "squeue", "seff", "scancel")
+
+DEFAULT_CONFIG = {
+    "pending": 2.0,      # 排队时间（秒）
+    "runtime": 30.0,     # 运行时间（秒）
+    "steps": 2,          # srun 作业步个数
+    "nodes": 64,         # 集群节点数
+    "latency": 0.0,      # 每次调用附加的延迟（秒）
+    "first_jobid": 1000,
+    "accounting": True,  # False 时 scontrol show config 报告 accounting_storage/none
+}
+
+FAKE_VERSION = "23.02.7"
+
+# --help 中列出的选项（能力探测只检查这几个）
+HELP_OPTIONS = {
+    "sbatch": ("--job-name", "--nodes", "--parsable"),
+    "sstat": ("--allsteps", "--format", "--jobs", "--parsable2"),
+}
+
+# squeue 的状态缩写
+STATE_CODES = {"PENDING": "PD", "RUNNING": "R", "COMPLETED": "CD", "CANCELLED": "CA"}
+
+SACCT_DEFAULT_FORMAT = "JobID,JobName,Partition,Account,AllocCPUS,State,ExitCode"
+SSTAT_DEFAULT_FORMAT = "JobID,MaxRSS,AveRSS,MaxVMSize,AveCPU,NTasks"
+
+
+def state_dir():
+    return os.environ["FAKE_SLURM_DIR"]
+
+
+def load_config():
+    with open(os.path.join(state_dir(), "config.json"), "r") as f:
+        return json.load(f)
+
+
+def load_jobs():
+    jobs = {}
+    job_dir = os.path.join(state_dir(), "jobs")
+    for name in os.listdir(job_dir):
+        if name.endswith(".json"):
+            with open(os.path.join(job_dir, name), "r") as f:
+                job = json.load(f)
+            jobs[job["jobid"]] = job
+    return jobs
+
+
+def format_duration(seconds):
+    """
+    秒 -> [D-]HH:MM:SS
+    """
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    text = f"{rest // 3600:02d}:{rest // 60 % 60:02d}:{rest % 60:02d}"
+    return f"{days}-{text}" if days else text
+
+
+def format_cpu(seconds):
+    """
+    秒 -> MM:SS.mmm（sstat AveCPU / sacct TotalCPU 的格式）
+    """
+    minutes, rest = divmod(seconds, 60)
+    if minutes >= 60:
+        return format_duration(seconds)
+    return f"{int(minutes):02d}:{rest:06.3f}"
+
+
+def job_timeline(job, now):
+    """
+    返回 (状态, 已运行秒数)
+    """
+    start = job["submit_time"] + job["pending"]
+    cancelled = job.get("cancel_time")
+    if cancelled is not None and now >= cancelled:
+        return "CANCELLED", max(0.0, min(cancelled, start + job["runtime"]) - start)
+    if now < start:
+        return "PENDING", 0.0
+    if now < start + job["runtime"]:
+        return "RUNNING", now - start
+    return "COMPLETED", job["runtime"]
+
+
+def job_rows(job, now, allocations_only=False):
+    """
+    作业本身 + batch/extern + srun 作业步的字段字典
+    """
+    state, elapsed = job_timeline(job, now)
+    jobid = str(job["jobid"])
+    cpus = job["nodes"] * job["tasks_per_node"]
+    rows = [{
+        "JobID": jobid, "JobIDRaw": jobid, "JobName": job["name"], "Partition": "fake", "Account": "bench",
+        "State": state, "Elapsed": format_duration(elapsed), "TotalCPU": format_cpu(elapsed * cpus * 0.9),
+        "MaxRSS": "", "AllocCPUS": str(cpus), "NNodes": str(job["nodes"]), "ExitCode": "0:0",
+        "NTasks": "", "AveRSS": "", "MaxVMSize": "", "AveCPU": "",
+    }]
+    if allocations_only or state == "PENDING":
+        return rows
+    names = ["batch", "extern"] + [str(i) for i in range(job["steps"])]
+    for name in names:
+        srun = name not in ("batch", "extern")
+        tasks = cpus if srun else 1
+        rss_mb = (200 + 20 * elapsed) if srun else 12
+        rows.append({
+            "JobID": f"{jobid}.{name}", "JobIDRaw": f"{jobid}.{name}", "JobName": "app" if srun else name,
+            "Partition": "", "Account": "bench", "State": state, "Elapsed": format_duration(elapsed),
+            "TotalCPU": format_cpu(elapsed * tasks * 0.9 if srun else 0.5), "MaxRSS": f"{int(rss_mb * 1024)}K",
+            "AllocCPUS": str(cpus if srun else job["tasks_per_node"]), "NNodes": str(job["nodes"] if srun else 1),
+            "ExitCode": "0:0", "NTasks": str(tasks), "AveRSS": f"{int(rss_mb * 900)}K",
+            "MaxVMSize": f"{int(rss_mb * 3 * 1024)}K", "AveCPU": format_cpu(elapsed * 0.9 if srun else 0.1),
+        })
+    return rows
+
+
+def option_value(argv, *names):
+    """
+    取出 --name=value / --name value / -n value 形式的选项值
+    """
+    for i, arg in enumerate(argv):
+        for name in names:
+            if arg.startswith(name + "=") and name.startswith("--"):
+                return arg[len(name) + 1:]
+            if arg == name and i + 1 < len(argv):
+                return argv[i + 1]
+    return None
+
+
+def format_fields(argv, default):
+    fields = option_value(argv, "--format", "-o") or default
+    return [re.sub(r"%\d+$", "", field) for field in fields.split(",") if field]
+
+
+def print_table(fields, rows, header=True):
+    """
+    输出 -P 管道表；与真实命令一致，字段名不区分大小写，表头使用规范写法
+    """
+    canonical = {name.lower(): name for row in rows[:1] for name in row}
+    fields = [canonical.get(field.lower(), field) for field in fields]
+    if header:
+        print("|".join(fields))
+    for row in rows:
+        print("|".join(row.get(field, "") for field in fields))
+
+
+def cmd_sbatch(argv):
+    config = load_config()
+    script = argv[-1]
+    job = {"name": os.path.basename(script), "nodes": 1, "tasks_per_node": 1}
+    with open(script, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("#SBATCH"):
+                continue
+            match = re.search(r"(?:--nodes[= ]|-N\s*)(\d+)", line)
+            if match:
+                job["nodes"] = int(match.group(1))
+            match = re.search(r"(?:--job-name[= ]|-J\s*)(\S+)", line)
+            if match:
+                job["name"] = match.group(1)
+            match = re.search(r"--ntasks-per-node[= ](\d+)", line)
+            if match:
+                job["tasks_per_node"] = int(match.group(1))
+    # 并发提交时分配作业号需要加锁
+    with open(os.path.join(state_dir(), "jobid.lock"), "a+") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        lock.seek(0)
+        text = lock.read().strip()
+        jobid = int(text) + 1 if text else config["first_jobid"]
+        lock.seek(0)
+        lock.truncate()
+        lock.write(str(jobid))
+    job.update(jobid=jobid, submit_time=time.time(), pending=config["pending"], runtime=config["runtime"],
+               steps=config["steps"], user=getpass.getuser())
+    path = os.path.join(state_dir(), "jobs", f"{jobid}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(job, f)
+    os.replace(path + ".tmp", path)
+    print(str(jobid) if "--parsable" in argv else f"Submitted batch job {jobid}")
+    return 0
+
+
+def requested_jobs(argv):
+    value = option_value(argv, "-j", "--jobs")
+    if not value:
+        return None
+    return [int(re.match(r"\d+", item).group(0)) for item in value.split(",") if re.match(r"\d+", item)]
+
+
+def cmd_sacct(argv):
+    if "--helpformat" in argv:
+        fields = sorted(job_rows({"jobid": 0, "name": "", "nodes": 1, "tasks_per_node": 1, "submit_time": 0,
+                                  "pending": 0, "runtime": 0, "steps": 0}, 0)[0])
+        print(" ".join(fields))
+        return 0
+    jobs, now = load_jobs(), time.time()
+    ids = requested_jobs(argv) or sorted(jobs)
+    fields = format_fields(argv, SACCT_DEFAULT_FORMAT)
+    rows = []
+    for jobid in ids:
+        if jobid in jobs:
+            rows.extend(job_rows(jobs[jobid], now, allocations_only="-X" in argv))
+    print_table(fields, rows, header="-n" not in argv and "--noheader" not in argv)
+    return 0
+
+
+def cmd_sstat(argv):
+    jobs, now = load_jobs(), time.time()
+    fields = format_fields(argv, SSTAT_DEFAULT_FORMAT)
+    rows = []
+    for jobid in requested_jobs(argv) or []:
+        job = jobs.get(jobid)
+        if job is None or job_timeline(job, now)[0] != "RUNNING":
+            sys.stderr.write(f"sstat: error: couldn't get steps for job {jobid}\n")
+            return 1
+        rows.extend(row for row in job_rows(job, now)[1:] if not row["JobID"].endswith(".extern"))
+    print_table(fields, rows, header="-n" not in argv)
+    return 0
+
+
+def cmd_squeue(argv):
+    jobs, now = load_jobs(), time.time()
+    ids = requested_jobs(argv)
+    user = option_value(argv, "-u", "--user")
+    fmt = option_value(argv, "-o", "--format")
+    lines = []
+    for jobid in sorted(jobs):
+        job = jobs[jobid]
+        state, elapsed = job_timeline(job, now)
+        if state in ("COMPLETED", "CANCELLED") or (ids is not None and jobid not in ids) or (user and job["user"] != user):
+            continue
+        if fmt == "%i":
+            lines.append(str(jobid))
+        elif fmt == "%T":
+            lines.append(state)
+        else:
+            lines.append(f"{jobid:>8} fake {job['name'][:8]:>8} {job['user'][:8]:>8} {STATE_CODES[state]:>2} "
+                         f"{format_duration(elapsed):>10} {job['nodes']:>6} fake[1-{job['nodes']}]")
+    if "-h" not in argv and "--noheader" not in argv:
+        print("   JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)")
+    for line in lines:
+        print(line)
+    return 0
+
+
+def cmd_sinfo(argv):
+    config, jobs, now = load_config(), load_jobs(), time.time()
+    allocated = sum(job["nodes"] for job in jobs.values() if job_timeline(job, now)[0] == "RUNNING")
+    print("NODELIST STATE AVAIL_FEATURES")
+    for i in range(config["nodes"]):
+        if i < allocated:
+            state = "alloc"
+        elif i % 29 == 7:
+            state = "drain"
+        elif i % 11 == 3:
+            state = "mix"
+        else:
+            state = "idle"
+        print(f"fake{i + 1:04d} {state} x86_64,avx512,ib")
+    return 0
+
+
+def cmd_scontrol(argv):
+    if argv[:2] == ["show", "config"]:
+        storage = "accounting_storage/slurmdbd" if load_config().get("accounting", True) else "accounting_storage/none"
+        print(f"Configuration data as of 2024-01-01T00:00:00\n"
+              f"AccountingStorageType   = {storage}\n"
+              f"ClusterName             = fake\n"
+              f"JobAcctGatherType       = jobacct_gather/cgroup\n"
+              f"ProctrackType           = proctrack/cgroup\n"
+              f"SLURM_VERSION           = {FAKE_VERSION}\n"
+              f"TaskPlugin              = task/affinity,task/cgroup")
+        return 0
+    jobs, now = load_jobs(), time.time()
+    if len(argv) < 3 or argv[:2] != ["show", "job"] or int(argv[2]) not in jobs:
+        sys.stderr.write("slurm_load_jobs error: Invalid job id specified\n")
+        return 1
+    job = jobs[int(argv[2])]
+    state, elapsed = job_timeline(job, now)
+    cpus = job["nodes"] * job["tasks_per_node"]
+    print(f"JobId={job['jobid']} JobName={job['name']}\n"
+          f"   UserId={job['user']}(1000) GroupId=bench(1000) MCS_label=N/A\n"
+          f"   Priority=4294901 Nice=0 Account=bench QOS=normal\n"
+          f"   JobState={state} Reason=None Dependency=(null)\n"
+          f"   Requeue=1 Restarts=0 BatchFlag=1 Reboot=0 ExitCode=0:0\n"
+          f"   RunTime={format_duration(elapsed)} TimeLimit=01:00:00 TimeMin=N/A\n"
+          f"   Partition=fake AllocNode:Sid=login01:4242\n"
+          f"   NumNodes={job['nodes']} NumCPUs={cpus} NumTasks={cpus} CPUs/Task=1 ReqB:S:C:T=0:0:*:*\n"
+          f"   TRES=cpu={cpus},mem={job['nodes'] * 256}G,node={job['nodes']},billing={cpus}\n"
+          f"   WorkDir=/tmp StdOut=/tmp/slurm-{job['jobid']}.out\n")
+    return 0
+
+
+def cmd_seff(argv):
+    jobs, now = load_jobs(), time.time()
+    job = jobs.get(int(argv[0])) if argv and argv[0].isdigit() else None
+    if job is None:
+        sys.stderr.write("Job not found.\n")
+        return 1
+    state, elapsed = job_timeline(job, now)
+    cpus = job["nodes"] * job["tasks_per_node"]
+    print(f"Job ID: {job['jobid']}\nCluster: fake\nUser/Group: {job['user']}/bench\n"
+          f"State: {state} (exit code 0)\nNodes: {job['nodes']}\nCores per node: {job['tasks_per_node']}\n"
+          f"CPU Utilized: {format_duration(elapsed * cpus * 0.9)}\n"
+          f"CPU Efficiency: 90.00% of {format_duration(elapsed * cpus)} core-walltime\n"
+          f"Job Wall-clock time: {format_duration(elapsed)}\n"
+          f"Memory Utilized: {(200 + 20 * elapsed) / 1024:.2f} GB\n"
+          f"Memory Efficiency: 12.50% of {job['nodes'] * 256}.00 GB (256.00 GB/node)")
+    return 0
+
+
+def cmd_scancel(argv):
+    for jobid in requested_jobs(["-j"] + argv[-1:]) or []:
+        path = os.path.join(state_dir(), "jobs", f"{jobid}.json")
+        if not os.path.exists(path):
+            sys.stderr.write(f"scancel: error: Kill job error on job id {jobid}: Invalid job id specified\n")
+            return 1
+        with open(path, "r") as f:
+            job = json.load(f)
+        job.setdefault("cancel_time", time.time())
+        with open(path + ".tmp", "w") as f:
+            json.dump(job, f)
+        os.replace(path + ".tmp", path)
+    return 0
+
+
+HANDLERS = {
+    "sbatch": cmd_sbatch,
+    "sacct": cmd_sacct,
+    "sstat": cmd_sstat,
+    "sinfo": cmd_sinfo,
+    "scontrol": cmd_scontrol,
+    "squeue": cmd_squeue,
+    "seff": cmd_seff,
+    "scancel": cmd_scancel,
+}
+
+
+class FakeSlurm:
+    """
+    生成替身命令并（在 with 块内）把它们放到 PATH 最前面；参数见 DEFAULT_CONFIG
+    """
+
+    def __init__(self, root=None, **config):
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"未知的替身配置: {', '.join(sorted(unknown))}")
+        self.root = root or tempfile.mkdtemp(prefix="perfbench_fake_slurm_")
+        self.owns_root = root is None
+        self.bin_dir = os.path.join(self.root, "bin")
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.saved_env = None
+        os.makedirs(os.path.join(self.root, "jobs"), exist_ok=True)
+        os.makedirs(self.bin_dir, exist_ok=True)
+        with open(os.path.join(self.root, "config.json"), "w") as f:
+            json.dump(self.config, f)
+        script = os.path.abspath(__file__)
+        for name in COMMANDS:
+            path = os.path.join(self.bin_dir, name)
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" -S "{script}" {name} "$@"\n')
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    def env(self, base=None):
+        """
+        返回子进程使用的环境变量（PATH 以替身目录开头）
+        """
+        env = dict(os.environ if base is None else base)
+        env["PATH"] = os.pathsep.join(p for p in (self.bin_dir, env.get("PATH")) if p)
+        env["FAKE_SLURM_DIR"] = self.root
+        return env
+
+    def update(self, **config):
+        """
+        修改之后提交的作业所用的配置
+        """
+        self.config.update(config)
+        with open(os.path.join(self.root, "config.json"), "w") as f:
+            json.dump(self.config, f)
+
+    def __enter__(self):
+        self.saved_env = {name: os.environ.get(name) for name in ("PATH", "FAKE_SLURM_DIR")}
+        os.environ.update({name: self.env()[name] for name in self.saved_env})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for name, value in self.saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if self.owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+def main(argv):
+    if not argv or argv[0] not in HANDLERS:
+        sys.stderr.write(f"用法: fake_slurm.py {{{'|'.join(COMMANDS)}}} [参数...]\n")
+        return 2
+    latency = load_config().get("latency", 0.0)
+    if latency:
+        time.sleep(latency)
+    if "--version" in argv[1:]:
+        print(f"slurm {FAKE_VERSION}")
+        return 0
+    if "--help" in argv[1:]:
+        print(f"Usage: {argv[0]} [OPTIONS...]\n" + "\n".join(f"      {option}" for option in HELP_OPTIONS.get(argv[0], ())))
+        return 0
+    return HANDLERS[argv[0]](argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Result 内存基准：比较原先“每次采样一个字典”的表示与列存表示。
+
+生成 N 次合成的 sacct 采样（作业 + batch + 一个 srun 作业步）写入临时时序存储，然后分别：
+- legacy:   按原 parse_sacct 的方式为每行构造字符串字典，并按原 get_column_by_name 取一列
+- columnar: 构造 Result（列存表），用 get_column 取同一列
+以 tracemalloc 统计构造后保留的内存，输出 JSON。
+
+用法：
+    python -m perfbench.bench.result_memory --samples 100000 [--json out.json]
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from perfbench.utils.result_handler import Result, parse_pipe_table
+from perfbench.utils.sample_store import SegmentWriter, SegmentReader, ts_ms_to_str
+
+SACCT_HEADER = "JobID|JobIDRaw|JobName|State|Elapsed|TotalCPU|MaxRSS|AllocCPUS|NNodes"
+START_MS = 1800000000000
+
+
+def synthetic_sacct(i):
+    """
+    第 i 次采样的 sacct -P 输出
+    """
+    elapsed = f"{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+    return "\n".join([
+        SACCT_HEADER,
+        f"4242|4242|lammps|RUNNING|{elapsed}|{i // 60:02d}:{i % 60:02d}.000||256|4",
+        f"4242.batch|4242.batch|batch|RUNNING|{elapsed}|00:01.000|{(i % 97) + 10}M|64|1",
+        f"4242.0|4242.0|lmp_mpi|RUNNING|{elapsed}|{i // 60:02d}:{i % 60:02d}.000|{(i % 131) + 1000}M|256|4",
+    ]) + "\n"
+
+
+def write_samples(job_dir, samples, interval_ms):
+    with SegmentWriter(job_dir) as writer:
+        for i in range(samples):
+            writer.append("sacct", START_MS + i * interval_ms, synthetic_sacct(i))
+
+
+def legacy_parse(job_dir):
+    """
+    原表示：每行一个字典，所有字段为字符串
+    """
+    data = []
+    with SegmentReader(job_dir) as reader:
+        for ts_ms, text in reader.iter_samples("sacct"):
+            headers, rows = parse_pipe_table(text)
+            time_stamp = ts_ms_to_str(ts_ms)
+            for fields in rows:
+                row_dict = dict(zip(headers, fields))
+                row_dict["time_stamp"] = time_stamp
+                data.append(row_dict)
+    return data
+
+
+def measure(build):
+    """
+    返回 (构造结果, 保留内存字节数, 峰值内存字节数, 耗时秒)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, peak, elapsed
+
+
+def run(samples, interval_ms=5000):
+    job_dir = tempfile.mkdtemp(prefix="perfbench_bench_")
+    try:
+        write_samples(job_dir, samples, interval_ms)
+
+        legacy, legacy_mem, legacy_peak, legacy_time = measure(lambda: legacy_parse(job_dir))
+        start = time.perf_counter()
+        [{"time_stamp": row["time_stamp"], "MaxRSS": row["MaxRSS"]} for row in legacy]
+        legacy_lookup = time.perf_counter() - start
+        del legacy
+
+        result, columnar_mem, columnar_peak, columnar_time = measure(lambda: Result("sacct", job_dir, interval_ms // 1000))
+        start = time.perf_counter()
+        result.get_column("MaxRSS", steps=True)
+        columnar_lookup = time.perf_counter() - start
+
+        return {
+            "benchmark": "result_memory",
+            "samples": samples,
+            "rows": result.row_count,
+            "legacy": {
+                "retained_bytes": legacy_mem,
+                "peak_bytes": legacy_peak,
+                "parse_seconds": legacy_time,
+                "column_lookup_seconds": legacy_lookup,
+            },
+            "columnar": {
+                "retained_bytes": columnar_mem,
+                "peak_bytes": columnar_peak,
+                "parse_seconds": columnar_time,
+                "column_lookup_seconds": columnar_lookup,
+                "table_bytes": result.table.nbytes() + result.step_table.nbytes(),
+            },
+            "memory_ratio": legacy_mem / columnar_mem if columnar_mem else None,
+        }
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Result 内存基准（字典列表 vs 列存表）')
+    parser.add_argument('--samples', type=int, default=100000, help='合成的 sacct 采样次数')
+    parser.add_argument('--json', type=str, default=None, help='结果输出文件（默认输出到标准输出）')
+    args = parser.parse_args(argv)
+
+    report = run(args.samples)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLI 启动耗时预算检查。
+
+登录节点上的 Python 往往装在较慢的共享文件系统上，`./perfbench.py -v`、`-init`、`--version` 不应为报告生成付出
+reportlab/pypdf/numpy/yaml 的导入代价。本模块在子进程中检查：
+- 各启动路径（CLI 入口以及 -init/-v/--submit/-s 的处理模块）导入后没有载入 HEAVY_MODULES 中的模块，
+  CLI 入口也没有载入 CLI_DEFERRED_MODULES（调度器后端、时序存储）
+- CLI 入口的导入耗时（-X importtime 的累计值，取多次中的最小值）不超过预算
+- `python -m perfbench --version` 的墙钟时间（仅记录，供 bench suite 对比回归）
+
+任何一项不满足时退出码为 1，可在 CI 中作为回归检查。
+
+用法：
+    python -m perfbench.bench.startup [--budget-ms 150] [--repeat 5] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 启动路径上不允许出现的重量级依赖
+HEAVY_MODULES = ("reportlab", "pypdf", "numpy", "yaml")
+# CLI 入口（包括 --version）另外不允许载入的模块：调度器后端与时序存储会连带载入 subprocess、线程池、mmap、zipfile，
+# 由需要它们的子命令按需导入
+CLI_DEFERRED_MODULES = ("perfbench.utils.scheduler", "perfbench.utils.sample_store")
+
+# 启动路径 -> 该路径导入的模块
+STARTUP_PATHS = {
+    "cli": "perfbench.__main__",
+    "-init": "perfbench.core.initializer",
+    "-v": "perfbench.core.validator",
+    "--submit": "perfbench.core.bulk_submit",
+    "-s": "perfbench.core.script_processor",
+}
+
+DEFAULT_BUDGET_MS = 150
+DEFAULT_REPEAT = 5
+
+
+def python_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (PACKAGE_ROOT, env.get("PYTHONPATH")) if p)
+    # 字节码缓存已存在时的耗时才是用户日常看到的耗时
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def heavy_modules_loaded(module, deferred=()):
+    """
+    在新的解释器中导入 module，返回被载入的重量级模块，以及 deferred 中被载入的模块（按完整模块名匹配）
+    """
+    code = ("import sys, json, importlib; importlib.import_module(%r); "
+            "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set(%r) | set(sys.modules) & set(%r))))"
+            % (module, HEAVY_MODULES, tuple(deferred)))
+    proc = subprocess.run([sys.executable, "-c", code], env=python_env(), cwd=PACKAGE_ROOT,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_ms(module):
+    """
+    -X importtime 报告的 module 累计导入耗时（毫秒）
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], env=python_env(),
+                          cwd=PACKAGE_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    raise RuntimeError(f"未找到 {module} 的导入耗时")
+
+
+def wall_seconds(argv):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + argv, env=python_env(), cwd=PACKAGE_ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def measure(repeat=DEFAULT_REPEAT):
+    """
+    返回启动耗时与各启动路径载入的重量级模块
+    """
+    repeat = max(1, repeat)
+    # 预热一次，生成字节码缓存
+    wall_seconds(["-m", "perfbench", "--version"])
+    cli_ms = min(import_ms(STARTUP_PATHS["cli"]) for _ in range(repeat))
+    interpreter = min(wall_seconds(["-c", "pass"]) for _ in range(repeat))
+    version = min(wall_seconds(["-m", "perfbench", "--version"]) for _ in range(repeat))
+    return {
+        "cli_import_seconds": cli_ms / 1000.0,
+        "interpreter_seconds": interpreter,
+        "version_wall_seconds": version,
+        "heavy_modules": {name: heavy_modules_loaded(module, CLI_DEFERRED_MODULES if name == "cli" else ())
+                          for name, module in STARTUP_PATHS.items()},
+    }
+
+
+def check(result, budget_ms=DEFAULT_BUDGET_MS):
+    """
+    返回不满足预算的项（字符串列表）
+    """
+    failures = [f"启动路径 {name} 载入了 {', '.join(modules)}"
+                for name, modules in result["heavy_modules"].items() if modules]
+    cli_ms = result["cli_import_seconds"] * 1000.0
+    if budget_ms is not None and cli_ms > budget_ms:
+        failures.append(f"CLI 入口导入耗时 {cli_ms:.1f}ms 超出预算 {budget_ms:.1f}ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='检查 PerfBench CLI 启动路径的导入耗时与重量级依赖')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'CLI 入口导入耗时预算（毫秒），默认 {DEFAULT_BUDGET_MS}')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help=f'重复次数（取最小值），默认 {DEFAULT_REPEAT}')
+    parser.add_argument('--json', type=str, default=None, help='结果输出文件')
+    args = parser.parse_args(argv)
+
+    result = measure(args.repeat)
+    failures = check(result, args.budget_ms)
+    result["budget_ms"] = args.budget_ms
+    result["failures"] = failures
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"CLI 入口导入耗时: {result['cli_import_seconds'] * 1000:.1f}ms（预算 {args.budget_ms:.0f}ms）")
+    print(f"python -m perfbench --version: {result['version_wall_seconds'] * 1000:.1f}ms"
+          f"（空解释器 {result['interpreter_seconds'] * 1000:.1f}ms）")
+    for failure in failures:
+        print(f"不满足: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PerfBench 自身的性能基准套件，完全离线运行（SLURM 命令由 perfbench.bench.fake_slurm 的替身提供）。
+
+基准项：
+- monitor_tick:  async 监控引擎单个采样节拍的耗时（并发执行 5 个探针 + 写入时序存储）
+- parser:        Result 解析吞吐量随采样次数的变化（时序存储 / 逐节拍 log 文件两种布局）
+- result_memory: Result 的内存占用（见 perfbench.bench.result_memory）
+- report:        证书与多页性能报告的生成时间
+- end_to_end:    `python -m perfbench -s` 全流程（提交、监控、等待、报告）相对作业本身时长的额外耗时
+- startup:       CLI 启动耗时与启动路径载入的重量级依赖（见 perfbench.bench.startup）
+
+结果输出为 JSON（含版本、Python 与平台信息），compare 子命令对比两份结果，
+耗时/字节数变大或吞吐量变小超过阈值的指标视为回归，退出码为 1。
+
+用法：
+    python -m perfbench.bench.suite run [--quick] [--only parser --only report] [--json out.json]
+    python -m perfbench.bench.suite compare old.json new.json [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from perfbench import __version__
+from perfbench.bench import result_memory, startup
+from perfbench.bench.fake_slurm import FakeSlurm
+from perfbench.bench.result_memory import synthetic_sacct, START_MS
+from perfbench.utils.sample_store import SegmentWriter, SegmentReader, ts_ms_to_str
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 各基准项的规模：完整 / --quick
+PROFILES = {
+    "full": {"ticks": 30, "parser_samples": (1000, 10000, 100000), "memory_samples": 100000,
+             "report_samples": 100000, "pending": 2.0, "runtime": 10.0, "interval": 1,
+             "startup_repeat": 10},
+    "quick": {"ticks": 10, "parser_samples": (1000, 10000), "memory_samples": 10000,
+              "report_samples": 10000, "pending": 1.0, "runtime": 4.0, "interval": 1,
+              "startup_repeat": 3},
+}
+
+BENCH_SCRIPT = """#!/bin/bash
+#SBATCH --job-name=bench
+#SBATCH --nodes=64
+#SBATCH --ntasks-per-node=4
+#SBATCH --time=00:10:00
+srun ./app
+"""
+
+
+def summarize(values):
+    """
+    耗时列表 -> {count, mean, p50, p95, max}
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
+
+
+def write_script(directory):
+    path = os.path.join(directory, "bench.slurm")
+    with open(path, "w") as f:
+        f.write(BENCH_SCRIPT)
+    return path
+
+
+def synthetic_sstat(i):
+    rss = 1000 + (i % 131)
+    return (f"JobID|MaxRSS|AveRSS|MaxVMSize|AveCPU|NTasks\n"
+            f"4242.batch|{(i % 97) + 10}M|{(i % 97) + 8}M|200M|00:01.000|1\n"
+            f"4242.0|{rss}M|{rss - 100}M|{3 * rss}M|{i // 60:02d}:{i % 60:02d}.000|256\n")
+
+
+def synthetic_sinfo(i, nodes=64):
+    allocated = 4 + (i // 100) % 8
+    return "NODELIST STATE AVAIL_FEATURES\n" + "\n".join(
+        f"n{k:04d} {'alloc' if k < allocated else 'idle'} x86_64" for k in range(nodes)) + "\n"
+
+
+def write_job_dir(job_dir, samples, interval_ms=1000, layout="segment"):
+    """
+    合成一个作业输出目录：每次采样写入 sacct + sstat，每 10 次写入一次 sinfo
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    if layout == "files":
+        for i in range(samples):
+            ts = ts_ms_to_str(START_MS + i * interval_ms)
+            with open(os.path.join(job_dir, f"sacct_{ts}.log"), "w") as f:
+                f.write(synthetic_sacct(i))
+        return
+    with SegmentWriter(job_dir) as writer:
+        for i in range(samples):
+            ts_ms = START_MS + i * interval_ms
+            writer.append("sacct", ts_ms, synthetic_sacct(i))
+            writer.append("sstat", ts_ms, synthetic_sstat(i))
+            if i % 10 == 0:
+                writer.append("sinfo", ts_ms, synthetic_sinfo(i))
+
+
+def bench_monitor_tick(ticks, latency=0.0):
+    """
+    对一个运行中的（替身）作业连续执行 ticks 个采样节拍，统计每个节拍的耗时
+    """
+    from perfbench.core.bulk_submit import sbatch
+    from perfbench.utils.async_monitor import AsyncMonitor, TICK_PROBES
+
+    work_dir = tempfile.mkdtemp(prefix="perfbench_bench_")
+    loop = asyncio.new_event_loop()
+    try:
+        with FakeSlurm(pending=0.0, runtime=3600.0, latency=latency):
+            jobid = sbatch(write_script(work_dir))
+            job_dir = os.path.join(work_dir, "job")
+            monitor = AsyncMonitor(jobid, 1.0, job_dir, snapshot_ttl=0)
+            os.makedirs(job_dir)
+            monitor.writer = SegmentWriter(job_dir)
+            latencies = []
+            for _ in range(ticks):
+                start = time.perf_counter()
+                loop.run_until_complete(monitor.sample())
+                latencies.append(time.perf_counter() - start)
+            monitor.writer.close()
+            with SegmentReader(job_dir) as reader:
+                records = len(reader)
+        return {
+            "ticks": ticks,
+            "probes_per_tick": len(TICK_PROBES),
+            "probe_latency_seconds": latency,
+            "tick_seconds": summarize(latencies),
+            "records": records,
+            "segment_bytes_per_tick": os.path.getsize(os.path.join(job_dir, "samples.seg")) / ticks,
+        }
+    finally:
+        loop.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_parser(sample_counts, layouts=("segment", "files")):
+    """
+    Result("sacct") 的解析吞吐量：每种布局、每个采样次数各测一次
+    """
+    from perfbench.utils.result_handler import Result
+
+    results = []
+    for layout in layouts:
+        for samples in sample_counts:
+            job_dir = tempfile.mkdtemp(prefix="perfbench_bench_")
+            try:
+                start = time.perf_counter()
+                write_job_dir(job_dir, samples, layout=layout)
+                write_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                result = Result("sacct", job_dir, 1)
+                parse_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                result.get_column("MaxRSS", steps=True)
+                lookup_seconds = time.perf_counter() - start
+                results.append({
+                    "layout": layout,
+                    "samples": samples,
+                    "rows": result.row_count,
+                    "write_seconds": write_seconds,
+                    "parse_seconds": parse_seconds,
+                    "column_lookup_seconds": lookup_seconds,
+                    "samples_per_second": samples / parse_seconds if parse_seconds else None,
+                })
+            finally:
+                shutil.rmtree(job_dir, ignore_errors=True)
+    return results
+
+
+def bench_result_memory(samples):
+    report = result_memory.run(samples)
+    report.pop("benchmark", None)
+    return report
+
+
+def bench_report(samples):
+    """
+    证书与多页性能报告的生成时间（依赖 reportlab/pypdf，缺失时跳过）
+    """
+    try:
+        from perfbench.report.certificate_generator import generate_certificate
+        from perfbench.report.performance_report import generate_performance_report
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    job_dir = tempfile.mkdtemp(prefix="perfbench_bench_")
+    try:
+        write_job_dir(job_dir, samples)
+        report_info = {"platform": "bench", "node_num": 64, "app_name": "bench", "core_num": 18432,
+                       "eff": "100.00%(64 Nodes)", "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        start = time.perf_counter()
+        generate_certificate(report_info, job_dir)
+        certificate_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        path = generate_performance_report(job_dir, 1)
+        report_seconds = time.perf_counter() - start
+        return {
+            "samples": samples,
+            "certificate_seconds": certificate_seconds,
+            "report_seconds": report_seconds,
+            "report_bytes": os.path.getsize(path),
+        }
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def wait_for_monitor(job_dir, timeout=30.0):
+    """
+    等待后台监控进程退出，超时后杀掉
+    """
+    try:
+        with open(os.path.join(job_dir, "monitor_login.pid")) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return
+        time.sleep(0.2)
+    try:
+        os.kill(pid, 9)
+    except OSError:
+        pass
+
+
+def bench_end_to_end(pending, runtime, interval):
+    """
+    在子进程中运行 `python -m perfbench -s`（HOME 指向临时目录，不污染用户的 ~/.perfbench），
+    额外耗时 = 总耗时 - 作业本身的排队与运行时间
+    """
+    work_dir = tempfile.mkdtemp(prefix="perfbench_bench_")
+    try:
+        with FakeSlurm(pending=pending, runtime=runtime) as fake:
+            script = write_script(work_dir)
+            out_dir = os.path.join(work_dir, "out")
+            env = fake.env()
+            env["HOME"] = work_dir
+            env["PYTHONPATH"] = os.pathsep.join(p for p in (PACKAGE_ROOT, env.get("PYTHONPATH")) if p)
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-m", "perfbench", "-s", script, "-t", str(interval), "-o", out_dir],
+                                  cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  universal_newlines=True, timeout=pending + runtime + 300)
+            wall_seconds = time.perf_counter() - start
+            job_dirs = glob.glob(os.path.join(out_dir, "perfbench_*"))
+            job_dir = job_dirs[0] if job_dirs else None
+            samples = 0
+            if job_dir is not None:
+                wait_for_monitor(job_dir)
+                if os.path.exists(os.path.join(job_dir, "samples.idx")):
+                    with SegmentReader(job_dir) as reader:
+                        samples = sum(1 for _ in reader.entries("sacct"))
+        result = {
+            "returncode": proc.returncode,
+            "job_seconds": pending + runtime,
+            "wall_seconds": wall_seconds,
+            "overhead_seconds": wall_seconds - pending - runtime,
+            "sacct_samples": samples,
+            "certificate_generated": bool(job_dir and os.path.exists(os.path.join(job_dir, "certificate_final.pdf"))),
+            "report_generated": bool(job_dir and os.path.exists(os.path.join(job_dir, "performance_report.pdf"))),
+        }
+        if proc.returncode != 0:
+            result["output_tail"] = proc.stdout[-2000:]
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_startup(repeat):
+    """
+    CLI 启动耗时；启动路径载入重量级依赖或超出导入耗时预算时记为错误
+    """
+    result = startup.measure(repeat)
+    failures = startup.check(result)
+    if failures:
+        result["error"] = "; ".join(failures)
+    return result
+
+
+BENCHMARKS = ("monitor_tick", "parser", "result_memory", "report", "end_to_end", "startup")
+
+
+def run_suite(profile="full", only=None):
+    """
+    运行基准套件，返回结果字典
+    """
+    params = PROFILES[profile]
+    runners = {
+        "monitor_tick": lambda: bench_monitor_tick(params["ticks"]),
+        "parser": lambda: bench_parser(params["parser_samples"]),
+        "result_memory": lambda: bench_result_memory(params["memory_samples"]),
+        "report": lambda: bench_report(params["report_samples"]),
+        "end_to_end": lambda: bench_end_to_end(params["pending"], params["runtime"], params["interval"]),
+        "startup": lambda: bench_startup(params["startup_repeat"]),
+    }
+    results = {}
+    for name in BENCHMARKS:
+        if only and name not in only:
+            continue
+        sys.stderr.write(f"[perfbench-bench] {name} ...\n")
+        start = time.perf_counter()
+        try:
+            results[name] = runners[name]()
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        sys.stderr.write(f"[perfbench-bench] {name} 完成，用时 {time.perf_counter() - start:.1f}s\n")
+    return {
+        "suite": "perfbench",
+        "version": __version__,
+        "profile": profile,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def flatten_metrics(node, path=()):
+    """
+    把结果展开为 {指标路径: 数值}；列表元素以 layout/samples 等标识字段命名，便于跨版本对齐
+    """
+    metrics = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            metrics.update(flatten_metrics(value, path + (str(key),)))
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            label = str(i)
+            if isinstance(item, dict):
+                keys = [str(item[k]) for k in ("layout", "samples") if k in item]
+                label = ":".join(keys) or label
+            metrics.update(flatten_metrics(item, path + (label,)))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        metrics["/".join(path)] = float(node)
+    return metrics
+
+
+def metric_direction(path):
+    """
+    吞吐量（per_second）越大越好返回 1；耗时（seconds）与字节数（bytes）越小越好返回 -1；计数等不比较返回 0
+    """
+    parts = path.split("/")
+    if "per_second" in parts[-1]:
+        return 1
+    if parts[-1] in ("count", "samples", "ticks", "rows", "records", "returncode", "job_seconds",
+                     "probe_latency_seconds", "probes_per_tick"):
+        return 0
+    if any(part.endswith("seconds") or part.endswith("bytes") for part in parts):
+        return -1
+    return 0
+
+
+def compare(old, new, threshold=0.1):
+    """
+    对比两份结果，返回 [(指标, 旧值, 新值, 相对变化, 是否回归)]
+    """
+    old_metrics = flatten_metrics(old.get("benchmarks", {}))
+    new_metrics = flatten_metrics(new.get("benchmarks", {}))
+    rows = []
+    for path in sorted(set(old_metrics) & set(new_metrics)):
+        direction = metric_direction(path)
+        before, after = old_metrics[path], new_metrics[path]
+        if not direction or before == 0:
+            continue
+        change = (after - before) / abs(before)
+        rows.append((path, before, after, change, change * -direction > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 自身的离线性能基准')
+    sub = parser.add_subparsers(dest='action')
+    p_run = sub.add_parser('run', help='运行基准套件')
+    p_run.add_argument('--quick', action='store_true', help='缩小规模（用于 CI 或快速检查）')
+    p_run.add_argument('--only', action='append', choices=BENCHMARKS, help='只运行指定的基准项（可重复）')
+    p_run.add_argument('--json', type=str, default=None, help='结果输出文件（默认输出到标准输出）')
+    p_cmp = sub.add_parser('compare', help='对比两份基准结果')
+    p_cmp.add_argument('old', help='基线结果 JSON')
+    p_cmp.add_argument('new', help='新结果 JSON')
+    p_cmp.add_argument('--threshold', type=float, default=0.1, help='视为回归的相对变化，默认 0.1（10%%）')
+    args = parser.parse_args(argv)
+
+    if args.action == 'run':
+        report = run_suite("quick" if args.quick else "full", args.only)
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+        return 1 if any("error" in result for result in report["benchmarks"].values()
+                        if isinstance(result, dict)) else 0
+    if args.action == 'compare':
+        with open(args.old, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.new, 'r', encoding='utf-8') as f:
+            new = json.load(f)
+        rows = compare(old, new, args.threshold)
+        print(f"基线 {old.get('version')} ({old.get('created')}) -> {new.get('version')} ({new.get('created')})")
+        for path, before, after, change, regressed in rows:
+            mark = "回归" if regressed else ""
+            print(f"{path:<60} {before:>14.6g} {after:>14.6g} {change:>+8.1%} {mark}")
+        regressions = sum(1 for row in rows if row[4])
+        print(f"共 {len(rows)} 项指标，{regressions} 项回归（阈值 {args.threshold:.0%}）")
+        return 1 if regressions else 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
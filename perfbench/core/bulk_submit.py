@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发批量提交 SLURM 作业。
+
+- 每个 sbatch 以 cwd= 在脚本所在目录执行，不修改进程的工作目录，可在多个线程中并发
+- 有界线程池（max_workers）执行提交
+- 令牌桶限制每秒提交次数（rate）
+- MaxSubmitJobs 式上限（max_jobs）：本用户在队列中（排队+运行）的作业数达到上限时等待作业离队后再提交
+- slurmctld 繁忙、通信超时等暂时性错误按指数退避重试；提交数超限的错误同样等待后重试
+
+用法：
+    python -m perfbench.core.bulk_submit a.slurm b.slurm ... [--workers 4] [--rate 2] [--max-jobs 100] [--json map.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from perfbench.utils.logger import get_logger
+from perfbench.utils.constants import DEFAULT_SUBMIT_WORKERS
+from perfbench.utils import profiler
+from perfbench.utils.scheduler import get_backend, SubmitError
+
+logger = get_logger()
+
+DEFAULT_WORKERS = DEFAULT_SUBMIT_WORKERS
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+def sbatch(script_path, timeout=60):
+    """
+    经当前的调度器后端提交一次脚本（SLURM 后端在脚本所在目录执行 sbatch），返回 jobid；失败时抛出 SubmitError
+    """
+    with profiler.span("sbatch", script=os.path.basename(script_path)):
+        return get_backend().submit(script_path, timeout=timeout)
+
+
+def sbatch_with_retry(script_path, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, on_limit=None):
+    """
+    提交脚本，暂时性错误与提交数超限时按指数退避重试（最多 retries 次）。
+    on_limit: 遇到提交数超限错误时调用（批量提交时用于等待队列中的作业减少）
+    """
+    delay = backoff
+    for attempt in range(retries + 1):
+        try:
+            return sbatch(script_path)
+        except SubmitError as e:
+            if attempt == retries or not (e.transient or e.limit):
+                raise
+            logger.warning(f"{os.path.basename(script_path)} 提交失败（第 {attempt + 1} 次），{delay:.1f}s 后重试: {e}")
+            if e.limit and on_limit is not None:
+                on_limit()
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_BACKOFF)
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶：平均每秒至多 rate 次，允许 burst 次突发
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def count_queued_jobs(user=None):
+    """
+    本用户在队列中（排队+运行）的作业数，查询失败时返回 None
+    """
+    return get_backend().queued_jobs(user)
+
+
+class SubmitSlots:
+    """
+    MaxSubmitJobs 式上限：队列中的作业数 = 最近一次 squeue 的计数 + 此后提交成功的作业数 + 正在提交的作业数，
+    达到上限时每 poll 秒重新查询 squeue，直到有作业离队
+    """
+
+    def __init__(self, max_jobs, poll=10.0, user=None):
+        self.max_jobs = max_jobs
+        self.poll = poll
+        self.user = user
+        self.cond = threading.Condition()
+        # 最近一次 squeue 的计数
+        self.counted = 0
+        # 此后提交成功、尚未计入 squeue 计数的作业数
+        self.submitted = 0
+        # 已占用名额、sbatch 尚未返回的提交数
+        self.inflight = 0
+        if max_jobs:
+            self.refresh()
+
+    @property
+    def queued(self):
+        return self.counted + self.submitted + self.inflight
+
+    def acquire(self):
+        """
+        占用一个名额（提交之前调用）
+        """
+        if not self.max_jobs:
+            return
+        with self.cond:
+            while self.queued >= self.max_jobs:
+                logger.info(f"队列中已有 {self.queued} 个作业（上限 {self.max_jobs}），等待作业离队")
+                self.cond.wait(self.poll)
+                self.refresh()
+            self.inflight += 1
+
+    def release(self, submitted=False):
+        """
+        提交结束：成功时名额转为已提交的作业，失败时归还名额
+        """
+        if not self.max_jobs:
+            return
+        with self.cond:
+            self.inflight -= 1
+            if submitted:
+                self.submitted += 1
+            self.cond.notify_all()
+
+    def refresh(self):
+        count = count_queued_jobs(self.user)
+        if count is not None:
+            self.counted = count
+            self.submitted = 0
+
+    def wait_for_room(self):
+        """
+        sbatch 报告提交数超限：以 squeue 的实际计数为准，等到调用者已占用的名额在上限之内后再重试（不再占用新名额）
+        """
+        if not self.max_jobs:
+            return
+        with self.cond:
+            self.refresh()
+            while self.queued > self.max_jobs:
+                logger.info(f"队列中已有 {self.queued} 个作业（上限 {self.max_jobs}），等待作业离队")
+                self.cond.wait(self.poll)
+                self.refresh()
+
+
+def submit_jobs(script_paths, max_workers=DEFAULT_WORKERS, rate=None, max_jobs=None,
+                retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """
+    并发提交多个脚本，返回按输入顺序排列的 {脚本路径: jobid}，提交失败的脚本对应 None
+
+    max_workers: 并发提交的线程数
+    rate:        每秒最多提交次数（None 不限制）
+    max_jobs:    本用户队列中作业数上限（None 不限制）
+    retries/backoff: 暂时性错误的重试次数与初始退避时间（秒）
+    """
+    limiter = RateLimiter(rate, burst=max_workers) if rate else None
+    slots = SubmitSlots(max_jobs)
+
+    def submit(script_path):
+        slots.acquire()
+        try:
+            if limiter is not None:
+                limiter.acquire()
+            jobid = sbatch_with_retry(script_path, retries=retries, backoff=backoff, on_limit=slots.wait_for_room)
+        except SubmitError as e:
+            slots.release()
+            logger.error(f"{script_path} 提交失败: {e}")
+            return None
+        slots.release(submitted=True)
+        logger.info(f"作业提交成功，jobid: {jobid}（{script_path}）")
+        return jobid
+
+    jobids = OrderedDict()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [(path, pool.submit(submit, path)) for path in script_paths]
+        for path, future in futures:
+            jobids[path] = future.result()
+    submitted = sum(1 for jobid in jobids.values() if jobid)
+    logger.info(f"批量提交完成：成功 {submitted} 个，失败 {len(jobids) - submitted} 个")
+    return jobids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 并发批量提交')
+    parser.add_argument('scripts', nargs='+', help='SLURM 脚本路径')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'并发提交线程数，默认 {DEFAULT_WORKERS}')
+    parser.add_argument('--rate', type=float, default=None, help='每秒最多提交次数')
+    parser.add_argument('--max-jobs', type=int, default=None, help='本用户队列中的作业数上限（MaxSubmitJobs）')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help=f'暂时性错误的重试次数，默认 {DEFAULT_RETRIES}')
+    parser.add_argument('--json', type=str, default=None, help='jobid 映射输出文件（默认输出到标准输出）')
+    args = parser.parse_args(argv)
+
+    jobids = submit_jobs(args.scripts, max_workers=args.workers, rate=args.rate,
+                         max_jobs=args.max_jobs, retries=args.retries)
+    text = json.dumps(jobids, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if all(jobids.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
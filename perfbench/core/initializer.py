@@ -7,6 +7,7 @@ import shutil
 import time
 from perfbench.utils.logger import get_logger
 from perfbench.utils.system_checker import check_slurm_environment, get_architecture
+from perfbench.utils.capabilities import load_capabilities
 
 logger = get_logger()
 
@@ -43,6 +44,11 @@ def initialize_environment(force: bool = False):
             dst = os.path.join(config_dir, 'libs', lib)
             os.makedirs(os.path.dirname(dst), exist_ok=True)
             shutil.copy2(src, dst)
+
+    # 重新探测 SLURM 能力并写入缓存，之后的监控、解析与提交直接使用
+    caps = load_capabilities(refresh=True)
+    logger.info(f"SLURM 版本: {caps['version'] or '未知'}，记账存储: {caps['config'].get('AccountingStorageType', '未知')}，"
+                f"作业资源采集: {caps['config'].get('JobAcctGatherType', '未知')}")
     
     logger.info("环境初始化完成")
     return True
\ No newline at end of file
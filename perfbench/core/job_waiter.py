@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作业生命周期跟踪。
+
+提交后在 job_dir 中写入作业句柄 perfbench_job.json（jobid、脚本信息、采样间隔等），之后可以：
+- 阻塞等待（wait_for_job）：以退避轮询等待作业结束，状态变化时回调
+- 非阻塞：立即返回句柄，稍后用 `perfbench report <job_dir>` 载入句柄、等待（如需要）并生成报告
+
+作业状态优先从本地文件获得，不向 slurmctld 发起额外的 RPC：
+1. 监控写出的 job_end_*.log 存在 -> 作业已结束
+2. async 引擎的 sampling_timeline.csv 最后一行 -> 当前状态
+3. 监控进程不存在或没有时间线（bash 引擎）时才回退到调度器查询（SLURM 后端为 squeue/sacct）
+轮询间隔从 min_poll 开始指数增长到 max_poll，状态变化时重置，登录节点上不会忙等。
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+from perfbench.utils.logger import get_logger
+from perfbench.utils import profiler
+from perfbench.utils.archive import read_job_file, list_job_files, is_archive
+from perfbench.utils.sampling import TIMELINE_FILE
+from perfbench.utils.scheduler import get_backend
+
+logger = get_logger()
+
+HANDLE_FILE = "perfbench_job.json"
+DEFAULT_MIN_POLL = 2.0
+DEFAULT_MAX_POLL = 60.0
+
+JOB_END_PATTERN = re.compile(r"finished with state (\S+)")
+
+
+def write_handle(job_dir, jobid, script_path, script_info, interval, monitor_engine=None):
+    """
+    写入作业句柄，返回句柄文件路径
+    """
+    handle = {
+        "jobid": str(jobid),
+        "job_dir": os.path.abspath(job_dir),
+        "script": os.path.abspath(script_path),
+        "script_info": script_info,
+        "interval": interval,
+        "monitor_engine": monitor_engine,
+        "submitted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    path = os.path.join(job_dir, HANDLE_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(handle, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_handle(job_dir):
+    """
+    读取作业句柄（job_dir 可以是归档）；不存在时抛出 FileNotFoundError
+    """
+    data = read_job_file(job_dir, HANDLE_FILE)
+    if data is None:
+        raise FileNotFoundError(f"{job_dir} 中没有作业句柄 {HANDLE_FILE}（不是 PerfBench 的输出目录？）")
+    return json.loads(data.decode('utf-8'))
+
+
+def job_end_state(job_dir):
+    """
+    监控写出的结束标记：存在时返回其中记录的最终状态（未记录时为 "FINISHED"），否则返回 None
+    """
+    markers = [name for name in list_job_files(job_dir) if name.startswith("job_end_") and name.endswith(".log")]
+    if not markers:
+        return None
+    data = read_job_file(job_dir, markers[-1])
+    match = JOB_END_PATTERN.search(data.decode('utf-8', errors='replace')) if data is not None else None
+    state = match.group(1) if match else "None"
+    return state if state != "None" else "FINISHED"
+
+
+def timeline_state(job_dir):
+    """
+    sampling_timeline.csv 最后一行记录的作业状态（只读文件末尾），没有时返回 None
+    """
+    path = os.path.join(job_dir, TIMELINE_FILE)
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
+    except OSError:
+        return None
+    if not lines:
+        return None
+    fields = lines[-1].split(',')
+    # 只有表头（或最后一行被截断）时没有状态
+    if len(fields) < 4 or not fields[0].isdigit():
+        return None
+    return fields[2] or None
+
+
+def monitor_alive(job_dir):
+    """
+    监控进程是否仍在运行（依据 monitor_login.pid）
+    """
+    try:
+        with open(os.path.join(job_dir, 'monitor_login.pid'), 'r') as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def query_scheduler(jobid):
+    """
+    直接向调度器查询作业状态，返回 (状态, 是否已结束)
+    """
+    with profiler.span("query_scheduler", jobid=str(jobid)):
+        return get_backend().job_state(jobid)
+
+
+def job_status(job_dir, jobid):
+    """
+    返回 (状态, 是否已结束, 状态来源)
+    """
+    state = job_end_state(job_dir)
+    if state is not None:
+        return state, True, "job_end"
+    if is_archive(job_dir):
+        # 归档只在监控结束后生成
+        return "FINISHED", True, "archive"
+    alive = monitor_alive(job_dir)
+    if alive:
+        state = timeline_state(job_dir)
+        if state is not None:
+            return state, False, "timeline"
+    state, finished = query_scheduler(jobid)
+    # 监控进程仍在运行时，作业虽已离队，聚合与应用指标可能还没写完，等它写出结束标记
+    return state, finished and not alive, "scheduler"
+
+
+def wait_for_job(job_dir, jobid=None, on_update=None, min_poll=DEFAULT_MIN_POLL, max_poll=DEFAULT_MAX_POLL,
+                 timeout=None):
+    """
+    阻塞等待作业结束，返回最终状态。
+    on_update(state, elapsed_seconds): 状态变化时（以及每次轮询时）调用，用于刷新进度显示
+    timeout: 最长等待秒数，超时抛出 TimeoutError
+    """
+    if jobid is None:
+        jobid = load_handle(job_dir)["jobid"]
+    start = time.monotonic()
+    delay = min_poll
+    last_state = None
+    while True:
+        state, finished, source = job_status(job_dir, jobid)
+        if state != last_state:
+            logger.info(f"作业 {jobid} 状态: {state}（来源: {source}）")
+            delay = min_poll
+            last_state = state
+        if on_update is not None:
+            on_update(state, time.monotonic() - start)
+        if finished:
+            return state
+        if timeout is not None and time.monotonic() - start + delay > timeout:
+            raise TimeoutError(f"等待作业 {jobid} 超时（{timeout}s），最后状态: {state}")
+        time.sleep(delay)
+        delay = min(delay * 2, max_poll)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调度器响应能力基准（-v）。
+
+提交一批（burst 个）极小的作业，然后按固定间隔轮询直到全部作业结束并出现在记账中，测量：
+- sbatch 延迟：每次提交的耗时
+- 排队到开始的延迟：提交完成 -> sacct 首次报告作业离开 PENDING（分辨率为轮询间隔）
+- sacct / sstat / squeue / sinfo 单次查询的响应时间分布（p50/p95/p99）
+- 记账延迟：作业离开 squeue -> sacct 报告终止状态
+
+结果写为 JSON，并据此给出该集群上安全的监控参数：一个采样节拍并发执行各探针，
+节拍耗时由最慢探针的 p99 决定，监控对 slurmctld/slurmdbd 的负载由各探针平均耗时之和决定。
+"""
+
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from perfbench.utils.logger import get_logger
+from perfbench.utils.scheduler import get_backend, SubmitError, parse_sacct_state, is_terminal_state
+
+logger = get_logger()
+
+DEFAULT_BURST = 5
+DEFAULT_POLL = 1.0
+DEFAULT_TIMEOUT = 600
+DEFAULT_JOB_SECONDS = 5
+QUERY_TIMEOUT = 30
+
+# 推荐采样间隔时，探针累计耗时占采样间隔的目标比例（与 --probe-budget 的含义相同）
+TARGET_PROBE_FRACTION = 0.05
+# 单个节拍的耗时不超过采样间隔的这一比例，留出余量避免跳拍
+TICK_HEADROOM = 0.5
+
+QUERIES = ("sacct", "sstat", "squeue", "sinfo")
+
+RESULT_FILE = "perfbench_sched_bench_{ts}.json"
+
+
+def quantile(sorted_values, q):
+    """
+    最近秩分位数（sorted_values 已升序）
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values):
+    """
+    耗时列表 -> {count, mean_s, p50_s, p95_s, p99_s, max_s}
+    """
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_s": sum(values) / len(values),
+        "p50_s": quantile(values, 0.50),
+        "p95_s": quantile(values, 0.95),
+        "p99_s": quantile(values, 0.99),
+        "max_s": values[-1],
+    }
+
+
+def recommend(queries):
+    """
+    由各查询的响应时间给出监控参数建议：
+    - 采样间隔：节拍（并发执行的探针中最慢者的 p99）不超过间隔的 TICK_HEADROOM，
+      且各探针平均耗时之和不超过间隔的 TARGET_PROBE_FRACTION
+    - --probe-p99：观测到的最慢 p99 的两倍，只在调度器明显变慢时触发限流
+    """
+    measured = {name: stats for name, stats in queries.items() if stats.get("count")}
+    if not measured:
+        return None
+    slowest_p99 = max(stats["p99_s"] for stats in measured.values())
+    mean_sum = sum(stats["mean_s"] for stats in measured.values())
+    interval = max(1, math.ceil(slowest_p99 / TICK_HEADROOM), math.ceil(mean_sum / TARGET_PROBE_FRACTION))
+    return {
+        "min_interval_s": interval,
+        "probe_budget": TARGET_PROBE_FRACTION,
+        "probe_p99_s": round(2 * slowest_p99, 3),
+        "slowest_probe_p99_s": slowest_p99,
+        "probe_mean_sum_s": mean_sum,
+    }
+
+
+class SchedulerBenchmark:
+    """
+    一次调度器响应能力测量
+    """
+
+    def __init__(self, backend=None, burst=DEFAULT_BURST, poll=DEFAULT_POLL, timeout=DEFAULT_TIMEOUT):
+        self.backend = backend or get_backend()
+        self.burst = int(burst)
+        self.poll = float(poll)
+        self.timeout = float(timeout)
+        self.latencies = OrderedDict((name, []) for name in ("sbatch",) + QUERIES)
+        self.errors = {name: 0 for name in self.latencies}
+        # jobid -> {submitted, started, left_queue, accounted, state}
+        self.jobs = OrderedDict()
+
+    def timed(self, name, func, *args):
+        start = time.perf_counter()
+        returncode, output = func(*args)
+        self.latencies[name].append(time.perf_counter() - start)
+        if returncode != 0:
+            self.errors[name] += 1
+        return returncode, output
+
+    def submit_burst(self, script_path):
+        for _ in range(self.burst):
+            start = time.perf_counter()
+            try:
+                jobid = self.backend.submit(script_path)
+            except SubmitError as e:
+                self.errors["sbatch"] += 1
+                logger.error(str(e))
+                continue
+            self.latencies["sbatch"].append(time.perf_counter() - start)
+            self.jobs[jobid] = {"submitted": time.monotonic(), "started": None, "left_queue": None,
+                                "accounted": None, "state": None}
+        logger.info(f"已提交 {len(self.jobs)}/{self.burst} 个测试作业: {', '.join(self.jobs)}")
+
+    def poll_job(self, jobid, job):
+        now = time.monotonic()
+        returncode, output = self.timed("sacct", self.backend.accounting, jobid, QUERY_TIMEOUT)
+        state = parse_sacct_state(output) if returncode == 0 else None
+        if state:
+            job["state"] = state
+        if job["started"] is None and state and not state.startswith("PENDING"):
+            job["started"] = now
+        if state and state.startswith("RUNNING"):
+            self.timed("sstat", self.backend.step_stats, [jobid], QUERY_TIMEOUT)
+        if job["left_queue"] is None:
+            returncode, output = self.timed("squeue", self.backend.queue, jobid, QUERY_TIMEOUT)
+            if returncode == 0 and not output.strip():
+                job["left_queue"] = now
+        if job["accounted"] is None and is_terminal_state(state):
+            job["accounted"] = now
+
+    def run(self, script_path):
+        """
+        提交并轮询到全部作业结束（或超时），返回结果字典
+        """
+        # 能力探测（首次使用时）不计入 sbatch 延迟
+        self.backend.capabilities()
+        self.submit_burst(script_path)
+        deadline = time.monotonic() + self.timeout
+        while any(job["accounted"] is None or job["left_queue"] is None for job in self.jobs.values()):
+            if time.monotonic() >= deadline:
+                logger.warning(f"等待测试作业结束超时（{self.timeout:.0f}s）")
+                break
+            round_start = time.monotonic()
+            self.timed("sinfo", self.backend.nodes, QUERY_TIMEOUT)
+            for jobid, job in self.jobs.items():
+                if job["accounted"] is None or job["left_queue"] is None:
+                    self.poll_job(jobid, job)
+            time.sleep(max(0.0, self.poll - (time.monotonic() - round_start)))
+        self.cancel_unfinished()
+        return self.result()
+
+    def cancel_unfinished(self):
+        for jobid, job in self.jobs.items():
+            if job["left_queue"] is None:
+                try:
+                    self.backend.cancel(jobid)
+                except NotImplementedError:
+                    pass
+
+    def result(self):
+        jobs = self.jobs.values()
+        queries = OrderedDict((name, summarize(self.latencies[name])) for name in QUERIES)
+        return {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "backend": self.backend.name,
+            "burst": self.burst,
+            "submitted": len(self.jobs),
+            "poll_s": self.poll,
+            "sbatch": summarize(self.latencies["sbatch"]),
+            "queue_to_start": summarize([job["started"] - job["submitted"] for job in jobs
+                                         if job["started"] is not None]),
+            "accounting_lag": summarize([max(0.0, job["accounted"] - job["left_queue"]) for job in jobs
+                                         if job["accounted"] is not None and job["left_queue"] is not None]),
+            "queries": queries,
+            "errors": self.errors,
+            "unfinished": [jobid for jobid, job in self.jobs.items()
+                           if job["accounted"] is None or job["left_queue"] is None],
+            "final_states": {jobid: job["state"] for jobid, job in self.jobs.items()},
+            "recommendation": recommend(queries),
+        }
+
+
+def format_stats(stats):
+    if not stats.get("count"):
+        return "无数据"
+    return (f"n={stats['count']} p50={stats['p50_s'] * 1000:.0f}ms p95={stats['p95_s'] * 1000:.0f}ms "
+            f"p99={stats['p99_s'] * 1000:.0f}ms max={stats['max_s'] * 1000:.0f}ms")
+
+
+def log_result(result):
+    logger.info(f"sbatch 延迟: {format_stats(result['sbatch'])}")
+    logger.info(f"排队到开始: {format_stats(result['queue_to_start'])}（分辨率 {result['poll_s']:g}s）")
+    logger.info(f"记账延迟（离开 squeue -> sacct 终止状态）: {format_stats(result['accounting_lag'])}")
+    for name, stats in result["queries"].items():
+        logger.info(f"{name} 响应时间: {format_stats(stats)}")
+    advice = result["recommendation"]
+    if advice:
+        logger.info(f"建议监控参数: -t {advice['min_interval_s']}（或更大）--probe-budget {advice['probe_budget']} "
+                    f"--probe-p99 {advice['probe_p99_s']}")
+
+
+def run_benchmark(script_path, out_dir=None, backend=None, burst=DEFAULT_BURST, poll=DEFAULT_POLL,
+                  timeout=DEFAULT_TIMEOUT):
+    """
+    运行基准并把结果写入 out_dir（默认当前目录），返回 (结果字典, 结果文件路径)
+    """
+    result = SchedulerBenchmark(backend, burst=burst, poll=poll, timeout=timeout).run(script_path)
+    log_result(result)
+    out_dir = out_dir or os.getcwd()
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, RESULT_FILE.format(ts=datetime.now().strftime("%Y%m%d_%H%M%S")))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    logger.info(f"调度器响应能力结果已写入: {path}")
+    return result, path
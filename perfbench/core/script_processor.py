@@ -3,23 +3,26 @@
 
 import os
 import shutil
-import re
-import subprocess
 from datetime import datetime
 from perfbench.utils.logger import get_logger
 from perfbench.utils.script_parser import parse_slurm_script
-from perfbench.utils import monitoring
+from perfbench.utils import monitoring, profiler
+from perfbench.core.job_waiter import write_handle
+from perfbench.core.bulk_submit import sbatch_with_retry, SubmitError, DEFAULT_RETRIES
 
 logger = get_logger()
 
 
-def process_slurm_script(script_path, interval, output_path):
+def process_slurm_script(script_path, interval, output_path, monitor_engine="async", monitor_options=None,
+                         node_interval=None):
     """
     处理SLURM脚本
     - 解析原始脚本
     - 创建输出目录
     - 生成监控脚本
     - 提交作业
+    - 以 monitor_engine 指定的引擎（async/bash）启动登录节点监控，monitor_options 为引擎附加参数
+    - node_interval 不为 None 时，在作业脚本中注入计算节点 /proc 采样器
     """
     # 增加进度展示
     logger.info(f"开始处理SLURM脚本: {script_path}")
@@ -34,10 +37,13 @@ def process_slurm_script(script_path, interval, output_path):
     os.makedirs(job_dir, exist_ok=True)
     
     # 解析原始脚本
-    script_info = parse_slurm_script(script_path)
+    with profiler.span("parse_slurm_script", script=script_path):
+        script_info = parse_slurm_script(script_path)
     
     # 生成修改后的脚本（只做最小的环境注入，实际监控在登录节点运行）
-    modified_script = monitoring.generate_monitoring_script(script_path, script_info, interval, job_dir)
+    with profiler.span("generate_monitoring_script"):
+        modified_script = monitoring.generate_monitoring_script(script_path, script_info, interval, job_dir,
+                                                                node_interval=node_interval)
 
     # 复制修改后的脚本到script目录：script_path需要进一步处理为目录
     script_dir = os.path.dirname(script_path)
@@ -46,59 +52,33 @@ def process_slurm_script(script_path, interval, output_path):
 
     # 提交作业并获取 jobid
     jobid = submit_job(output_script)
+    # 作业句柄：供阻塞等待或稍后的 `perfbench report <job_dir>` 使用
+    write_handle(job_dir, jobid, script_path, script_info, interval, monitor_engine)
 
     # 在登录节点启动监控器（使用 sacct/seff/sinfo）
     try:
-        monitoring.start_monitoring_on_login(jobid, interval, job_dir)
+        with profiler.span("start_monitor", engine=monitor_engine):
+            monitoring.start_monitoring_on_login(jobid, interval, job_dir, engine=monitor_engine,
+                                                 **(monitor_options or {}))
     except Exception as e:
         logger.warning(f"启动登录节点监控失败: {e}")
     
     logger.info(f"作业处理完成，输出目录: {job_dir}")
     return job_dir, script_info
 
-def submit_job(script_path: str) -> str:
+def submit_job(script_path: str, retries: int = DEFAULT_RETRIES) -> str:
     """
     提交SLURM作业并返回jobid
-    - 提交前切换到脚本所在目录，保证相对路径与手动提交一致
-    - 提交后切回原工作目录，不影响后续流程
+    - 在脚本所在目录执行 sbatch（cwd=），保证相对路径与手动提交一致，不修改进程的工作目录
+    - 对 slurmctld 繁忙等暂时性错误按指数退避重试 retries 次
     - 完善错误处理，输出详细报错信息
     """
-    # 转换为绝对路径，避免相对路径歧义
     script_path = os.path.abspath(script_path)
-    script_dir = os.path.dirname(script_path)
-    script_name = os.path.basename(script_path)
-    original_cwd = os.getcwd()  # 保存原始工作目录
-    
+    logger.info(f"提交作业 -> 目录: {os.path.dirname(script_path)}，脚本: {os.path.basename(script_path)}")
     try:
-        # 切换到脚本所在目录提交作业（模拟手动在脚本目录执行sbatch）
-        os.chdir(script_dir)
-        logger.info(f"提交作业 -> 目录: {script_dir}，脚本: {script_name}")
-        
-        # 执行sbatch命令提交作业
-        result = subprocess.run(
-            ['sbatch', script_name],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True  # 提交失败时抛出CalledProcessError
-        )
-        
-        # 解析jobid（sbatch标准输出格式：Submitted batch job 123456）
-        output = result.stdout.strip()
-        jobid_match = re.search(r"Submitted batch job (\d+)", output)
-        if not jobid_match:
-            logger.error(f"无法从sbatch输出中解析jobid: {output}")
-            raise RuntimeError(f"作业提交成功，但无法解析jobid（输出: {output}）")
-        
-        jobid = jobid_match.group(1)
-        logger.info(f"作业提交成功，jobid: {jobid}")
-        return jobid
-    
-    except subprocess.CalledProcessError as e:
-        # sbatch提交失败（脚本格式错误、资源不足等）
-        error_msg = f"sbatch提交失败: {e.stderr.strip()}"
-        logger.error(error_msg)
-        raise RuntimeError(error_msg) from e
-    finally:
-        # 无论提交成功与否，切回原始工作目录
-        os.chdir(original_cwd)
\ No newline at end of file
+        jobid = sbatch_with_retry(script_path, retries=retries)
+    except SubmitError as e:
+        logger.error(str(e))
+        raise RuntimeError(str(e)) from e
+    logger.info(f"作业提交成功，jobid: {jobid}")
+    return jobid
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+强/弱扩展性扫描。
+
+给定一个 SLURM 脚本与一组节点数，为每个节点数生成一个脚本变体（改写 #SBATCH --nodes/-N），
+可选地按弱扩展规则（如 NX=64*N）导出随节点数变化的问题规模环境变量，全部提交后由同一个监控进程一起监控。
+所有作业结束后以最小节点数的成功运行（最终状态为 COMPLETED）为基准计算每个点的加速比与并行效率：
+- 强扩展：speedup = T0 / T，efficiency = speedup × N0 / N
+- 弱扩展：efficiency = T0 / T，speedup = efficiency × N / N0（规模加速比）
+未成功结束的运行不计算加速比与并行效率。结果写入扫描目录下的 scaling.csv 与 scaling.pdf（扩展性曲线）。
+
+用法：
+    perfbench -s job.slurm -t 30 -o out --sweep-nodes 1,2,4,8 [--weak-scale NX=64*N]
+    python -m perfbench.core.sweep summarize /path/to/perfbench_sweep_YYYYMMDD_HHMMSS
+"""
+
+import ast
+import argparse
+import csv
+import json
+import operator
+import os
+import re
+import shutil
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from perfbench.utils.logger import get_logger
+from perfbench.utils.script_parser import parse_slurm_script
+from perfbench.utils import monitoring
+from perfbench.utils.result_handler import load_job_result, get_platform_config, calculate_parallelism
+from perfbench.core.bulk_submit import submit_jobs
+from perfbench.core.job_waiter import write_handle, wait_for_job, job_end_state, DEFAULT_MIN_POLL
+
+logger = get_logger()
+
+MANIFEST_FILE = "sweep.json"
+SCALING_CSV = "scaling.csv"
+SCALING_PDF = "scaling.pdf"
+SCALING_FIELDS = ("nodes", "jobid", "state", "core_num", "elapsed_s", "speedup", "ideal_speedup", "efficiency")
+
+NODES_OPTION = re.compile(r'(--nodes[= ]|(?<!\S)-N[= ]?)\S+')
+
+# 弱扩展规则中允许的运算
+RULE_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+}
+
+
+def parse_node_counts(text):
+    """
+    "1,2,4,8" -> [1, 2, 4, 8]（去重并升序）
+    """
+    counts = sorted({int(item) for item in text.split(',') if item.strip()})
+    if not counts or counts[0] < 1:
+        raise ValueError(f"无效的节点数列表: {text}")
+    return counts
+
+
+def parse_weak_rule(text):
+    """
+    "NX=64*N" -> ("NX", 表达式语法树)；表达式中 N 为节点数，只允许数字与四则/乘方/取模运算
+    """
+    name, sep, expr = text.partition('=')
+    name = name.strip()
+    if not sep or not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+        raise ValueError(f"无效的弱扩展规则: {text}（格式: 变量名=表达式，如 NX=64*N）")
+    tree = ast.parse(expr.strip(), mode='eval')
+    evaluate_rule(tree, 1)
+    return name, tree
+
+
+def evaluate_rule(tree, nodes):
+    """
+    以节点数 nodes 计算规则表达式，结果为整数时返回 int
+    """
+    def visit(node):
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.BinOp) and type(node.op) in RULE_OPERATORS:
+            return RULE_OPERATORS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -visit(node.operand)
+        if isinstance(node, ast.Name) and node.id == 'N':
+            return nodes
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        raise ValueError(f"弱扩展规则中不支持的表达式: {ast.dump(node)}")
+
+    value = visit(tree)
+    rounded = round(value)
+    return int(rounded) if abs(value - rounded) < 1e-9 else value
+
+
+def generate_variant(script_path, nodes, exports, output_script):
+    """
+    生成节点数为 nodes 的脚本变体：改写 #SBATCH 中的 --nodes/-N（没有则补一行），
+    并在最后一个 #SBATCH 行之后导出弱扩展变量
+    """
+    with open(script_path, 'r') as f:
+        lines = f.readlines()
+    if not lines or not lines[0].startswith('#!'):
+        lines.insert(0, '#!/bin/bash\n')
+
+    last_sbatch_idx = 0
+    replaced = False
+    for i, line in enumerate(lines):
+        if line.strip().startswith('#SBATCH'):
+            last_sbatch_idx = i
+            new_line, count = NODES_OPTION.subn(lambda m: f"--nodes={nodes}" if m.group(1).startswith('--')
+                                                else f"-N {nodes}", line)
+            if count:
+                lines[i] = new_line
+                replaced = True
+    insert = []
+    if not replaced:
+        insert.append(f"#SBATCH --nodes={nodes}\n")
+    if exports:
+        insert.append("# PerfBench 弱扩展参数\n")
+        insert.extend(f"export {name}={value}\n" for name, value in exports.items())
+    lines[last_sbatch_idx + 1:last_sbatch_idx + 1] = insert
+
+    with open(output_script, 'w') as f:
+        f.write(''.join(lines))
+    return output_script
+
+
+def run_sweep(script_path, node_counts, interval, output_path, weak_rules=None, monitor_engine="async",
+              monitor_options=None, node_interval=None, submit_options=None, wait=True):
+    """
+    生成并提交全部变体，启动监控；wait=True 时等待全部作业结束并计算扩展性结果。
+    submit_options 为 bulk_submit.submit_jobs 的参数（并发数、提交速率、队列上限等）。
+    返回 (扫描目录, 扩展性结果行列表或 None)
+    """
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"脚本文件不存在: {script_path}")
+    rules = [parse_weak_rule(rule) for rule in (weak_rules or [])]
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    sweep_dir = os.path.join(output_path, f"perfbench_sweep_{timestamp}")
+    os.makedirs(sweep_dir, exist_ok=True)
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+
+    manifest = {
+        "script": os.path.abspath(script_path),
+        "mode": "weak" if rules else "strong",
+        "weak_rules": list(weak_rules or []),
+        "interval": interval,
+        "runs": [],
+    }
+    variants = OrderedDict()
+    for nodes in node_counts:
+        job_dir = os.path.join(sweep_dir, f"nodes_{nodes}")
+        os.makedirs(job_dir, exist_ok=True)
+        exports = {name: evaluate_rule(tree, nodes) for name, tree in rules}
+        variant = generate_variant(script_path, nodes, exports, os.path.join(job_dir, "variant.slurm"))
+        script_info = parse_slurm_script(variant)
+        modified_script = monitoring.generate_monitoring_script(variant, script_info, interval, job_dir,
+                                                                node_interval=node_interval)
+        # 与单次运行一样从原脚本所在目录提交，保证相对路径一致
+        output_script = os.path.join(script_dir, f"run_nodes{nodes}.slurm")
+        shutil.copy2(modified_script, output_script)
+        variants[output_script] = {"nodes": nodes, "job_dir": job_dir, "exports": exports, "script_info": script_info}
+
+    # 全部变体并发提交
+    jobids = submit_jobs(list(variants), **(submit_options or {}))
+    for output_script, run in variants.items():
+        jobid = jobids[output_script]
+        if jobid is None:
+            logger.error(f"扫描点 nodes={run['nodes']} 提交失败，已跳过")
+            continue
+        logger.info(f"扫描点 nodes={run['nodes']} 已提交，jobid: {jobid}")
+        script_info = run.pop("script_info")
+        write_handle(run["job_dir"], jobid, output_script, script_info, interval, monitor_engine)
+        manifest["runs"].append(dict(run, jobid=jobid))
+    if not manifest["runs"]:
+        raise RuntimeError("扩展性扫描的所有变体均提交失败")
+
+    with open(os.path.join(sweep_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    jobs = [(run["jobid"], run["job_dir"]) for run in manifest["runs"]]
+    try:
+        if monitor_engine == "async":
+            monitoring.start_async_monitor_group(jobs, interval, sweep_dir, **(monitor_options or {}))
+        else:
+            for jobid, job_dir in jobs:
+                monitoring.start_monitoring_on_login(jobid, interval, job_dir, engine=monitor_engine,
+                                                     **(monitor_options or {}))
+    except Exception as e:
+        logger.warning(f"启动登录节点监控失败: {e}")
+
+    if not wait:
+        return sweep_dir, None
+    wait_for_sweep(sweep_dir, poll=interval)
+    return sweep_dir, summarize_sweep(sweep_dir)
+
+
+def load_manifest(sweep_dir):
+    with open(os.path.join(sweep_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def wait_for_sweep(sweep_dir, poll=30):
+    """
+    等待扫描中的全部作业结束（作业并行运行，依次等待即可），poll 为最长轮询间隔
+    """
+    runs = load_manifest(sweep_dir)["runs"]
+    for i, run in enumerate(runs):
+        state = wait_for_job(run["job_dir"], run["jobid"], max_poll=max(poll, DEFAULT_MIN_POLL))
+        logger.info(f"作业 {run['jobid']} 已结束，状态: {state}（剩余 {len(runs) - i - 1} 个）")
+
+
+def summarize_sweep(sweep_dir):
+    """
+    计算每个扫描点的加速比与并行效率，写出 scaling.csv 与 scaling.pdf，返回结果行列表
+    """
+    manifest = load_manifest(sweep_dir)
+    platform_config = get_platform_config() or {}
+    rows = []
+    for run in sorted(manifest["runs"], key=lambda r: r["nodes"]):
+        elapsed = None
+        try:
+            result = load_job_result(run["job_dir"], manifest["interval"])
+            elapsed = result.get_elapsed_time() if result is not None else None
+        except Exception as e:
+            logger.warning(f"无法获取 nodes={run['nodes']} 的运行时间: {e}")
+        parallelism = calculate_parallelism(platform_name=platform_config.get("platform_name"), node_num=run["nodes"])
+        rows.append({
+            "nodes": run["nodes"],
+            "jobid": run["jobid"],
+            "state": job_end_state(run["job_dir"]),
+            "core_num": parallelism["core_num"] if parallelism else None,
+            "elapsed_s": elapsed,
+        })
+
+    # 失败、取消或超时的运行的 Elapsed 不代表完整的计算量，不参与基准的选择与加速比的计算
+    valid = [row for row in rows if row["elapsed_s"] and (row["state"] or "").startswith("COMPLETED")]
+    for row in rows:
+        if row["elapsed_s"] and row not in valid:
+            logger.warning(f"nodes={row['nodes']} 的最终状态为 {row['state']}，不计算加速比与并行效率")
+    base = valid[0] if valid else None
+    for row in rows:
+        row["ideal_speedup"] = row["nodes"] / base["nodes"] if base else None
+        if base is None or row not in valid:
+            row["speedup"] = row["efficiency"] = None
+            continue
+        ratio = base["elapsed_s"] / row["elapsed_s"]
+        if manifest["mode"] == "weak":
+            row["efficiency"] = ratio
+            row["speedup"] = ratio * row["ideal_speedup"]
+        else:
+            row["speedup"] = ratio
+            row["efficiency"] = ratio / row["ideal_speedup"]
+
+    with open(os.path.join(sweep_dir, SCALING_CSV), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SCALING_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: (f"{v:.4f}" if isinstance(v, float) else v) for k, v in row.items()})
+    try:
+        draw_scaling_curve(rows, manifest["mode"], os.path.join(sweep_dir, SCALING_PDF))
+    except Exception as e:
+        logger.warning(f"扩展性曲线生成失败: {e}")
+
+    for row in rows:
+        if row["speedup"] is not None:
+            logger.info(f"nodes={row['nodes']}: 运行时间 {row['elapsed_s']}s，加速比 {row['speedup']:.2f}，"
+                        f"并行效率 {row['efficiency'] * 100:.1f}%")
+    logger.info(f"扩展性结果已写入: {os.path.join(sweep_dir, SCALING_CSV)}")
+    return rows
+
+
+def draw_scaling_curve(rows, mode, out_path):
+    """
+    用 reportlab 绘制加速比（含理想线）与并行效率两张折线图
+    """
+    from reportlab.lib import colors
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.widgets.markers import makeMarker
+    from reportlab.graphics import renderPDF
+
+    points = [row for row in rows if row["speedup"] is not None]
+    if not points:
+        logger.warning("没有可用的扫描结果，跳过扩展性曲线")
+        return None
+
+    drawing = Drawing(500, 560)
+    title = "Weak scaling" if mode == "weak" else "Strong scaling"
+    charts = [
+        ("Speedup", [[(r["nodes"], r["speedup"]) for r in points], [(r["nodes"], r["ideal_speedup"]) for r in points]]),
+        ("Parallel efficiency", [[(r["nodes"], r["efficiency"]) for r in points], [(r["nodes"], 1.0) for r in points]]),
+    ]
+    for i, (label, data) in enumerate(charts):
+        y = 310 - i * 270
+        plot = LinePlot()
+        plot.x, plot.y, plot.width, plot.height = 60, y, 400, 200
+        plot.data = data
+        plot.lines[0].strokeColor = colors.blue
+        plot.lines[0].symbol = makeMarker('FilledCircle')
+        plot.lines[1].strokeColor = colors.grey
+        plot.lines[1].strokeDashArray = (4, 3)
+        plot.xValueAxis.valueMin = 0
+        plot.yValueAxis.valueMin = 0
+        drawing.add(plot)
+        drawing.add(String(60, y + 215, f"{title}: {label} vs nodes", fontSize=11))
+    renderPDF.drawToFile(drawing, out_path)
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 扩展性扫描')
+    sub = parser.add_subparsers(dest='action')
+    summarize = sub.add_parser('summarize', help='重新计算扫描目录的扩展性结果')
+    summarize.add_argument('sweep_dir', help='perfbench_sweep_* 目录')
+    summarize.add_argument('--wait', action='store_true', help='先等待全部作业结束')
+    args = parser.parse_args(argv)
+    if args.action != 'summarize':
+        parser.print_help()
+        return 1
+    if args.wait:
+        wait_for_sweep(args.sweep_dir, poll=load_manifest(args.sweep_dir)["interval"])
+    summarize_sweep(args.sweep_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,17 +3,20 @@
 
 import os
 import sys
+import tempfile
 from perfbench.utils.logger import get_logger
 from perfbench.utils.system_checker import check_slurm_environment, check_slurm_commands
+from perfbench.core.sched_bench import run_benchmark, DEFAULT_BURST, DEFAULT_POLL, DEFAULT_TIMEOUT, DEFAULT_JOB_SECONDS
 
 logger = get_logger()
 
-def validate_environment(force: bool = False):
+def validate_environment(force: bool = False, out_dir=None, burst=DEFAULT_BURST, poll=DEFAULT_POLL,
+                         timeout=DEFAULT_TIMEOUT):
     """
     验证工具运行环境
     - 检查SLURM环境
     - 验证必要的SLURM命令
-    - 测试作业提交功能
+    - 提交一批测试作业，测量调度器响应能力并给出监控参数建议（见 perfbench.core.sched_bench）
     """
     logger.info("开始验证PerfBench运行环境...")
     
@@ -27,31 +30,37 @@ def validate_environment(force: bool = False):
         logger.error("SLURM命令验证失败")
         return False
     
-    # 创建并提交测试作业
+    # 创建测试作业，提交一批并测量调度器响应能力
     test_script = create_test_job()
     if test_script:
-        if submit_test_job(test_script):
-            logger.info("测试作业提交成功")
-            cleanup_test_job(test_script)
+        result = None
+        try:
+            result, _ = run_benchmark(test_script, out_dir=out_dir, burst=burst, poll=poll, timeout=timeout)
+        finally:
+            cleanup_test_job(test_script, list(result["final_states"]) if result else [])
+        if result["submitted"] and not result["unfinished"]:
+            logger.info("测试作业提交并运行成功")
             return True
+        if result["submitted"]:
+            logger.error(f"测试作业未在 {timeout:.0f}s 内结束: {', '.join(result['unfinished'])}")
     
     logger.error("环境验证失败")
     return False
 
-def create_test_job():
+def create_test_job(seconds=DEFAULT_JOB_SECONDS):
     """
-    创建测试作业脚本
+    在本次运行独占的临时目录中创建测试作业脚本（作业在脚本所在目录提交，输出文件也写在该目录）
     """
-    script_content = """#!/bin/bash
+    script_content = f"""#!/bin/bash
 #SBATCH --job-name=perfbench_test
 #SBATCH --nodes=1
 #SBATCH --time=1:00
 #SBATCH --output=perfbench_test_%j.out
 
-sleep 10
+sleep {seconds}
 """
     try:
-        script_path = "/tmp/perfbench_test.slurm"
+        script_path = os.path.join(tempfile.mkdtemp(prefix="perfbench_test_"), "perfbench_test.slurm")
         with open(script_path, "w") as f:
             f.write(script_content)
         return script_path
@@ -59,21 +68,20 @@ sleep 10
         logger.error(f"创建测试作业失败: {str(e)}")
         return None
 
-def submit_test_job(script_path):
+def cleanup_test_job(script_path, jobids=()):
     """
-    提交测试作业
-    """
-    cmd = f"sbatch {script_path}"
-    result = os.system(cmd)
-    return result == 0
-
-def cleanup_test_job(script_path):
-    """
-    清理测试作业文件
+    清理测试作业文件：只删除本次运行的脚本与 jobids 对应的输出文件，最后删除（已清空的）临时目录
     """
+    test_dir = os.path.dirname(script_path)
+    paths = [script_path] + [os.path.join(test_dir, f"perfbench_test_{jobid}.out") for jobid in jobids]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"清理测试文件 {path} 失败: {e}")
     try:
-        os.remove(script_path)
-        output_pattern = "perfbench_test_*.out"
-        os.system(f"rm -f {output_pattern}")
-    except Exception as e:
-        logger.warning(f"清理测试文件失败: {str(e)}")
\ No newline at end of file
+        os.rmdir(test_dir)
+    except OSError as e:
+        logger.warning(f"清理测试目录 {test_dir} 失败: {e}")
@@ -1,11 +1,17 @@
 import io
 import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import white, black, lightgrey
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from perfbench.utils.logger import get_logger
+from perfbench.utils import profiler
 
 logger = get_logger()
 
@@ -23,6 +29,22 @@ HERE = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_FONT_PATH = os.path.join(HERE, "Arial.ttf")
 DEFAULT_FONT_NAME = "CJKFont"
 DEFAULT_OUT_DIR = os.path.join(HERE, "output")
+DEFAULT_TEMPLATE = "certificate.pdf"
+
+# 已注册到 reportlab 的字体名（注册会解析整个 TTF 文件，每个进程只做一次）
+_REGISTERED_FONTS = set()
+# 已解析的模板渲染器：(模板路径, 字体路径, 字体名) -> CertificateRenderer
+_RENDERERS = {}
+# 进程池中每个工作进程各自持有的渲染器
+_WORKER_RENDERER = None
+
+def register_font(font_path=DEFAULT_FONT_PATH, font_name=DEFAULT_FONT_NAME):
+    """
+    注册 TTF 字体（同一进程内只注册一次）
+    """
+    if font_name not in _REGISTERED_FONTS:
+        pdfmetrics.registerFont(TTFont(font_name, font_path))
+        _REGISTERED_FONTS.add(font_name)
 
 def create_overlay(page_width, page_height, overrides_for_page, font_path=DEFAULT_FONT_PATH, font_name=DEFAULT_FONT_NAME):
     """
@@ -32,7 +54,7 @@ def create_overlay(page_width, page_height, overrides_for_page, font_path=DEFAUL
     c = canvas.Canvas(packet, pagesize=(page_width, page_height))
 
     # 注册中文字体
-    pdfmetrics.registerFont(TTFont(font_name, font_path))
+    register_font(font_path, font_name)
     c.setFont(font_name, 18)
 
     for x, y, text, w, h in overrides_for_page:
@@ -108,7 +130,79 @@ def create_grid_overlay(page_width, page_height):
     packet.seek(0)
     return PdfReader(packet).pages[0]
 
-def generate_certificate(report_info, out_dir=DEFAULT_OUT_DIR, input_template="certificate.pdf", font_path=DEFAULT_FONT_PATH):
+def resolve_template(input_template=DEFAULT_TEMPLATE):
+    """
+    返回模板 PDF 的路径：绝对路径直接使用，相对路径先找当前目录，再找本模块所在目录
+    """
+    if os.path.isabs(input_template):
+        return input_template
+    if os.path.exists(input_template):
+        return input_template
+    template_path = os.path.join(HERE, input_template)
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"找不到模板文件: {input_template}")
+    return template_path
+
+def build_overrides(report_info):
+    """
+    按页组织需要覆写的项目：页码 -> [(x, y, text, w, h), ...]
+    """
+    overrides = [
+        (0, 200, 446, report_info.get("platform", ""), 0, 0),
+        (0, 200, 388, report_info.get("node_num", ""), 0, 0),
+        (0, 200, 332, report_info.get("app_name", ""), 0, 0),
+        (0, 200, 275, report_info.get("core_num", ""), 0, 0),
+        (0, 200, 216, report_info.get("eff", ""), 0, 0),
+        # 应用性能指标（可选）写在并行效率下方
+        (0, 200, 178, report_info.get("fom", ""), 0, 0),
+        (0, 300, 141, report_info.get("time", ""), 0, 0),
+        (0, 100, 115, "", 0, 0),
+    ]
+    page_to_items = {}
+    for page_idx, x, y, text, w, h in overrides:
+        page_to_items.setdefault(page_idx, []).append((x, y, text, w, h))
+    return page_to_items
+
+class CertificateRenderer:
+    """
+    证书渲染器：构造时注册字体、解析模板一次，之后每次 render 只生成覆写层并合并。
+    模板页本身不被修改：每张证书新建空白页，依次合并模板页与覆写层。
+    """
+
+    def __init__(self, template_path, font_path=DEFAULT_FONT_PATH, font_name=DEFAULT_FONT_NAME):
+        self.template_path = template_path
+        self.font_path = font_path
+        self.font_name = font_name
+        register_font(font_path, font_name)
+        self.reader = PdfReader(template_path)
+        self.pages = [(page, float(page.mediabox.width), float(page.mediabox.height)) for page in self.reader.pages]
+
+    def render(self, report_info, final_pdf):
+        page_to_items = build_overrides(report_info)
+        writer = PdfWriter()
+        with profiler.span("pdf_merge", pages=len(self.pages)):
+            for i, (template_page, page_width, page_height) in enumerate(self.pages):
+                page = writer.add_blank_page(width=page_width, height=page_height)
+                page.merge_page(template_page)
+                if i in page_to_items:
+                    overlay_page = create_overlay(page_width, page_height, page_to_items[i], self.font_path, self.font_name)
+                    page.merge_page(overlay_page)
+        with profiler.span("pdf_write"), open(final_pdf, "wb") as f:
+            writer.write(f)
+        return final_pdf
+
+def get_renderer(input_template=DEFAULT_TEMPLATE, font_path=DEFAULT_FONT_PATH, font_name=DEFAULT_FONT_NAME):
+    """
+    返回缓存的渲染器（同一进程内同一模板只解析一次）
+    """
+    template_path = os.path.abspath(resolve_template(input_template))
+    key = (template_path, font_path, font_name)
+    renderer = _RENDERERS.get(key)
+    if renderer is None:
+        renderer = _RENDERERS[key] = CertificateRenderer(template_path, font_path, font_name)
+    return renderer
+
+def generate_certificate(report_info, out_dir=DEFAULT_OUT_DIR, input_template=DEFAULT_TEMPLATE, font_path=DEFAULT_FONT_PATH):
     """
     生成性能测试证书海报
     
@@ -119,6 +213,7 @@ def generate_certificate(report_info, out_dir=DEFAULT_OUT_DIR, input_template="c
             - app_name: 应用名称
             - core_num: 核心数量
             - eff: 效率信息
+            - fom: 应用性能指标（可选，如 "HPL: 1234.5 Gflops"）
             - time: 时间信息
         out_dir (str): 输出目录路径
         input_template (str): 输入模板PDF文件名或路径
@@ -130,69 +225,88 @@ def generate_certificate(report_info, out_dir=DEFAULT_OUT_DIR, input_template="c
     # 确保输出目录存在
     os.makedirs(out_dir, exist_ok=True)
     
-    # 检查输入模板是否为完整路径，如果不是则使用相对路径
-    if not os.path.isabs(input_template):
-        # 假设模板在当前目录或与脚本相同的目录
-        if os.path.exists(input_template):
-            template_path = input_template
-        else:
-            # 尝试使用脚本所在目录
-            template_path = os.path.join(HERE, input_template)
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"找不到模板文件: {input_template}")
-    else:
-        template_path = input_template
-    
-    # 生成OVERRIDES列表
-    OVERRIDES = [
-        (0, 200, 446, report_info.get("platform", ""), 0, 0),
-        (0, 200, 388, report_info.get("node_num", ""), 0, 0),
-        (0, 200, 332, report_info.get("app_name", ""), 0, 0),
-        (0, 200, 275, report_info.get("core_num", ""), 0, 0),
-        (0, 200, 216, report_info.get("eff", ""), 0, 0),
-        (0, 300, 141, report_info.get("time", ""), 0, 0),
-        (0, 100, 115, "", 0, 0),
-    ]
-    
     # 定义文件名
     final_pdf = os.path.join(out_dir, "certificate_final.pdf")
     
     try:
-        # 添加文本内容到PDF
-        reader = PdfReader(template_path)
-        writer = PdfWriter()
-
-        # 按页组织需要覆写的项目
-        page_to_items = {}
-        for page_idx, x, y, text, w, h in OVERRIDES:
-            page_to_items.setdefault(page_idx, []).append((x, y, text, w, h))
-
-        for i, page in enumerate(reader.pages):
-            if i in page_to_items:
-                # 获取原页面大小
-                page_width = float(page.mediabox.width)
-                page_height = float(page.mediabox.height)
-
-                overlay_page = create_overlay(page_width, page_height, page_to_items[i], font_path)
-
-                # 合并 overlay 到当前页面
-                page.merge_page(overlay_page)
-
-            writer.add_page(page)
-
-        # 保存最终结果
-        with open(final_pdf, "wb") as f:
-            writer.write(f)
-        
+        with profiler.span("generate_certificate"):
+            get_renderer(input_template, font_path).render(report_info, final_pdf)
         logger.info(f"已生成证书海报: {final_pdf}")
-        
         return final_pdf
         
     except Exception as e:
         logger.error(f"生成证书时出错: {str(e)}")
         raise
 
+def _init_worker(template_path, font_path, font_name):
+    # 每个工作进程启动时注册字体并解析模板一次
+    global _WORKER_RENDERER
+    _WORKER_RENDERER = CertificateRenderer(template_path, font_path, font_name)
+
+def _render_one(index, report_info, final_pdf):
+    start = time.perf_counter()
+    try:
+        _WORKER_RENDERER.render(report_info, final_pdf)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {"index": index, "path": final_pdf, "seconds": time.perf_counter() - start, "error": error}
+
+def generate_certificates(report_infos, out_dir=DEFAULT_OUT_DIR, input_template=DEFAULT_TEMPLATE,
+                          font_path=DEFAULT_FONT_PATH, workers=None):
+    """
+    批量生成证书：在进程池中并行渲染，每个工作进程只注册一次字体、解析一次模板。
+
+    Args:
+        report_infos (list): report_info 字典列表；字典中的 out_path 指定该证书的输出文件，
+                             否则输出到 out_dir/certificate_<序号>.pdf
+        workers (int): 进程数，默认为 CPU 核数
+
+    Returns:
+        list: 每张证书一个 {"index", "path", "seconds", "error"}，按输入顺序排列
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    template_path = os.path.abspath(resolve_template(input_template))
+    jobs = []
+    for i, report_info in enumerate(report_infos):
+        info = dict(report_info)
+        final_pdf = info.pop("out_path", None) or os.path.join(out_dir, f"certificate_{i:04d}.pdf")
+        jobs.append((i, info, final_pdf))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path, font_path, DEFAULT_FONT_NAME)) as pool:
+        futures = [pool.submit(_render_one, *job) for job in jobs]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r["error"]]
+    for r in failed:
+        logger.error(f"证书 {r['index']} 生成失败: {r['error']}")
+    if results:
+        seconds = [r["seconds"] for r in results]
+        logger.info(f"已批量生成 {len(results) - len(failed)}/{len(results)} 张证书，总耗时 {elapsed:.2f}s，"
+                    f"单张平均 {sum(seconds) / len(seconds) * 1000:.1f}ms，最长 {max(seconds) * 1000:.1f}ms")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 证书批量生成')
+    parser.add_argument('infos', help='report_info 字典列表（JSON 文件）')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help='输出目录')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE, help='模板 PDF')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为 CPU 核数')
+    args = parser.parse_args(argv)
+
+    with open(args.infos, 'r', encoding='utf-8') as f:
+        report_infos = json.load(f)
+    results = generate_certificates(report_infos, args.out_dir, args.template, workers=args.workers)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if not any(r["error"] for r in results) else 1
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # 批量用法：python -m perfbench.report.certificate_generator infos.json --out-dir ./output
+        sys.exit(main())
     # test用法
     sample_report_info = {
         "platform": "HYGON",
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+时间序列降采样。
+
+lttb: Largest-Triangle-Three-Buckets。首尾点保留，中间的点均分到 threshold-2 个桶中，
+每个桶选出与“上一个选中点、下一个桶的均值点”构成三角形面积最大的点，能在大幅减少点数的同时保留峰值与形状。
+桶的边界与均值用 NumPy 一次算出，逐桶选点时桶内的面积计算也是向量化的，
+循环次数只与输出点数有关（与输入长度无关），百万点的序列降到一千点只需几十毫秒。
+"""
+
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    返回降采样后的 (x, y)，点数不超过 threshold；NaN 点先被剔除
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # 第 i 个桶为 [starts[i], ends[i])，覆盖首尾点之间的 [1, n-1)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # 每个桶的“下一个点”：下一个桶的均值，最后一个桶为末尾点
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = starts[i], ends[i]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+def change_points(x, codes):
+    """
+    分类序列只保留取值发生变化的点（以及最后一个点），返回 (x, codes)；用于状态时间线
+    """
+    x = np.asarray(x)
+    codes = np.asarray(codes)
+    if len(codes) == 0:
+        return x, codes
+    keep = np.empty(len(codes), dtype=bool)
+    keep[0] = True
+    keep[1:] = codes[1:] != codes[:-1]
+    keep[-1] = True
+    return x[keep], codes[keep]
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+多页性能报告（performance_report.pdf，与 certificate_final.pdf 放在同一目录）。
+
+直接用 reportlab 绘制监控数据的时间序列图：
+- 第 1 页：作业概要 + 内存（sacct 各作业步 MaxRSS、sstat 各作业步 AveRSS）
+- 第 2 页：CPU（sstat AveCPU×NTasks 的增长速率，即平均忙碌核数；计算节点采样器的 CPU 利用率）
+- 第 3 页：状态（作业状态时间线、实际采样间隔、sinfo 各状态节点数）
+- 第 4 页：应用性能指标（作业输出文件中解析出的 FOM 最终值与吞吐量随时间的变化，见 perfbench.utils.fom；没有时省略）
+所有连续序列先经 LTTB 降采样到 max_points 个点，百万次采样的作业也能在数秒内生成体积很小的 PDF，且不丢失峰值。
+图中文字使用英文：证书所用的内置字体不含中文字形。
+"""
+
+import os
+import numpy as np
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.legends import Legend
+from perfbench.utils.logger import get_logger
+from perfbench.utils import profiler
+from perfbench.utils.result_handler import Result, JOB_COLUMNS, load_job_result
+from perfbench.utils import slurm_types
+from perfbench.utils.archive import output_dir_for
+from perfbench.utils.fom import FOM_PARSERS, load_fom_records, summarize_fom
+from perfbench.report.downsample import lttb, change_points
+from perfbench.report.certificate_generator import register_font, DEFAULT_FONT_NAME
+
+logger = get_logger()
+
+REPORT_FILE = "performance_report.pdf"
+DEFAULT_MAX_POINTS = 1000
+GIB = 1024.0 ** 3
+
+PALETTE = [colors.HexColor(c) for c in ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                                        "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")]
+STATE_COLORS = {
+    "PENDING": colors.HexColor("#bbbbbb"),
+    "RUNNING": colors.HexColor("#2ca02c"),
+    "COMPLETING": colors.HexColor("#98df8a"),
+    "COMPLETED": colors.HexColor("#1f77b4"),
+    "FAILED": colors.HexColor("#d62728"),
+    "CANCELLED": colors.HexColor("#ff7f0e"),
+    "TIMEOUT": colors.HexColor("#9467bd"),
+}
+# 状态页中展示的节点状态
+NODE_STATES_SHOWN = ("idle", "alloc", "mix", "drain", "down")
+
+# 应用性能指标页中列出的指标个数上限
+FOM_TABLE_ROWS = 20
+
+CHART_WIDTH = 460
+CHART_HEIGHT = 220
+
+
+def load_result(cmd_name, job_dir, interval):
+    """
+    载入某个命令的解析结果，没有采样时返回 None
+    """
+    result = Result(cmd_name=cmd_name, out_dir=job_dir, interval=interval, incremental=True)
+    return result if result.row_count else None
+
+
+def step_series(result, column_name, scale=1.0):
+    """
+    为每个作业步（不含作业本身、数组任务与异构分量的汇总行）返回 (标签, time_ms, 值)
+    """
+    series = []
+    for job_id, ids in result.steps.items():
+        if ids["step"] is None:
+            continue
+        time_ms, values = result.get_step_series(job_id, column_name)
+        if time_ms is not None and len(time_ms):
+            series.append((job_id, time_ms, np.asarray(values, dtype=np.float64) / scale))
+    return series
+
+
+def rate_series(time_ms, cumulative):
+    """
+    累计量 -> 相邻采样间的增长速率（每秒），时间取区间终点
+    """
+    if len(time_ms) < 2:
+        return time_ms[:0], np.empty(0)
+    seconds = np.diff(time_ms) / 1000.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(seconds > 0, np.diff(cumulative) / seconds, np.nan)
+    return time_ms[1:], np.clip(rate, 0, None)
+
+
+def fom_series(records):
+    """
+    应用性能指标记录 -> 吞吐量序列 [(标签, time_ms, 值), ...]：各解析器的主指标直接使用，
+    累计量（如 LAMMPS 的时间步）换算为每秒增长速率，没有主指标的解析器（key = value）取重复出现的指标
+    """
+    grouped = {}
+    for ts_ms, parser, metric, value, unit in records:
+        grouped.setdefault((parser, metric, unit), []).append((ts_ms, value))
+    series = []
+    for (parser, metric, unit), points in grouped.items():
+        cls = FOM_PARSERS.get(parser)
+        time_ms = np.array([p[0] for p in points], dtype=np.float64)
+        values = np.array([p[1] for p in points], dtype=np.float64)
+        if cls is not None and metric in cls.counters:
+            series.append((f"{parser} {metric}/s",) + rate_series(time_ms, values))
+        elif cls is not None and cls.primary is not None:
+            if metric == cls.primary:
+                series.append((f"{parser} {unit or metric}", time_ms, values))
+        elif len(points) > 1:
+            series.append((f"{metric} ({unit})" if unit else metric, time_ms, values))
+    return series[:len(PALETTE)]
+
+
+class ReportBuilder:
+    """
+    逐页绘制报告：每页至多两张图，横轴为相对作业首个采样的分钟数
+    """
+
+    def __init__(self, job_dir, interval, out_path, max_points=DEFAULT_MAX_POINTS, font_name=DEFAULT_FONT_NAME):
+        self.job_dir = job_dir
+        self.interval = interval
+        self.max_points = max_points
+        self.font_name = font_name
+        self.canvas = canvas.Canvas(out_path, pagesize=A4)
+        self.page_width, self.page_height = A4
+        self.t0 = None
+
+    def minutes(self, time_ms):
+        return (np.asarray(time_ms, dtype=np.float64) - self.t0) / 60000.0
+
+    def text(self, x, y, text, size=10):
+        self.canvas.setFont(self.font_name, size)
+        self.canvas.drawString(x, y, text)
+
+    def line_chart(self, y, title, series, y_label):
+        """
+        在页面纵坐标 y 处绘制折线图；series 为 [(标签, time_ms, 值), ...]，每条序列各自做 LTTB 降采样
+        """
+        drawing = Drawing(CHART_WIDTH + 60, CHART_HEIGHT + 50)
+        drawing.add(String(0, CHART_HEIGHT + 35, title, fontName=self.font_name, fontSize=11))
+        data, labels = [], []
+        for label, time_ms, values in series:
+            x, v = lttb(self.minutes(time_ms), values, self.max_points)
+            if len(x):
+                data.append(list(zip(x.tolist(), v.tolist())))
+                labels.append(label)
+        if not data:
+            drawing.add(String(CHART_WIDTH / 2, CHART_HEIGHT / 2, "no data", fontName=self.font_name, fontSize=10))
+            renderPDF.draw(drawing, self.canvas, 50, y)
+            return
+        plot = LinePlot()
+        plot.x, plot.y, plot.width, plot.height = 40, 20, CHART_WIDTH - 40, CHART_HEIGHT - 20
+        plot.data = data
+        for i in range(len(data)):
+            plot.lines[i].strokeColor = PALETTE[i % len(PALETTE)]
+            plot.lines[i].strokeWidth = 0.8
+        plot.xValueAxis.valueMin = 0
+        plot.xValueAxis.labels.fontSize = 7
+        plot.yValueAxis.labels.fontSize = 7
+        drawing.add(plot)
+        drawing.add(String(CHART_WIDTH - 40, 2, "time (min)", fontName=self.font_name, fontSize=8))
+        drawing.add(String(0, CHART_HEIGHT + 20, y_label, fontName=self.font_name, fontSize=8))
+        drawing.add(self.legend(labels, CHART_WIDTH + 5, CHART_HEIGHT))
+        renderPDF.draw(drawing, self.canvas, 50, y)
+
+    def legend(self, labels, x, y, colormap=None):
+        legend = Legend()
+        legend.x, legend.y = x, y
+        legend.fontName = self.font_name
+        legend.fontSize = 7
+        legend.alignment = 'right'
+        legend.columnMaximum = 12
+        legend.colorNamePairs = [((colormap or {}).get(label, PALETTE[i % len(PALETTE)]), label)
+                                 for i, label in enumerate(labels)]
+        return legend
+
+    def state_band(self, y, title, time_ms, codes, end_ms):
+        """
+        作业状态时间线：每段状态一个色块
+        """
+        drawing = Drawing(CHART_WIDTH + 60, 80)
+        drawing.add(String(0, 65, title, fontName=self.font_name, fontSize=11))
+        x, codes = change_points(time_ms, codes)
+        span = max(end_ms - self.t0, 1)
+        seen = []
+        for i, code in enumerate(codes.tolist()):
+            start = x[i]
+            stop = x[i + 1] if i + 1 < len(x) else end_ms
+            state = slurm_types.JOB_STATES[code]
+            color = STATE_COLORS.get(state, colors.HexColor("#444444"))
+            left = 40 + (start - self.t0) / span * (CHART_WIDTH - 40)
+            width = max((stop - start) / span * (CHART_WIDTH - 40), 0.5)
+            drawing.add(Rect(left, 20, width, 30, fillColor=color, strokeColor=None))
+            if state not in seen:
+                seen.append(state)
+        drawing.add(String(40, 5, "0", fontSize=7))
+        drawing.add(String(CHART_WIDTH - 40, 5, f"{span / 60000.0:.1f} min", fontName=self.font_name, fontSize=7))
+        drawing.add(self.legend(seen, CHART_WIDTH + 5, 50, STATE_COLORS))
+        renderPDF.draw(drawing, self.canvas, 50, y)
+
+    def build(self):
+        # 记账存储关闭时没有 sacct 采样，作业状态与运行时间取自 scontrol show job（没有作业步的数据）
+        sacct = load_job_result(self.job_dir, self.interval)
+        if sacct is None:
+            raise ValueError(f"未找到 sacct 或 scontrol 的采样数据: {self.job_dir}")
+        id_column, state_column, elapsed_column = JOB_COLUMNS[sacct.cmd_name]
+        sstat = load_result("sstat", self.job_dir, self.interval)
+        sinfo = load_result("sinfo", self.job_dir, self.interval)
+        job_time, states = sacct.get_column(state_column)
+        self.t0 = int(job_time[0])
+        end_ms = int(job_time[-1])
+
+        # 第 1 页：概要 + 内存
+        top = self.page_height - 60
+        self.text(50, top, "PerfBench performance report", 16)
+        _, elapsed = sacct.get_column(elapsed_column)
+        _, job_ids = sacct.get_column(id_column, decode=True)
+        final_state = slurm_types.JOB_STATES[int(states[-1])]
+        self.text(50, top - 25, f"Job: {job_ids[-1]}    final state: {final_state}    elapsed: {int(np.nan_to_num(elapsed[-1]))} s")
+        self.text(50, top - 42, f"samples: {len(job_time)}    steps: {sum(1 for s in sacct.steps.values() if s['step'] is not None)}"
+                                f"    job_dir: {self.job_dir}", 8)
+        self.line_chart(top - 330, "Memory: sacct MaxRSS per step", step_series(sacct, "MaxRSS", GIB), "GiB")
+        self.line_chart(top - 620, "Memory: sstat AveRSS per step",
+                        step_series(sstat, "AveRSS", GIB) if sstat else [], "GiB")
+        self.canvas.showPage()
+
+        # 第 2 页：CPU
+        cpu = []
+        if sstat is not None:
+            for label, time_ms, ave_cpu in step_series(sstat, "AveCPU"):
+                _, tasks = sstat.get_step_series(label, "NTasks")
+                total = ave_cpu * np.clip(tasks, 1, None) if tasks is not None else ave_cpu
+                cpu.append((label,) + rate_series(time_ms, total))
+        self.line_chart(top - 270, "CPU: busy cores per step (rate of sstat AveCPU x NTasks)", cpu, "cores")
+        node_cpu = []
+        for node, columns in sacct.get_node_samples().items():
+            if "cpu_util" in columns:
+                node_cpu.append((node, columns["rate_time_ms"], columns["cpu_util"] * 100.0))
+        self.line_chart(top - 560, "CPU: compute node utilisation (node sampler)", node_cpu, "%")
+        self.canvas.showPage()
+
+        # 第 3 页：状态
+        self.state_band(top - 80, "Job state timeline", job_time, states, end_ms)
+        timeline_ms, intervals = sacct.get_sampling_timeline()
+        self.line_chart(top - 380, "Effective sampling interval",
+                        [("interval", timeline_ms, intervals)] if timeline_ms is not None else [], "s")
+        node_series = []
+        if sinfo is not None:
+            sample_ms, counts = sinfo.get_node_state_counts()
+            if sample_ms is not None:
+                for state in NODE_STATES_SHOWN:
+                    column = counts[:, slurm_types.NODE_STATE_CODES[state]]
+                    if column.any():
+                        node_series.append((state, sample_ms, column))
+        self.line_chart(top - 670, "Cluster node states (sinfo)", node_series, "nodes")
+        self.canvas.showPage()
+
+        # 第 4 页：应用性能指标
+        records = load_fom_records(self.job_dir)
+        if records:
+            self.fom_page(top, records)
+        self.canvas.save()
+
+    def fom_page(self, top, records):
+        summary = summarize_fom(records)
+        headline = summary["headline"]
+        self.text(50, top, "Application figure of merit", 16)
+        self.text(50, top - 25, f"final: {headline['label']}" if headline else "final: n/a")
+        y = top - 45
+        for entry in summary["metrics"][:FOM_TABLE_ROWS]:
+            self.text(60, y, f"{entry['parser']}: {entry['metric']} = {entry['value']:.6g} {entry['unit']}"
+                             f"    (reported {entry['count']}x)", 8)
+            y -= 11
+        self.line_chart(y - 280, "Application throughput over time (job output)", fom_series(records), "rate")
+        self.canvas.showPage()
+
+
+def generate_performance_report(job_dir, interval, out_dir=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    生成多页性能报告，返回 PDF 路径；out_dir 默认为 job_dir（与 certificate_final.pdf 同目录），
+    job_dir 为归档时默认为去掉后缀的同名目录
+    """
+    out_dir = out_dir or output_dir_for(job_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, REPORT_FILE)
+    register_font()
+    with profiler.span("generate_performance_report"):
+        ReportBuilder(job_dir, interval, out_path, max_points=max_points).build()
+    logger.info(f"已生成性能报告: {out_path}")
+    return out_path
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作业输出目录的单文件归档（<job_dir>.pbar）。
+
+归档是标准的 zip 文件（可用任何 unzip 工具查看），成员按顺序流式写入，末尾的中央目录即内部索引：
+- samples.seg / samples.idx 以 STORED 方式存放（段文件中较大的记录本身已经 zlib 压缩），
+  读取时直接 mmap 归档文件中对应的字节范围，Result 按时间戳索引随机读取单条采样，无需解压；
+- 旧布局中按节拍落盘的 <cmd>_<ts>.log 在打包时导入归档内的时序存储，不再逐个成为成员；
+- 其余文件（修改后的脚本、采样时间线、聚合、节点采样、job_end 标记、报告等）以 DEFLATE 压缩存放；
+- 派生数据与运行期文件（.perfbench_cache 检查点、monitor_login.pid、samples.lock、*.tmp）不打包。
+
+所有读取 job_dir 的模块都通过 read_job_file/list_job_files 访问文件，job_dir 参数既可以是目录也可以是归档路径。
+
+用法：
+    python -m perfbench.utils.archive pack /path/to/job_dir [-o out.pbar] [--remove]
+    python -m perfbench.utils.archive list /path/to/job_dir.pbar
+"""
+
+import argparse
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import zipfile
+
+from perfbench.utils import sample_store
+from perfbench.utils.constants import ARCHIVE_SUFFIX
+
+
+# 按字节范围直接访问的成员，不压缩
+STORED_MEMBERS = (sample_store.SEGMENT_FILE, sample_store.INDEX_FILE)
+# 不打包的文件/目录
+EXCLUDED_NAMES = (".perfbench_cache", "monitor_login.pid", sample_store.LOCK_FILE)
+EXCLUDED_SUFFIXES = (".tmp",)
+
+# 旧布局的逐节拍日志（job_end_*.log 是作业结束标记，作为普通成员保留）
+TICK_LOG_PATTERN = re.compile(r"^(sacct|sinfo|sstat|scontrol|seff|squeue)_\d{8}_\d{6}(_\d{3})?\.log$")
+
+# zip 本地文件头：签名 ... 文件名长度、扩展字段长度（共 30 字节）
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+COPY_CHUNK = 1 << 20
+
+
+def is_archive(path):
+    return path.endswith(ARCHIVE_SUFFIX) and os.path.isfile(path)
+
+
+def archive_path_for(job_dir):
+    return os.path.normpath(job_dir) + ARCHIVE_SUFFIX
+
+
+def output_dir_for(job_dir):
+    """
+    报告等输出文件的目录：目录本身；归档则为去掉后缀的同名目录（归档不可写）
+    """
+    if is_archive(job_dir):
+        return job_dir[:-len(ARCHIVE_SUFFIX)]
+    return job_dir
+
+
+class JobArchive:
+    """
+    归档的只读访问。STORED 成员可以按字节范围 mmap，其余成员经 zipfile 解压读取
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        self.infos = {info.filename: info for info in self.zip.infolist()}
+        self.map = None
+
+    def exists(self, name):
+        return name in self.infos
+
+    def names(self, prefix=""):
+        """
+        prefix 目录下（不递归）的成员名，按名称排序
+        """
+        prefix = prefix.rstrip("/") + "/" if prefix else ""
+        return sorted(name[len(prefix):] for name in self.infos
+                      if name.startswith(prefix) and "/" not in name[len(prefix):])
+
+    def read(self, name):
+        return self.zip.read(name)
+
+    def buffer(self, name):
+        """
+        返回 STORED 成员在归档 mmap 中的只读视图（memoryview）
+        """
+        info = self.infos[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{self.path} 中的 {name} 经过压缩，无法按字节范围访问")
+        if info.file_size == 0:
+            return None
+        if self.map is None:
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = LOCAL_HEADER.unpack_from(self.map, info.header_offset)
+        start = info.header_offset + LOCAL_HEADER.size + fields[9] + fields[10]
+        return memoryview(self.map)[start:start + info.file_size]
+
+    def segment_reader(self):
+        """
+        归档内时序存储的 SegmentReader（不解压、不复制）
+        """
+        return sample_store.SegmentReader.from_buffers(
+            self.buffer(sample_store.SEGMENT_FILE), self.buffer(sample_store.INDEX_FILE), self.path)
+
+    def close(self):
+        self.zip.close()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+# 已打开的归档：路径 -> ((mtime_ns, size), JobArchive)
+_OPEN_ARCHIVES = {}
+
+
+def open_archive(path):
+    """
+    打开归档（按路径与文件状态缓存，同一进程中多个 Result 共享一个 mmap）
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _OPEN_ARCHIVES.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    archive = JobArchive(path)
+    _OPEN_ARCHIVES[path] = (stamp, archive)
+    return archive
+
+
+def read_job_file(job_dir, name):
+    """
+    读取 job_dir（目录或归档）中的文件，返回字节串；不存在时返回 None
+    """
+    if is_archive(job_dir):
+        archive = open_archive(job_dir)
+        return archive.read(name) if archive.exists(name) else None
+    try:
+        with open(os.path.join(job_dir, name), "rb") as f:
+            return f.read()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def list_job_files(job_dir, subdir=""):
+    """
+    job_dir（目录或归档）中 subdir 下的文件名（不递归），按名称排序；目录不存在时返回空列表
+    """
+    if is_archive(job_dir):
+        return open_archive(job_dir).names(subdir)
+    path = os.path.join(job_dir, subdir) if subdir else job_dir
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if os.path.isfile(os.path.join(path, name)))
+
+
+def job_file_stamp(job_dir, name):
+    """
+    文件的版本标识，用于判断缓存是否过期：目录中为 (mtime_ns, size)，归档中为 CRC；不存在时返回 None
+    """
+    if is_archive(job_dir):
+        archive = open_archive(job_dir)
+        return ("archive", archive.infos[name].CRC) if archive.exists(name) else None
+    try:
+        st = os.stat(os.path.join(job_dir, name))
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def collect_members(job_dir, skip_tick_logs):
+    """
+    返回需要打包的 [(绝对路径, 成员名)]，按成员名排序
+    """
+    members = []
+    for root, dirs, files in os.walk(job_dir):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_NAMES)
+        for name in files:
+            if name in EXCLUDED_NAMES or name.endswith(EXCLUDED_SUFFIXES):
+                continue
+            if skip_tick_logs and root == job_dir and TICK_LOG_PATTERN.match(name):
+                continue
+            path = os.path.join(root, name)
+            members.append((path, os.path.relpath(path, job_dir).replace(os.sep, "/")))
+    members.sort(key=lambda item: item[1])
+    return members
+
+
+def write_member(zf, path, arcname):
+    """
+    流式写入一个成员（分块复制，不把整个文件读入内存）
+    """
+    info = zipfile.ZipInfo.from_file(path, arcname)
+    info.compress_type = zipfile.ZIP_STORED if arcname in STORED_MEMBERS else zipfile.ZIP_DEFLATED
+    with open(path, "rb") as src, zf.open(info, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+
+def create_archive(job_dir, archive_path=None, remove=False):
+    """
+    把 job_dir 打包为单个归档，返回 (归档路径, 统计信息)。
+    先写入临时文件，校验通过后再替换；remove=True 时校验通过后删除原目录
+    """
+    job_dir = os.path.normpath(job_dir)
+    if not os.path.isdir(job_dir):
+        raise FileNotFoundError(f"作业输出目录不存在: {job_dir}")
+    archive_path = archive_path or archive_path_for(job_dir)
+    tmp_path = archive_path + ".tmp"
+    staging = None
+    has_store = sample_store.has_store(job_dir)
+    members = collect_members(job_dir, skip_tick_logs=not has_store)
+    stats = {"files": sum(len(files) for _, _, files in os.walk(job_dir)), "imported_logs": 0}
+    stats["bytes_before"] = sum(os.path.getsize(os.path.join(root, name))
+                                for root, _, files in os.walk(job_dir) for name in files)
+    try:
+        if not has_store:
+            # 旧布局：逐节拍日志导入临时目录中的时序存储，再作为归档内的 samples.seg/idx
+            staging = tempfile.mkdtemp(prefix="perfbench_archive_", dir=os.path.dirname(archive_path) or None)
+            stats["imported_logs"] = sample_store.import_log_dir(job_dir, target_dir=staging)
+            if stats["imported_logs"]:
+                members = [(path, arcname) for path, arcname in members if arcname not in STORED_MEMBERS]
+                members += [(os.path.join(staging, name), name) for name in STORED_MEMBERS]
+                members.sort(key=lambda item: item[1])
+        with zipfile.ZipFile(tmp_path, "w", allowZip64=True) as zf:
+            for path, arcname in members:
+                write_member(zf, path, arcname)
+        with zipfile.ZipFile(tmp_path) as zf:
+            bad = zf.testzip()
+            if bad is not None:
+                raise ValueError(f"归档校验失败: {bad}")
+        os.replace(tmp_path, archive_path)
+    finally:
+        if staging is not None:
+            shutil.rmtree(staging, ignore_errors=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    stats["members"] = len(members)
+    stats["bytes_after"] = os.path.getsize(archive_path)
+    if remove:
+        shutil.rmtree(job_dir)
+    return archive_path, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 作业输出目录归档')
+    sub = parser.add_subparsers(dest='action')
+    p_pack = sub.add_parser('pack', help='把作业输出目录打包为单个归档文件')
+    p_pack.add_argument('job_dir', help='作业输出目录')
+    p_pack.add_argument('-o', '--output', default=None, help=f'归档路径，默认为 <job_dir>{ARCHIVE_SUFFIX}')
+    p_pack.add_argument('--remove', action='store_true', help='打包并校验通过后删除原目录')
+    p_list = sub.add_parser('list', help='列出归档中的成员')
+    p_list.add_argument('archive', help='归档路径')
+    args = parser.parse_args(argv)
+
+    if args.action == 'pack':
+        path, stats = create_archive(args.job_dir, args.output, remove=args.remove)
+        print(f"已打包 {stats['files']} 个文件（{stats['bytes_before']} 字节）-> {path}"
+              f"（{stats['members']} 个成员，{stats['bytes_after']} 字节）")
+    elif args.action == 'list':
+        for info in JobArchive(args.archive).zip.infolist():
+            method = "stored" if info.compress_type == zipfile.ZIP_STORED else "deflated"
+            print(f"{info.file_size:>12} {info.compress_size:>12} {method:<8} {info.filename}")
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
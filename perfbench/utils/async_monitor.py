@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 asyncio 的登录节点监控引擎。
+
+与 monitor_login.sh 的 bash 循环不同，本引擎是一个常驻的 Python 进程：
+- 每个采样节拍内的 sacct/sinfo/sstat/scontrol/squeue 并发执行，且各自带超时；
+- 节拍按单调时钟上的绝对截止时间调度，命令耗时不会累加到采样周期上；
+- 文件时间戳精确到毫秒（YYYYMMDD_HHMMSS_mmm）；
+- 可选的自适应间隔（--adaptive）：排队或指标平稳时指数退避，状态变化或指标突变时收紧到下限，
+  每个节拍实际采用的间隔记录在 sampling_timeline.csv 中（见 perfbench.utils.sampling）；
+- sinfo 等与作业无关的集群级查询经过登录节点共享缓存（见 perfbench.utils.snapshot_cache），
+  同一节点上并发的多个监控实例在 TTL（--snapshot-ttl，默认等于采样间隔，0 表示不使用缓存）内只查询一次；
+- 可选的保留策略（--raw-retention，仅 segment 方式）：每分钟把完整结束的桶增量汇总为 1 分钟/10 分钟聚合，
+  早于保留窗口的原始采样在聚合覆盖后被压缩掉（见 perfbench.utils.rollup），长作业的输出目录不再无限增长。
+- 每个探针的耗时直方图、非零退出/超时次数与输出字节数写入 probe_stats.json；可选的开销预算
+  （--probe-budget 探针累计耗时占比上限、--probe-p99 耗时 p99 上限）超出时先停用 sinfo/scontrol、再拉长采样间隔，
+  每次限流/恢复决策写入 throttle_log.csv（见 perfbench.utils.overhead）。
+- 每个节拍读取作业 --output 文件的新增内容，应用自身报告的性能指标（HPL Gflops、LAMMPS timesteps/s、
+  "key = value" 行等）连同读取时刻写入 fom_series.csv（见 perfbench.utils.fom，--fom-parsers 选择解析器）。
+
+输出方式（--storage）：
+    segment（默认）：所有探针输出追加写入 job_dir 下的 samples.seg/samples.idx（见 sample_store）
+    files：与 bash 版本一致，每个节拍写 sacct_<ts>.log / sinfo_<ts>.log / sstat_<ts>.log / scontrol_<ts>.log
+两种方式在作业结束时都会额外写出 job_end_<ts>.log 作为结束标记（async 引擎在聚合、应用指标与开销统计全部落盘之后才写出）。
+
+用法：
+    python -m perfbench.utils.async_monitor --jobid 123 --interval 5 --outdir /path/to/job_dir
+    # 同一事件循环中监控多个作业（扩展性扫描），--jobid 与 --outdir 按顺序一一对应
+    python -m perfbench.utils.async_monitor --jobid 123 --outdir dir1 --jobid 124 --outdir dir2 --interval 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from perfbench.utils import slurm_types
+from perfbench.utils.sample_store import SegmentWriter
+from perfbench.utils.sampling import AdaptiveInterval, FixedInterval, SamplingTimeline, DEFAULT_MAX_INTERVAL
+from perfbench.utils.snapshot_cache import SnapshotCache
+from perfbench.utils.rollup import RollupEngine, ROLLUP_PERIOD
+from perfbench.utils.scheduler import get_backend, parse_sacct_state, is_terminal_state
+from perfbench.utils.overhead import ProbeStats, OverheadBudget, OPTIONAL_PROBES
+from perfbench.utils.capabilities import unsupported_probes
+from perfbench.utils.fom import follower_for_job
+
+logger = logging.getLogger('perfbench.async_monitor')
+
+# 写入 job_dir 的探针（squeue 只用于判断作业是否仍在队列中，不落盘）
+LOGGED_PROBES = ("sacct", "sinfo", "sstat", "scontrol")
+
+# 与作业无关、可在多个监控实例之间共享的探针
+SHARED_PROBES = ("sinfo",)
+
+# 每个采样节拍执行的探针（sstat 的查询目标见 AsyncMonitor.sstat_targets，seff 只在作业结束后执行一次）
+TICK_PROBES = ("sacct", "sinfo", "sstat", "scontrol", "squeue")
+
+
+# squeue 连续失败这么多次后才视为作业已离队（作业记录被 slurmctld 清除后 squeue 对该作业号报错，
+# 单次失败多为 slurmctld 暂时不可用）
+SQUEUE_FAILURE_LIMIT = 5
+
+# 可选的输出方式
+STORAGE_MODES = ("segment", "files")
+
+# 每隔多少个节拍写一次 probe_stats.json（作业结束时总会再写一次）
+STATS_PERIOD_TICKS = 10
+
+
+def format_timestamp(wall_time):
+    """
+    将 time.time() 格式化为带毫秒的时间戳：YYYYMMDD_HHMMSS_mmm
+    """
+    dt = datetime.fromtimestamp(wall_time)
+    return f"{dt.strftime('%Y%m%d_%H%M%S')}_{dt.microsecond // 1000:03d}"
+
+
+def running_allocations(output):
+    """
+    从 sacct -P 输出中找出处于 RUNNING 状态的分配（作业本身、数组任务或异构分量，不含作业步），
+    返回它们的原始作业号，供下一节拍的 sstat 使用。
+    """
+    lines = [line for line in output.splitlines() if line.strip()]
+    if len(lines) < 2:
+        return []
+    headers = [h.strip() for h in lines[0].split('|')]
+    if "JobID" not in headers or "State" not in headers:
+        return []
+    id_idx = headers.index("JobID")
+    raw_idx = headers.index("JobIDRaw") if "JobIDRaw" in headers else id_idx
+    state_idx = headers.index("State")
+    targets = []
+    for line in lines[1:]:
+        fields = line.split('|')
+        if len(fields) <= max(id_idx, raw_idx, state_idx):
+            continue
+        if '.' in fields[id_idx] or not fields[state_idx].startswith("RUNNING"):
+            continue
+        raw = fields[raw_idx].strip()
+        if raw and raw not in targets:
+            targets.append(raw)
+    return targets
+
+
+def extract_metrics(sacct_output, sstat_output):
+    """
+    从一个节拍的 sacct/sstat 输出中提取自适应调度使用的指标：
+    step_count（sacct 记录数）、rss_bytes（各作业步 MaxRSS 之和）、cpu_seconds（各作业步 AveCPU×NTasks 之和）
+    """
+    sacct_lines = [line for line in sacct_output.splitlines() if line.strip()]
+    metrics = {"step_count": max(len(sacct_lines) - 1, 0), "rss_bytes": 0.0, "cpu_seconds": 0.0}
+    lines = [line for line in sstat_output.splitlines() if line.strip()]
+    if len(lines) < 2:
+        return metrics
+    headers = [h.strip() for h in lines[0].split('|')]
+    if "JobID" not in headers:
+        return metrics
+    columns = dict(zip(headers, zip(*[line.split('|') for line in lines[1:]])))
+    if "MaxRSS" in columns:
+        metrics["rss_bytes"] = float(np.nansum(slurm_types.size_to_bytes(columns["MaxRSS"])))
+    if "AveCPU" in columns:
+        cpu = slurm_types.duration_to_seconds(columns["AveCPU"])
+        if "NTasks" in columns:
+            cpu = cpu * slurm_types.to_int(columns["NTasks"]).clip(min=1)
+        metrics["cpu_seconds"] = float(np.nansum(cpu))
+    return metrics
+
+
+class ProbeResult:
+    """
+    单个探针的一次执行结果
+    """
+    __slots__ = ("name", "returncode", "output", "latency", "timed_out")
+
+    def __init__(self, name, returncode, output, latency, timed_out=False):
+        self.name = name
+        self.returncode = returncode
+        self.output = output
+        self.latency = latency
+        self.timed_out = timed_out
+
+
+async def run_probe(name, argv, timeout):
+    """
+    异步执行一个探针命令，stdout 与 stderr 合并（等价于 bash 版本的 2>&1）。
+    超时后杀掉子进程，返回 timed_out=True 的结果。
+    """
+    start = time.monotonic()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+    except OSError as e:
+        return ProbeResult(name, 127, f"{argv[0]}: {e}\n", time.monotonic() - start)
+
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        return ProbeResult(name, None, f"{argv[0]}: timed out after {timeout}s\n",
+                           time.monotonic() - start, timed_out=True)
+
+    return ProbeResult(name, proc.returncode, stdout.decode('utf-8', errors='replace'),
+                       time.monotonic() - start)
+
+
+async def run_cached_probe(cache, name, argv, ttl, timeout):
+    """
+    经共享缓存执行探针：文件锁与子进程调用是阻塞的，放到线程池中执行，不阻塞同一节拍的其他探针。
+    等待时间（含等锁）超过 timeout 时按超时处理。
+    """
+    start = time.monotonic()
+    loop = asyncio.get_event_loop()
+    try:
+        returncode, output, _ = await asyncio.wait_for(
+            loop.run_in_executor(None, cache.fetch, argv, ttl, timeout), timeout=timeout)
+    except asyncio.TimeoutError:
+        return ProbeResult(name, None, f"{argv[0]}: timed out after {timeout}s\n",
+                           time.monotonic() - start, timed_out=True)
+    return ProbeResult(name, returncode, output, time.monotonic() - start, timed_out=returncode is None)
+
+
+class AsyncMonitor:
+    """
+    常驻的异步监控引擎：按绝对截止时间调度采样节拍，直到作业结束。
+    """
+
+    def __init__(self, jobid, interval, output_dir, probe_timeout=None, storage="segment",
+                 adaptive=False, min_interval=None, max_interval=None, snapshot_ttl=None, raw_retention=None,
+                 backend=None, probe_budget=None, probe_p99=None, fom_parsers=None):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"不支持的输出方式: {storage}")
+        self.jobid = str(jobid)
+        self.interval = float(interval)
+        self.output_dir = output_dir
+        # 默认超时与采样间隔相同，保证单个卡住的 RPC 不会拖垮后续节拍
+        self.probe_timeout = float(probe_timeout) if probe_timeout else self.interval
+        # 调度器后端（见 perfbench.utils.scheduler），默认为当前进程的后端
+        self.backend = backend or get_backend()
+        # 上一节拍 sacct 中处于运行状态的分配，决定本节拍 sstat 的查询目标
+        self.sstat_targets = []
+        self.ticks = 0
+        self.skipped_ticks = 0
+        # squeue 连续失败（非零退出）的次数
+        self.squeue_failures = 0
+        self.storage = storage
+        self.writer = None
+        if adaptive:
+            self.policy = AdaptiveInterval(floor=min_interval or self.interval,
+                                           ceiling=max_interval or DEFAULT_MAX_INTERVAL)
+        else:
+            self.policy = FixedInterval(self.interval)
+        self.timeline = None
+        self.last_ts_ms = None
+        # 作业结束时的结束标记 (ts_ms, 文本)，在全部监控数据落盘之后才写出
+        self.end_marker = None
+        self.last_metrics = {}
+        # 共享快照缓存的 TTL 默认等于采样间隔：同一节拍附近启动的其他实例可以直接复用
+        self.snapshot_ttl = self.interval if snapshot_ttl is None else float(snapshot_ttl)
+        self.cache = None
+        if self.snapshot_ttl > 0 and not self.backend.in_process:
+            try:
+                self.cache = SnapshotCache()
+            except OSError as e:
+                logger.warning(f"无法使用共享快照缓存，sinfo 将直接查询: {e}")
+        self.raw_retention = raw_retention
+        self.rollup = None
+        self.last_rollup = None
+        if raw_retention is not None and storage != "segment":
+            logger.warning("--raw-retention 只适用于 segment 输出方式，已忽略")
+        # 探针开销统计（probe_stats.json）与超出预算时的自动限流（throttle_log.csv）
+        self.stats = ProbeStats(output_dir)
+        # 当前集群上不会返回数据的探针（记账存储或作业资源采集关闭），不执行
+        self.unsupported = unsupported_probes(self.backend.capabilities())
+        if self.unsupported:
+            logger.info(f"作业 {self.jobid}: 集群不支持，跳过探针 {', '.join(sorted(self.unsupported))}")
+        # 没有 sacct 时作业状态与运行时间只能取自 scontrol show job，限流时不停用 scontrol
+        optional = [name for name in OPTIONAL_PROBES if not (name == "scontrol" and "sacct" in self.unsupported)]
+        self.budget = OverheadBudget(max_fraction=probe_budget, p99_ceiling=probe_p99, output_dir=output_dir,
+                                     optional=optional)
+        # 作业输出文件中的应用性能指标（fom_parsers 为逗号分隔的解析器名称，none 表示不跟踪）
+        self.follower = None
+        if fom_parsers != "none":
+            self.follower = follower_for_job(output_dir, self.jobid, fom_parsers.split(",") if fom_parsers else None)
+
+    def maintain_store(self, ts_ms, compact=True):
+        """
+        增量聚合并压缩早于保留窗口的原始采样（在线程池中执行，期间本作业暂停写入）
+        """
+        try:
+            written = self.rollup.update(ts_ms)
+            dropped = self.rollup.expire(self.writer, ts_ms) if compact else 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"作业 {self.jobid} 聚合/压缩原始采样失败: {e}")
+            return
+        if dropped:
+            logger.info(f"作业 {self.jobid}: 新增 {written} 行聚合，压缩掉 {dropped} 条超出保留窗口的原始记录")
+
+    def follow_output(self, ts_ms, final=False):
+        """
+        解析作业输出文件的新增内容（在线程池中执行，不阻塞同一事件循环中的其他作业）
+        """
+        try:
+            self.follower.poll(ts_ms, final=final)
+        except OSError as e:
+            logger.warning(f"作业 {self.jobid} 读取输出文件 {self.follower.path} 失败: {e}")
+
+    def write_log(self, name, ts_ms, text):
+        if self.writer is not None:
+            self.writer.append(name, ts_ms, text)
+        else:
+            self.write_file(name, ts_ms, text)
+
+    def write_file(self, name, ts_ms, text):
+        path = os.path.join(self.output_dir, f"{name}_{format_timestamp(ts_ms / 1000.0)}.log")
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def write_stats(self):
+        try:
+            self.stats.write(self.budget)
+        except OSError as e:
+            logger.warning(f"作业 {self.jobid} 写入探针统计失败: {e}")
+
+    async def run_probe(self, name):
+        if self.backend.in_process:
+            # 进程内的后端（模拟器）直接返回结果，不需要子进程
+            start = time.monotonic()
+            returncode, output = self.backend.probe(name, self.jobid, self.sstat_targets, self.probe_timeout)
+            return ProbeResult(name, returncode, output, time.monotonic() - start, timed_out=returncode is None)
+        argv = self.backend.probe_argv(name, self.jobid, self.sstat_targets)
+        if self.cache is not None and name in SHARED_PROBES:
+            return await run_cached_probe(self.cache, name, argv, self.snapshot_ttl, self.probe_timeout)
+        return await run_probe(name, argv, self.probe_timeout)
+
+    async def sample(self):
+        """
+        执行一个采样节拍，返回 (作业是否已结束, sacct 中的作业状态)
+        """
+        ts_ms = int(time.time() * 1000)
+        self.last_ts_ms = ts_ms
+        tick_start = time.monotonic()
+        dropped = self.budget.dropped
+        results = await asyncio.gather(*[self.run_probe(name) for name in TICK_PROBES
+                                         if name not in dropped and name not in self.unsupported])
+        by_name = {r.name: r for r in results}
+        sacct_output = by_name["sacct"].output if "sacct" in by_name else ""
+        sstat_output = by_name["sstat"].output if "sstat" in by_name else ""
+        for result in results:
+            self.stats.record(result)
+        for name in dropped:
+            self.stats.skip(name)
+        self.stats.ticks += 1
+
+        for name in LOGGED_PROBES:
+            if name in by_name:
+                self.write_log(name, ts_ms, by_name[name].output)
+
+        state = parse_sacct_state(sacct_output)
+        self.sstat_targets = running_allocations(sacct_output)
+        self.last_metrics = extract_metrics(sacct_output, sstat_output)
+        squeue = by_name["squeue"]
+        # squeue 超时或失败时无法判断作业是否离队，只依据 sacct 的状态；连续失败 SQUEUE_FAILURE_LIMIT 次才视为离队
+        if squeue.timed_out:
+            left_queue = False
+        elif squeue.returncode == 0:
+            self.squeue_failures = 0
+            left_queue = not any(line.strip() for line in squeue.output.splitlines())
+        else:
+            self.squeue_failures += 1
+            left_queue = self.squeue_failures >= SQUEUE_FAILURE_LIMIT
+
+        finished = is_terminal_state(state) or left_queue
+        decision = self.budget.update(tick_start, time.monotonic(), [r.latency for r in results], ts_ms)
+        if decision is not None:
+            logger.warning(f"作业 {self.jobid} 监控开销{'超出预算，限流' if decision['action'] == 'throttle' else '回落，恢复'}"
+                           f"到第 {decision['level']} 级（停用探针: {', '.join(decision['dropped']) or '无'}，"
+                           f"间隔 ×{decision['interval_factor']}）: {decision['reason']}")
+        if finished:
+            await self.finish(ts_ms, state, left_queue)
+        return finished, state
+
+    async def finish(self, ts_ms, state, left_queue):
+        # seff 只在作业结束后调用一次
+        if "seff" not in self.unsupported:
+            seff = await self.run_probe("seff")
+            self.stats.record(seff)
+            self.write_log("seff", ts_ms, seff.output)
+        ts = format_timestamp(ts_ms / 1000.0)
+        message = f"Job {self.jobid} finished with state {state} at {ts} (squeue empty: {int(left_queue)})\n"
+        self.end_marker = (ts_ms, message)
+
+    async def run(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.storage == "segment":
+            self.writer = SegmentWriter(self.output_dir)
+            if self.raw_retention is not None:
+                self.rollup = RollupEngine(self.output_dir, self.raw_retention)
+        self.timeline = SamplingTimeline(self.output_dir)
+        try:
+            return await self.loop()
+        finally:
+            self.write_stats()
+            self.timeline.close()
+            if self.writer is not None:
+                if self.end_marker is not None:
+                    self.writer.append("job_end", *self.end_marker)
+                self.writer.close()
+                self.writer = None
+            # 结束标记最后落盘（始终单独成文件，便于外部以文件是否存在判断作业结束）：
+            # 外部看到标记时，聚合、输出文件中的应用指标、开销统计与时间线都已写完
+            if self.end_marker is not None:
+                self.write_file("job_end", *self.end_marker)
+
+    async def loop(self):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time()
+        while True:
+            # 下一节拍的截止时间 = 上一截止时间 + 本次间隔，与命令耗时无关
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            finished, state = await self.sample()
+            self.ticks += 1
+            interval, reason = self.policy.update(loop.time(), state, **self.last_metrics)
+            if self.budget.interval_factor > 1:
+                interval *= self.budget.interval_factor
+                reason = "throttle"
+            if self.ticks % STATS_PERIOD_TICKS == 0:
+                self.write_stats()
+            self.timeline.record(self.last_ts_ms, interval, state, "end" if finished else reason)
+            if self.rollup is not None and (finished or self.last_rollup is None
+                                            or loop.time() - self.last_rollup >= ROLLUP_PERIOD):
+                self.last_rollup = loop.time()
+                # 作业结束时只补齐聚合，保留窗口内的原始采样留给报告
+                await loop.run_in_executor(None, self.maintain_store, self.last_ts_ms, not finished)
+            if self.follower is not None:
+                # 作业结束时读完输出文件，包括没有换行符的最后一行
+                await loop.run_in_executor(None, self.follow_output, self.last_ts_ms, finished)
+            if finished:
+                logger.info(f"作业 {self.jobid} 已结束，状态: {state}，共采样 {self.ticks} 次")
+                if self.follower is not None and self.follower.records:
+                    logger.info(f"作业 {self.jobid}: 从输出文件中解析出 {self.follower.records} 条应用性能指标")
+                if self.cache is not None:
+                    for name, counters in self.cache.stats.items():
+                        logger.info(f"共享快照缓存 {name}: 命中 {counters['hits']} / 未命中 {counters['misses']}")
+                return state
+
+            deadline += interval
+            # 如果本节拍耗时超过了一个周期，跳过已错过的节拍，而不是连续补采
+            now = loop.time()
+            if deadline <= now:
+                missed = int((now - deadline) // interval) + 1
+                self.skipped_ticks += missed
+                deadline += missed * interval
+                logger.warning(f"采样节拍超时，跳过 {missed} 个节拍（累计 {self.skipped_ticks}）")
+
+
+def run_monitor(jobid, interval, output_dir, **options):
+    """
+    同步入口：在新的事件循环中运行监控直到作业结束，options 见 AsyncMonitor
+    """
+    return run_monitors([(jobid, output_dir)], interval, **options)[0]
+
+
+def run_monitors(jobs, interval, **options):
+    """
+    在同一事件循环中并发监控多个作业直到全部结束，jobs 为 [(jobid, output_dir), ...]，
+    返回各作业的最终状态列表
+    """
+    monitors = [AsyncMonitor(jobid, interval, output_dir, **options) for jobid, output_dir in jobs]
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(asyncio.gather(*[monitor.run() for monitor in monitors]))
+    finally:
+        loop.close()
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench asyncio 登录节点监控引擎')
+    parser.add_argument('--jobid', action='append', required=True, help='被监控的作业ID（可重复）')
+    parser.add_argument('--interval', type=float, required=True, help='采样间隔（秒）')
+    parser.add_argument('--outdir', action='append', required=True, help='输出目录（job_dir，与 --jobid 一一对应）')
+    parser.add_argument('--probe-timeout', type=float, default=None, help='单个探针的超时时间（秒），默认等于采样间隔')
+    parser.add_argument('--storage', choices=STORAGE_MODES, default='segment',
+                        help='输出方式：segment（追加写时序存储，默认）或 files（每节拍一个 log 文件）')
+    parser.add_argument('--adaptive', action='store_true', help='启用自适应采样间隔')
+    parser.add_argument('--min-interval', type=float, default=None, help='自适应模式的间隔下限（秒），默认等于 --interval')
+    parser.add_argument('--max-interval', type=float, default=None,
+                        help=f'自适应模式的间隔上限（秒），默认 {DEFAULT_MAX_INTERVAL:g}')
+    parser.add_argument('--snapshot-ttl', type=float, default=None,
+                        help='sinfo 等集群级查询在共享缓存中的有效期（秒），默认等于采样间隔，0 表示不使用缓存')
+    parser.add_argument('--raw-retention', type=float, default=None,
+                        help='原始采样的保留时长（秒），更早的采样汇总为 1 分钟/10 分钟聚合后丢弃；默认全部保留')
+    parser.add_argument('--probe-budget', type=float, default=None,
+                        help='探针累计耗时占墙钟时间的比例上限（如 0.05），超出时停用 sinfo/scontrol 并拉长采样间隔')
+    parser.add_argument('--probe-p99', type=float, default=None,
+                        help='探针耗时 p99 的上限（秒），超出时同样逐级限流')
+    parser.add_argument('--fom-parsers', type=str, default=None,
+                        help='解析作业输出文件的应用指标解析器（逗号分隔），默认全部，none 表示不跟踪输出文件')
+    args = parser.parse_args(argv)
+    if len(args.jobid) != len(args.outdir):
+        parser.error("--jobid 与 --outdir 的个数必须相同")
+    return args
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stdout,
+    )
+    run_monitors(list(zip(args.jobid, args.outdir)), args.interval,
+                 probe_timeout=args.probe_timeout, storage=args.storage, adaptive=args.adaptive,
+                 min_interval=args.min_interval, max_interval=args.max_interval,
+                 snapshot_ttl=args.snapshot_ttl, raw_retention=args.raw_retention,
+                 probe_budget=args.probe_budget, probe_p99=args.probe_p99, fom_parsers=args.fom_parsers)
+
+
+if __name__ == '__main__':
+    main()
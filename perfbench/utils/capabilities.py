@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SLURM 能力探测与缓存。
+
+首次使用时探测一次当前集群的 SLURM：版本、sacct 支持的字段（--helpformat）、记账存储与作业资源采集插件
+（scontrol show config 中的 AccountingStorageType / JobAcctGatherType）、sbatch --parsable 与 sstat --allsteps 是否可用，
+结果缓存在 ~/.perfbench/capabilities.json。
+
+缓存以指纹为键：slurm.conf 的内容哈希，加上各 SLURM 命令的解析路径与可执行文件的大小/修改时间
+（升级 SLURM 会替换可执行文件，因此版本变化也会使指纹失效）。计算指纹只需 stat，不启动子进程；
+指纹不变时直接使用缓存，监控、解析与提交据此选择最省的查询方式而不必重复探测。
+
+每项能力为 True/False/None，None 表示未能判断（例如命令输出不是预期格式），调用方按“支持”处理，
+与探测之前的行为一致。
+
+用法：
+    python -m perfbench.utils.capabilities show [--refresh]
+    python -m perfbench.utils.capabilities clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from perfbench.utils.snapshot_cache import run_command, file_lock
+
+DEFAULT_CAPABILITIES_FILE = os.path.expanduser('~/.perfbench/capabilities.json')
+
+# 参与指纹计算并探测路径的命令
+SLURM_COMMANDS = ("sbatch", "scancel", "sacct", "sstat", "sinfo", "scontrol", "squeue", "seff")
+
+# 未设置 SLURM_CONF 时依次查找的 slurm.conf
+SLURM_CONF_PATHS = ("/etc/slurm/slurm.conf", "/etc/slurm-llnl/slurm.conf", "/usr/local/etc/slurm.conf")
+
+PROBE_TIMEOUT = 30
+
+VERSION_PATTERN = re.compile(r"slurm(?:-wlm)?\s+(\d+)\.(\d+)(?:\.(\d+))?", re.IGNORECASE)
+
+# 探测之前（或无法探测时）的能力：全部未知，按支持处理
+UNKNOWN = {
+    "version": None,
+    "commands": {},
+    "sacct_fields": None,
+    "accounting_storage": None,
+    "job_acct_gather": None,
+    "sbatch_parsable": None,
+    "sstat_allsteps": None,
+    "config": {},
+}
+
+
+def slurm_conf_path():
+    path = os.environ.get("SLURM_CONF")
+    if path:
+        return path
+    for candidate in SLURM_CONF_PATHS:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def fingerprint():
+    """
+    返回 (指纹, 各命令的解析路径)
+    """
+    digest = hashlib.sha1()
+    conf = slurm_conf_path()
+    digest.update(f"conf={conf}\0".encode('utf-8'))
+    if conf:
+        try:
+            with open(conf, 'rb') as f:
+                digest.update(hashlib.sha1(f.read()).digest())
+        except OSError:
+            pass
+    paths = {}
+    for cmd in SLURM_COMMANDS:
+        path = shutil.which(cmd)
+        paths[cmd] = path
+        if path is None:
+            digest.update(f"{cmd}=\0".encode('utf-8'))
+            continue
+        real = os.path.realpath(path)
+        try:
+            st = os.stat(real)
+            digest.update(f"{cmd}={real}:{st.st_size}:{st.st_mtime_ns}\0".encode('utf-8'))
+        except OSError:
+            digest.update(f"{cmd}={real}\0".encode('utf-8'))
+    return digest.hexdigest(), paths
+
+
+def parse_version(output):
+    match = VERSION_PATTERN.search(output or "")
+    if not match:
+        return None
+    return ".".join(part for part in match.groups() if part is not None)
+
+
+def parse_helpformat(output):
+    """
+    sacct --helpformat 的字段列表；输出不像字段列表时返回 None
+    """
+    fields = sorted(set(output.split()))
+    return fields if "JobID" in fields and "State" in fields else None
+
+
+def parse_config(output):
+    """
+    scontrol show config 的 "Key = Value" 行 -> 字典
+    """
+    config = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if sep and key and " " not in key:
+            config[key] = value.strip()
+    return config
+
+
+def help_mentions(output, option):
+    """
+    帮助文本中是否列出 option；输出不像帮助文本时返回 None
+    """
+    if "Usage" not in output and "usage" not in output:
+        return None
+    return option in output
+
+
+def probe_capabilities(paths=None):
+    """
+    执行探测命令，返回能力字典（只在缓存失效时调用）
+    """
+    if paths is None:
+        _, paths = fingerprint()
+    caps = json.loads(json.dumps(UNKNOWN))
+    caps["commands"] = dict(paths)
+
+    def run(argv):
+        if not paths.get(argv[0]):
+            return None, ""
+        return run_command(argv, PROBE_TIMEOUT, stderr=False)
+
+    returncode, output = run(["sinfo", "--version"])
+    if returncode == 0:
+        caps["version"] = parse_version(output)
+
+    returncode, output = run(["sacct", "--helpformat"])
+    if returncode == 0:
+        caps["sacct_fields"] = parse_helpformat(output)
+
+    returncode, output = run(["scontrol", "show", "config"])
+    if returncode == 0:
+        config = parse_config(output)
+        keep = ("AccountingStorageType", "JobAcctGatherType", "ProctrackType", "TaskPlugin", "SelectType",
+                "SLURM_VERSION", "ClusterName")
+        caps["config"] = {key: config[key] for key in keep if key in config}
+        storage = config.get("AccountingStorageType")
+        if storage is not None:
+            caps["accounting_storage"] = storage != "accounting_storage/none"
+        gather = config.get("JobAcctGatherType")
+        if gather is not None:
+            caps["job_acct_gather"] = gather != "jobacct_gather/none"
+        if caps["version"] is None:
+            caps["version"] = parse_version(f"slurm {config.get('SLURM_VERSION', '')}")
+
+    returncode, output = run(["sbatch", "--help"])
+    if returncode == 0:
+        caps["sbatch_parsable"] = help_mentions(output, "--parsable")
+    returncode, output = run(["sstat", "--help"])
+    if returncode == 0:
+        caps["sstat_allsteps"] = help_mentions(output, "--allsteps")
+    return caps
+
+
+def read_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache(path, entry):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_capabilities(refresh=False, path=None):
+    """
+    返回当前集群的能力字典：指纹与缓存一致时直接读取缓存，否则持锁探测并写入缓存。
+    无法读写缓存目录时探测结果只在本次使用
+    """
+    path = path or DEFAULT_CAPABILITIES_FILE
+    digest, paths = fingerprint()
+    entry = None if refresh else read_cache(path)
+    if entry is not None and entry.get("fingerprint") == digest:
+        return entry["capabilities"]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(path + ".lock"):
+            # 等锁期间可能已被其他实例探测完成
+            entry = None if refresh else read_cache(path)
+            if entry is not None and entry.get("fingerprint") == digest:
+                return entry["capabilities"]
+            caps = probe_capabilities(paths)
+            write_cache(path, {"fingerprint": digest, "probed": time.time(), "capabilities": caps})
+            return caps
+    except OSError:
+        return probe_capabilities(paths)
+
+
+def supported(caps, name):
+    """
+    能力 name 是否可用（未知按可用处理）
+    """
+    return caps.get(name) is not False
+
+
+def sacct_format(caps, fmt):
+    """
+    去掉当前 SLURM 的 sacct 不认识的字段（字段列表未知时原样返回）
+    """
+    fields = caps.get("sacct_fields")
+    if not fields:
+        return fmt
+    known = {field.lower() for field in fields}
+    kept = [field for field in fmt.split(",") if re.sub(r"%\d+$", "", field).lower() in known]
+    return ",".join(kept) or fmt
+
+
+def unsupported_probes(caps):
+    """
+    在当前集群上不会返回数据的监控探针：
+    记账存储关闭时 sacct/seff 没有记录（作业状态与运行时间改由 scontrol show job 提供，见 result_handler.load_job_result），
+    作业资源采集插件关闭时 sstat 没有数据
+    """
+    probes = set()
+    if not supported(caps, "accounting_storage"):
+        probes.update(("sacct", "seff"))
+    if not supported(caps, "job_acct_gather"):
+        probes.add("sstat")
+    return probes
+
+
+def clear_capabilities(path=None):
+    path = path or DEFAULT_CAPABILITIES_FILE
+    if os.path.exists(path):
+        os.remove(path)
+        return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SLURM 能力探测缓存')
+    parser.add_argument('action', choices=['show', 'clear'], help='show: 显示（必要时探测）能力；clear: 删除缓存')
+    parser.add_argument('--refresh', action='store_true', help='忽略缓存重新探测')
+    parser.add_argument('--path', default=None, help=f'缓存文件，默认 {DEFAULT_CAPABILITIES_FILE}')
+    args = parser.parse_args(argv)
+
+    if args.action == 'show':
+        caps = load_capabilities(refresh=args.refresh, path=args.path)
+        print(json.dumps(caps, indent=2, ensure_ascii=False))
+    else:
+        print("已删除能力缓存" if clear_capabilities(args.path) else "没有能力缓存")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
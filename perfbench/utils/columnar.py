@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+追加式列存表，作为 Result 的底层存储。
+
+- 数值列：类型化 NumPy 数组，按容量倍增预分配，追加均摊 O(1)
+- 字符串列：驻留为 int32 编码 + 词表（JobID、JobName、NODELIST 等重复度高的字段只存一份）
+- 分类列：slurm_types 中固定词表的 int16 编码（State、JobState、STATE）
+- time_ms：int64 Unix 毫秒，行按时间顺序追加，可用二分查找切出时间范围
+
+column() 返回的是底层数组的视图，不复制数据。
+save_tables()/load_tables() 把若干张表连同词表写入单个文件并以 mmap 载入，载入时不解析、不复制列数据。
+"""
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+
+# 表文件：魔数 + JSON 头长度（uint64）+ JSON 头 + 按 ALIGNMENT 对齐依次排列的列数据
+TABLES_MAGIC = b"PBCOLS1\0"
+TABLES_HEADER = struct.Struct("<Q")
+ALIGNMENT = 8
+
+# 字符串列中编码 0 固定表示空串（缺失值）
+EMPTY_CODE = 0
+
+
+def _missing_value(dtype):
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind == 'b':
+        return False
+    if dtype.kind in 'iu':
+        return -1 if dtype.kind == 'i' else 0
+    return 0
+
+
+class ColumnTable:
+    """
+    列存表：所有列等长，time_ms 列必须存在
+    """
+
+    def __init__(self):
+        self.length = 0
+        self.capacity = 0
+        self.arrays = {}       # 列名 -> 预分配的数组（长度为 capacity）
+        self.vocabs = {}       # 字符串列名 -> 词表（编码 -> 字符串）
+        self.lookups = {}      # 字符串列名 -> 字符串 -> 编码
+        self.categories = {}   # 分类列名 -> 固定词表
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    @property
+    def names(self):
+        return list(self.arrays)
+
+    def reserve(self, capacity):
+        """
+        保证容量不小于 capacity，不足时按倍增扩容
+        """
+        if capacity <= self.capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, self.capacity)
+        while new_capacity < capacity:
+            new_capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.empty(new_capacity, dtype=array.dtype)
+            grown[:self.length] = array[:self.length]
+            self.arrays[name] = grown
+        self.capacity = new_capacity
+
+    def _add_column(self, name, dtype):
+        array = np.empty(self.capacity, dtype=dtype)
+        array[:self.length] = _missing_value(np.dtype(dtype))
+        self.arrays[name] = array
+        return array
+
+    def intern(self, name, values):
+        """
+        把字符串序列驻留到 name 列的词表中，返回 int32 编码数组
+        """
+        vocab = self.vocabs.get(name)
+        if vocab is None:
+            vocab, lookup = [""], {"": EMPTY_CODE}
+            self.vocabs[name], self.lookups[name] = vocab, lookup
+        else:
+            lookup = self.lookups[name]
+        if len(values) == 0:
+            return np.empty(0, dtype=np.int32)
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        # 先用字典去重（不构造定长 unicode 数组、也不排序），只为新出现的取值分配编码，再整批查表
+        for value in dict.fromkeys(values):
+            if value not in lookup:
+                lookup[value] = len(vocab)
+                vocab.append(value)
+        return np.fromiter(map(lookup.__getitem__, values), dtype=np.int32, count=len(values))
+
+    def append(self, n, arrays=None, strings=None, categories=None):
+        """
+        追加 n 行
+        arrays:     列名 -> 长度为 n 的类型化数组
+        strings:    列名 -> 长度为 n 的字符串序列（驻留为编码）
+        categories: 分类列名 -> 固定词表（arrays 中对应列为编码）
+        本次未提供的已有列以缺失值填充
+        """
+        if n <= 0:
+            return
+        arrays = dict(arrays or {})
+        for name, values in (strings or {}).items():
+            arrays[name] = self.intern(name, values)
+        for name, vocab in (categories or {}).items():
+            self.categories.setdefault(name, vocab)
+
+        start, end = self.length, self.length + n
+        self.reserve(end)
+        for name, values in arrays.items():
+            target = self.arrays.get(name)
+            if target is None:
+                target = self._add_column(name, values.dtype)
+            target[start:end] = values
+        for name, target in self.arrays.items():
+            if name not in arrays:
+                target[start:end] = _missing_value(target.dtype)
+        self.length = end
+
+    def column(self, name, rows=slice(None)):
+        """
+        返回列的视图（rows 为切片时不复制）；列不存在时返回 None
+        """
+        array = self.arrays.get(name)
+        if array is None:
+            return None
+        return array[:self.length][rows]
+
+    def decode(self, name, codes):
+        """
+        把字符串列/分类列的编码还原为字符串（object 数组）
+        """
+        if name in self.vocabs:
+            return np.asarray(self.vocabs[name], dtype=object)[codes]
+        if name in self.categories:
+            return np.asarray(self.categories[name], dtype=object)[codes]
+        return codes
+
+    def code_of(self, name, value):
+        """
+        返回字符串在 name 列词表中的编码，不存在时返回 None
+        """
+        lookup = self.lookups.get(name)
+        return lookup.get(value) if lookup is not None else None
+
+    def time_slice(self, start_ms=None, end_ms=None):
+        """
+        返回 [start_ms, end_ms) 时间范围对应的行切片
+        """
+        time_ms = self.column("time_ms")
+        if time_ms is None:
+            return slice(0, 0)
+        lo = int(np.searchsorted(time_ms, start_ms, side='left')) if start_ms is not None else 0
+        hi = int(np.searchsorted(time_ms, end_ms, side='left')) if end_ms is not None else self.length
+        return slice(lo, hi)
+
+    def row(self, i):
+        """
+        把第 i 行还原为 {列名: 值} 字典（字符串列与分类列解码为字符串）
+        """
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        row = {}
+        for name, array in self.arrays.items():
+            value = array[i]
+            if name in self.vocabs:
+                value = self.vocabs[name][value]
+            elif name in self.categories:
+                value = self.categories[name][value]
+            else:
+                value = value.item()
+            row[name] = value
+        return row
+
+    def nbytes(self):
+        """
+        实际占用的字节数估算：已用部分的数组 + 词表字符串
+        """
+        total = sum(array.itemsize * self.length for array in self.arrays.values())
+        for vocab in self.vocabs.values():
+            total += sum(len(s) for s in vocab) + 8 * len(vocab)
+        return total
+
+
+class RowsView:
+    """
+    以只读序列的方式把 ColumnTable 暴露为“行字典列表”，按需构造字典，兼容原 Result.data 的用法
+    """
+
+    def __init__(self, table, extra=None):
+        self.table = table
+        # 额外的派生字段：字段名 -> 函数(行字典) -> 值
+        self.extra = extra or {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.table)))]
+        row = self.table.row(index)
+        for name, func in self.extra.items():
+            row[name] = func(row)
+        return row
+
+    def __iter__(self):
+        for i in range(len(self.table)):
+            yield self[i]
+
+    def __bool__(self):
+        return len(self.table) > 0
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def save_tables(path, tables, header=None):
+    """
+    把若干 ColumnTable 的已用部分原子地写入 path：header（可 JSON 序列化的附加信息）与
+    各表的行数、列名、dtype、数据偏移、词表、分类词表记录在 JSON 头中，列数据为原始字节
+    """
+    metas, blobs = [], []
+    offset = 0
+    for table in tables:
+        columns = []
+        for name, array in table.arrays.items():
+            data = np.ascontiguousarray(array[:table.length])
+            columns.append([name, data.dtype.str, offset])
+            blobs.append(data)
+            offset += data.nbytes + _padding(data.nbytes)
+        metas.append({
+            "length": table.length,
+            "columns": columns,
+            "vocabs": table.vocabs,
+            "categories": {name: list(vocab) for name, vocab in table.categories.items()},
+        })
+    head = json.dumps({"header": header, "tables": metas}, ensure_ascii=False).encode('utf-8')
+    prefix = TABLES_MAGIC + TABLES_HEADER.pack(len(head)) + head
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix + b"\0" * _padding(len(prefix)))
+        for data in blobs:
+            f.write(data.tobytes())
+            f.write(b"\0" * _padding(data.nbytes))
+    os.replace(tmp_path, path)
+
+
+def load_tables(path):
+    """
+    mmap 载入 save_tables() 写出的文件，返回 (header, [ColumnTable, ...])。
+    各列为映射上的只读视图，之后追加行时（扩容）才复制到内存；文件损坏时抛出 ValueError
+    """
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    start = len(TABLES_MAGIC) + TABLES_HEADER.size
+    if buf[:len(TABLES_MAGIC)] != TABLES_MAGIC or len(buf) < start:
+        raise ValueError(f"不是列存表文件: {path}")
+    (head_size,) = TABLES_HEADER.unpack_from(buf, len(TABLES_MAGIC))
+    head = json.loads(bytes(buf[start:start + head_size]).decode('utf-8'))
+    base = start + head_size + _padding(start + head_size)
+    tables = []
+    for meta in head["tables"]:
+        table = ColumnTable()
+        table.length = table.capacity = meta["length"]
+        for name, dtype, offset in meta["columns"]:
+            dtype = np.dtype(dtype)
+            if base + offset + dtype.itemsize * table.length > len(buf):
+                raise ValueError(f"列存表文件不完整: {path}")
+            table.arrays[name] = np.frombuffer(buf, dtype=dtype, count=table.length, offset=base + offset)
+        table.vocabs = meta["vocabs"]
+        table.lookups = {name: {value: code for code, value in enumerate(vocab)}
+                         for name, vocab in table.vocabs.items()}
+        table.categories = {name: tuple(vocab) for name, vocab in meta["categories"].items()}
+        tables.append(table)
+    return head["header"], tables
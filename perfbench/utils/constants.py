@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLI 入口与各模块共用的常量。
+
+本模块不导入任何其他模块：perfbench.__main__ 在启动路径上只能从这里取默认值，
+而不是导入定义它们的 archive、bulk_submit（二者会连带载入调度器后端、zipfile、线程池等）。
+"""
+
+# 输出目录归档的后缀（见 perfbench.utils.archive）
+ARCHIVE_SUFFIX = ".pbar"
+
+# 批量提交的默认并发数（见 perfbench.core.bulk_submit）
+DEFAULT_SUBMIT_WORKERS = 4
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用自身报告的性能指标（figure of merit，FOM）。
+
+sacct 的 Elapsed 只反映作业跑了多久，应用输出中通常还有更直接的指标：HPL.out 中每组参数的 Gflops、
+LAMMPS 的 "Loop time" 与 "Performance: ... timesteps/s"、以及各种 "key = value" 形式的吞吐量行。
+本模块提供可扩展的解析器注册表与输出文件跟踪器：
+
+- 解析器为 FomParser 的子类，逐行解析，返回 (指标, 数值, 单位) 列表；用 @register_parser 注册，
+  注册顺序即优先级（证书上展示第一个有结果的解析器的主指标）
+- 监控引擎每个节拍读取作业 --output 文件（script_info['output']，未指定时为 slurm-%j.out）的新增内容，
+  解析出的指标连同读取时刻追加写入 job_dir/fom_series.csv，报告据此绘制吞吐量随时间的变化
+- 作业结束后（或 bash 监控引擎没有 fom_series.csv 时）生成报告，最终指标由全部记录汇总得出
+
+用法：
+    python -m perfbench.utils.fom /path/to/slurm-123.out          # 直接解析一个输出文件
+    python -m perfbench.utils.fom /path/to/job_dir --job-dir     # 汇总 job_dir 中的 fom_series.csv
+"""
+
+import argparse
+import csv
+import getpass
+import glob
+import io
+import json
+import os
+import re
+import sys
+from collections import OrderedDict
+from perfbench.utils.archive import read_job_file
+
+FOM_FILE = "fom_series.csv"
+FOM_FIELDS = ("ts_ms", "parser", "metric", "value", "unit")
+
+# 作业句柄（见 perfbench.core.job_waiter），其中的 script_info['output'] 为 --output 文件名模式
+HANDLE_FILE = "perfbench_job.json"
+# sbatch 未指定 --output 时的默认输出文件
+DEFAULT_OUTPUT_PATTERN = "slurm-%j.out"
+# 每个节拍最多读取的新增字节数，输出量很大的作业分多个节拍读完，单个节拍的耗时有上限
+MAX_READ_BYTES = 16 * 1024 * 1024
+
+FILENAME_PATTERN = re.compile(r"%(\d*)([%A-Za-z])")
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+NUMBER_PATTERN = re.compile(NUMBER)
+
+
+class FomParser:
+    """
+    应用指标解析器基类：每个被跟踪的输出文件各自持有一个实例，可以在行与行之间保存状态
+    """
+    name = None
+    # 主指标（证书与报告概要中展示），None 表示取第一个出现的指标
+    primary = None
+    # 主指标的最终值：last 为最后一次报告的值，max 为最大值（如 HPL 的多组参数取最好的一组）
+    final = "last"
+    # 累计量指标（如时间步数），报告中换算为每秒的增长速率
+    counters = ()
+
+    def parse_line(self, line):
+        """
+        解析一行输出，返回 [(指标, 数值, 单位), ...]
+        """
+        return []
+
+
+# 解析器名称 -> 解析器类，按注册顺序决定优先级
+FOM_PARSERS = OrderedDict()
+
+
+def register_parser(cls):
+    """
+    注册解析器（可用作类装饰器），同名解析器后注册的覆盖先注册的
+    """
+    if not cls.name:
+        raise ValueError(f"解析器 {cls.__name__} 没有名称")
+    FOM_PARSERS[cls.name] = cls
+    return cls
+
+
+@register_parser
+class HplParser(FomParser):
+    """
+    HPL 结果行：T/V  N  NB  P  Q  Time  Gflops（部分 GPU 版本在行末附加每卡 Gflops 等列），以及其后的残差检查结果。
+    结果行的 gflops/time 等到该组的残差检查通过后才输出，未通过检查的一组不参与最终值
+    """
+    name = "hpl"
+    primary = "gflops"
+    final = "max"
+
+    RESULT_PATTERN = re.compile(rf"^\s*(W[RC]\w+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+({NUMBER})\s+({NUMBER})(?:\s|$)")
+    CHECK_PATTERN = re.compile(r"^\s*\|\|Ax-b\|\|.*=\s*\S+\s*\.+\s*(PASSED|FAILED)")
+
+    def __init__(self):
+        # 尚未见到残差检查的一组结果
+        self.pending = None
+
+    def parse_line(self, line):
+        match = self.RESULT_PATTERN.match(line)
+        if match:
+            self.pending = [("gflops", float(match.group(7)), "Gflops"), ("time", float(match.group(6)), "s")]
+            return []
+        match = self.CHECK_PATTERN.match(line)
+        if match:
+            passed = match.group(1) == "PASSED"
+            records = self.pending if passed and self.pending else []
+            self.pending = None
+            return records + [("passed", 1.0 if passed else 0.0, "")]
+        return []
+
+
+@register_parser
+class LammpsParser(FomParser):
+    """
+    LAMMPS：热力学输出中的 Step 列（运行中的进度）、"Loop time of T on P procs for S steps" 与
+    "Performance: 1.2 ns/day, 20.0 hours/ns, 57.9 timesteps/s, ..."
+    """
+    name = "lammps"
+    primary = "timesteps/s"
+    counters = ("step",)
+
+    LOOP_PATTERN = re.compile(rf"^Loop time of ({NUMBER}) on (\d+) procs for (\d+) steps")
+    PERFORMANCE_PATTERN = re.compile(r"^Performance:\s*(.*)$")
+    VALUE_UNIT_PATTERN = re.compile(rf"({NUMBER})\s+([^\s,]+)")
+
+    def __init__(self):
+        # 当前热力学输出表中 Step 列的位置，不在表中时为 None
+        self.step_column = None
+
+    def parse_line(self, line):
+        tokens = line.split()
+        if not tokens:
+            return []
+        if "Step" in tokens and not any(NUMBER_PATTERN.fullmatch(token) for token in tokens):
+            # 热力学输出的表头
+            self.step_column = tokens.index("Step")
+            return []
+        match = self.LOOP_PATTERN.match(line)
+        if match:
+            self.step_column = None
+            loop_time, steps = float(match.group(1)), int(match.group(3))
+            records = [("loop_time", loop_time, "s")]
+            if loop_time > 0:
+                records.append(("timesteps/s", steps / loop_time, "timesteps/s"))
+            return records
+        match = self.PERFORMANCE_PATTERN.match(line)
+        if match:
+            return [(unit, float(value), unit) for value, unit in self.VALUE_UNIT_PATTERN.findall(match.group(1))]
+        if self.step_column is not None and len(tokens) > self.step_column:
+            try:
+                return [("step", float(int(tokens[self.step_column])), "steps")]
+            except ValueError:
+                # 表格之外的行（警告等），不结束当前表格
+                return []
+        return []
+
+
+@register_parser
+class KeyValueParser(FomParser):
+    """
+    通用的 "key = value [unit]" 行，例如 "Throughput = 1234.5 MB/s"；整行必须恰好是这一形式
+    """
+    name = "key_value"
+
+    # 只接受 ASCII 的名称与单位（证书与报告的字体不含中文字形）
+    LINE_PATTERN = re.compile(rf"^\s*([A-Za-z][\w .()/-]*?)\s*=\s*({NUMBER})\s*([A-Za-z%][\w/%.-]*)?\s*$", re.ASCII)
+
+    def parse_line(self, line):
+        match = self.LINE_PATTERN.match(line)
+        if not match:
+            return []
+        return [(match.group(1), float(match.group(2)), match.group(3) or "")]
+
+
+def create_parsers(names=None):
+    """
+    按名称创建解析器实例，names 为 None 时使用全部已注册的解析器
+    """
+    names = list(FOM_PARSERS) if names is None else list(names)
+    unknown = [name for name in names if name not in FOM_PARSERS]
+    if unknown:
+        raise ValueError(f"未知的指标解析器: {', '.join(unknown)}（可选: {', '.join(FOM_PARSERS)}）")
+    return [FOM_PARSERS[name]() for name in names]
+
+
+def expand_output_pattern(pattern, jobid, job_name=None, script_path=None):
+    """
+    展开 sbatch --output 的文件名模式：%j/%A（作业号）、%a（数组下标）、%x（作业名）、%u（用户名）、%%；
+    %N（节点名）等提交时无法确定的占位符展开为通配符 *
+    """
+    base, _, task = str(jobid).partition("_")
+
+    def expand(match):
+        width, key = match.groups()
+        if key == "%":
+            return "%"
+        if key in "jJ":
+            value = base if not task else str(jobid)
+        elif key == "A":
+            value = base
+        elif key == "a":
+            value = task or "4294967294"
+        elif key == "x":
+            value = job_name or os.path.basename(script_path or "")
+        elif key == "u":
+            value = getpass.getuser()
+        else:
+            return "*"
+        return value.zfill(int(width)) if width and value.isdigit() else value
+
+    return FILENAME_PATTERN.sub(expand, pattern)
+
+
+def resolve_output_path(script_info, jobid, script_path):
+    """
+    作业标准输出文件的路径：相对路径以提交目录（脚本所在目录）为基准；
+    结果可能含有通配符，由 OutputFollower 在文件出现后匹配
+    """
+    pattern = (script_info or {}).get("output") or DEFAULT_OUTPUT_PATTERN
+    path = expand_output_pattern(pattern, jobid, (script_info or {}).get("job_name"), script_path)
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(script_path or ".")), path)
+    return path
+
+
+class OutputFollower:
+    """
+    跟踪作业的输出文件：每次 poll 读取新增的完整行交给各解析器，记录追加写入 fom_series.csv。
+    文件尚未创建时跳过；文件被截断（长度小于已读位置）时从头重新读取
+    """
+
+    def __init__(self, path, output_dir, parsers=None):
+        self.path = path
+        self.parsers = create_parsers(parsers)
+        self.series_path = os.path.join(output_dir, FOM_FILE)
+        self.resolved = None if "*" in path else path
+        self.offset = 0
+        self.partial = b""
+        self.records = 0
+
+    def current_path(self):
+        if self.resolved is None:
+            matches = glob.glob(self.path)
+            if matches:
+                self.resolved = max(matches, key=os.path.getmtime)
+        return self.resolved
+
+    def read_new(self, final=False):
+        """
+        读取新增内容，返回完整的行；final=True 时最后一行即使没有换行符也返回
+        """
+        path = self.current_path()
+        if path is None or not os.path.exists(path):
+            return []
+        if os.path.getsize(path) < self.offset:
+            self.offset, self.partial = 0, b""
+        lines = []
+        with open(path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                data = f.read(MAX_READ_BYTES)
+                if not data:
+                    break
+                self.offset += len(data)
+                chunks = (self.partial + data).split(b"\n")
+                self.partial = chunks.pop()
+                lines.extend(chunks)
+                if not final:
+                    break
+        if final and self.partial:
+            lines.append(self.partial)
+            self.partial = b""
+        return [line.decode('utf-8', errors='replace').rstrip("\r") for line in lines]
+
+    def parse(self, lines):
+        records = []
+        for line in lines:
+            for parser in self.parsers:
+                for metric, value, unit in parser.parse_line(line):
+                    records.append((parser.name, metric, value, unit))
+        return records
+
+    def poll(self, ts_ms, final=False):
+        """
+        读取并解析新增输出，记录追加写入 fom_series.csv，返回本次新增的记录数
+        """
+        records = self.parse(self.read_new(final))
+        if not records:
+            return 0
+        is_new = not os.path.exists(self.series_path)
+        with open(self.series_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(FOM_FIELDS)
+            for parser, metric, value, unit in records:
+                writer.writerow((int(ts_ms), parser, metric, repr(value), unit))
+        self.records += len(records)
+        return len(records)
+
+
+def follower_for_job(job_dir, jobid, parsers=None):
+    """
+    按 job_dir 中的作业句柄创建输出跟踪器；没有句柄（不是经 PerfBench 提交的作业）时返回 None
+    """
+    data = read_job_file(job_dir, HANDLE_FILE)
+    if data is None:
+        return None
+    handle = json.loads(data.decode('utf-8'))
+    path = resolve_output_path(handle.get("script_info"), jobid, handle.get("script"))
+    return OutputFollower(path, job_dir, parsers)
+
+
+def load_fom_series(job_dir):
+    """
+    读取 job_dir（目录或归档）中的 fom_series.csv，返回 [(ts_ms, 解析器, 指标, 数值, 单位), ...]；
+    文件不存在时返回空列表
+    """
+    data = read_job_file(job_dir, FOM_FILE)
+    if data is None:
+        return []
+    records = []
+    with io.StringIO(data.decode('utf-8', errors='replace'), newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                records.append((int(row["ts_ms"]), row["parser"], row["metric"], float(row["value"]), row["unit"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return records
+
+
+def scan_output(path, parsers=None):
+    """
+    一次性解析完整的输出文件，记录的时间取文件的修改时间（没有逐节拍读取的时间信息）
+    """
+    follower = OutputFollower(path, os.path.dirname(os.path.abspath(path)), parsers)
+    path = follower.current_path()
+    if path is None or not os.path.exists(path):
+        return []
+    ts_ms = int(os.path.getmtime(path) * 1000)
+    return [(ts_ms,) + record for record in follower.parse(follower.read_new(final=True))]
+
+
+def load_fom_records(job_dir):
+    """
+    作业的全部指标记录：优先使用监控写出的 fom_series.csv；没有时（bash 监控引擎、监控未运行）
+    按作业句柄直接解析输出文件
+    """
+    records = load_fom_series(job_dir)
+    if records:
+        return records
+    data = read_job_file(job_dir, HANDLE_FILE)
+    if data is None:
+        return []
+    handle = json.loads(data.decode('utf-8'))
+    return scan_output(resolve_output_path(handle.get("script_info"), handle.get("jobid"), handle.get("script")))
+
+
+def summarize_fom(records):
+    """
+    汇总指标记录：
+    {
+        "metrics": [{"parser", "metric", "value", "unit", "count"}, ...]   每个指标的最终值，
+        "headline": 第一个有结果的解析器的主指标（同上的字典，另有 "label"），没有记录时为 None
+    }
+    """
+    finals = OrderedDict()
+    for _, parser, metric, value, unit in records:
+        cls = FOM_PARSERS.get(parser)
+        key = (parser, metric)
+        entry = finals.get(key)
+        if entry is None:
+            finals[key] = {"parser": parser, "metric": metric, "value": value, "unit": unit, "count": 1}
+            continue
+        entry["count"] += 1
+        if cls is not None and cls.final == "max" and metric == cls.primary:
+            entry["value"] = max(entry["value"], value)
+        else:
+            entry["value"] = value
+    headline = None
+    order = list(FOM_PARSERS) + sorted({parser for parser, _ in finals} - set(FOM_PARSERS))
+    for parser in order:
+        entries = [entry for (name, _), entry in finals.items() if name == parser]
+        if not entries:
+            continue
+        cls = FOM_PARSERS.get(parser)
+        primary = cls.primary if cls is not None else None
+        chosen = next((entry for entry in entries if entry["metric"] == primary), None)
+        if chosen is None and cls is not None and primary is not None:
+            # 主指标还没有出现（例如 LAMMPS 仍在运行），看下一个解析器
+            continue
+        chosen = chosen or entries[0]
+        headline = dict(chosen, label=format_fom(chosen))
+        break
+    return {"metrics": list(finals.values()), "headline": headline}
+
+
+def format_fom(entry):
+    """
+    证书与报告中的指标文本，例如 "HPL: 1234.56 Gflops"；名称与单位只含 ASCII（证书字体不含中文字形）
+    """
+    value = entry["value"]
+    text = f"{value:.6g}" if abs(value) < 1e6 else f"{value:.4e}"
+    name = entry["metric"] if entry["parser"] == KeyValueParser.name else entry["parser"].upper()
+    return f"{name}: {text} {entry['unit']}".strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='解析作业输出中的应用性能指标（FOM）')
+    parser.add_argument('path', help='作业输出文件，或 --job-dir 时为 PerfBench 的输出目录/归档')
+    parser.add_argument('--job-dir', action='store_true', help='path 为 job_dir：汇总 fom_series.csv（没有时解析作业输出文件）')
+    parser.add_argument('--parsers', type=str, default=None,
+                        help=f'逗号分隔的解析器，默认全部（{", ".join(FOM_PARSERS)}）')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.job_dir:
+            records = load_fom_records(args.path)
+        else:
+            names = args.parsers.split(',') if args.parsers else None
+            records = scan_output(args.path, names)
+    except (OSError, ValueError) as e:
+        print(f"解析失败: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(summarize_fom(records), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
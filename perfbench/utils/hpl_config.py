@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按作业规模生成 HPL.dat。
+
+从 SLURM 脚本读取 --nodes / --ntasks-per-node（MPI 进程数 = 节点数 × 每节点进程数），
+从 platform_config.yaml 读取平台名称与 hpl_presets 中该平台的预设：
+- N:     取总内存（节点数 × mem_per_node_gb）的 mem_fraction 所能容纳的最大双精度方阵，向下对齐到 NB 的整数倍
+- P × Q: 进程数最接近正方形的分解（P <= Q）
+- NB / BCAST / DEPTH 等：来自平台预设
+--sweep 时在一个 HPL.dat 中列出多个 N、NB 与进程网格，HPL 依次运行全部组合，用于在目标系统上调优。
+
+用法：
+    python -m perfbench.utils.hpl_config job.slurm [-o HPL.dat] [--platform NAME] [--mem-fraction 0.8] [--sweep]
+    perfbench hpl job.slurm -o HPL.dat
+"""
+
+import argparse
+import math
+import sys
+from perfbench.utils.logger import get_logger
+from perfbench.utils.script_parser import parse_slurm_script
+
+logger = get_logger()
+
+# 预设缺省值（HPL 常用取值）；平台预设只需给出与之不同的项
+BASE_PRESET = {
+    "mem_per_node_gb": 64,
+    "mem_fraction": 0.8,
+    "nb": 192,
+    "nb_candidates": [],
+    "pfact": 2,
+    "nbmin": 4,
+    "ndiv": 2,
+    "rfact": 2,
+    "bcast": 1,
+    "depth": 1,
+    "swap": 2,
+    "swap_threshold": 64,
+    "pmap": 0,
+}
+
+# --sweep 时 N 对应的内存比例（相对 mem_fraction）：小规模的一组用于快速比较 NB 与网格
+SWEEP_FRACTIONS = (0.25, 1.0)
+# --sweep 时尝试的进程网格个数
+SWEEP_GRIDS = 2
+# HPL.dat 中每个列表最多 20 项
+HPL_MAX_LIST = 20
+
+DOUBLE_BYTES = 8
+
+
+def load_preset(platform_name=None, config=None):
+    """
+    返回 (平台名称, 预设字典)：BASE_PRESET <- hpl_presets.default <- hpl_presets[平台]
+    """
+    if config is None:
+        from perfbench.utils.result_handler import get_platform_config
+        config = get_platform_config() or {}
+    platform_name = platform_name or config.get("platform_name")
+    presets = config.get("hpl_presets") or {}
+    preset = dict(BASE_PRESET)
+    preset.update(presets.get("default") or {})
+    if platform_name in presets:
+        preset.update(presets[platform_name])
+    elif platform_name:
+        logger.warning(f"platform_config.yaml 中没有平台 {platform_name} 的 HPL 预设，使用 default")
+    return platform_name, preset
+
+
+def near_square_grids(ranks, count=1):
+    """
+    ranks 的分解 (P, Q)，P <= Q，按 Q/P 从小到大取前 count 个
+    """
+    grids = [(p, ranks // p) for p in range(int(math.isqrt(ranks)), 0, -1) if ranks % p == 0]
+    return grids[:count]
+
+
+def problem_size(total_mem_bytes, fraction, align):
+    """
+    占用 fraction 比例内存的最大方阵阶数，向下对齐到 align 的整数倍
+    """
+    n = int(math.sqrt(total_mem_bytes * fraction / DOUBLE_BYTES))
+    return max(align, n // align * align)
+
+
+def alignment(nbs):
+    """
+    N 的对齐粒度：各 NB 的最小公倍数（过大时退回最大的 NB）
+    """
+    lcm = 1
+    for nb in nbs:
+        lcm = lcm * nb // math.gcd(lcm, nb)
+    return lcm if lcm <= 8 * max(nbs) else max(nbs)
+
+
+def hpl_parameters(nodes, ranks_per_node, preset, mem_fraction=None, sweep=False):
+    """
+    计算 HPL 参数，返回字典（ns/nbs/grids 为列表，其余为单个值）
+    """
+    nodes = int(nodes)
+    ranks = nodes * int(ranks_per_node)
+    fraction = float(mem_fraction or preset["mem_fraction"])
+    if not 0 < fraction < 1:
+        raise ValueError(f"内存比例必须在 0 与 1 之间: {fraction}")
+    total_mem = nodes * float(preset["mem_per_node_gb"]) * 1024 ** 3
+    if sweep:
+        nbs = sorted(set(int(nb) for nb in (preset["nb_candidates"] or [preset["nb"]])))
+        grids = near_square_grids(ranks, SWEEP_GRIDS)
+        align = alignment(nbs)
+        ns = sorted(set(problem_size(total_mem, fraction * f, align) for f in SWEEP_FRACTIONS))
+    else:
+        nbs = [int(preset["nb"])]
+        grids = near_square_grids(ranks, 1)
+        ns = [problem_size(total_mem, fraction, nbs[0])]
+    for name, values in (("N", ns), ("NB", nbs), ("P×Q", grids)):
+        if len(values) > HPL_MAX_LIST:
+            raise ValueError(f"{name} 的取值超过 HPL 的上限 {HPL_MAX_LIST} 个")
+    return {
+        "nodes": nodes,
+        "ranks": ranks,
+        "mem_fraction": fraction,
+        "total_mem_gb": total_mem / 1024 ** 3,
+        "ns": ns,
+        "nbs": nbs,
+        "grids": grids,
+        "runs": len(ns) * len(nbs) * len(grids),
+        **{key: preset[key] for key in ("pmap", "pfact", "nbmin", "ndiv", "rfact", "bcast", "depth", "swap",
+                                        "swap_threshold")},
+    }
+
+
+def render_hpl_dat(params):
+    """
+    HPL.dat 文本（HPL 只读取每行开头的值，# 之后为说明）
+    """
+    def row(value, comment):
+        return f"{str(value):<28} # {comment}"
+
+    def values(items):
+        return " ".join(str(item) for item in items)
+
+    ps = [p for p, _ in params["grids"]]
+    qs = [q for _, q in params["grids"]]
+    lines = [
+        "HPLinpack benchmark input file",
+        f"Generated by PerfBench: {params['nodes']} nodes, {params['ranks']} ranks, "
+        f"{params['total_mem_gb']:.0f} GB x {params['mem_fraction']:.2f}",
+        row("HPL.out", "输出文件名"),
+        row(6, "设备输出（6=stdout，7=stderr，其他=文件）"),
+        row(len(params["ns"]), "问题规模数量（N的个数）"),
+        row(values(params["ns"]), "N（矩阵维度，按内存比例计算并对齐到 NB）"),
+        row(len(params["nbs"]), "分块大小数量（NB的个数）"),
+        row(values(params["nbs"]), "NB（分块大小）"),
+        row(params["pmap"], "进程映射（0=行主序，1=列主序）"),
+        row(len(params["grids"]), "处理器网格数量（P×Q的个数）"),
+        row(values(ps), "P（网格行数）"),
+        row(values(qs), "Q（网格列数）"),
+        row("16.0", "阈值"),
+        row(1, "面板分解方式数量"),
+        row(params["pfact"], "PFACT（0=Left，1=Crout，2=Right）"),
+        row(1, "递归停止条件数量"),
+        row(params["nbmin"], "NBMIN（>=1）"),
+        row(1, "递归面板数量"),
+        row(params["ndiv"], "NDIV"),
+        row(1, "递归面板分解方式数量"),
+        row(params["rfact"], "RFACT（0=Left，1=Crout，2=Right）"),
+        row(1, "广播方式数量"),
+        row(params["bcast"], "BCAST（0=1rg，1=1rM，2=2rg，3=2rM，4=Lng，5=LnM）"),
+        row(1, "前瞻深度数量"),
+        row(params["depth"], "DEPTH（>=0）"),
+        row(params["swap"], "SWAP（0=bin-exch，1=long，2=mix）"),
+        row(params["swap_threshold"], "交换阈值"),
+        row(0, "L1 存储格式（0=转置，1=非转置）"),
+        row(0, "U 存储格式（0=转置，1=非转置）"),
+        row(1, "平衡化（0=否，1=是）"),
+        row(8, "内存对齐（以双精度数计）"),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def generate_hpl_dat(script_path, out_path=None, platform_name=None, ranks_per_node=None, mem_fraction=None,
+                     sweep=False):
+    """
+    按脚本申请的规模生成 HPL.dat。out_path 为 None 时只返回文本。
+    返回 (HPL.dat 文本, 参数字典)
+    """
+    info = parse_slurm_script(script_path)
+    if info is None:
+        raise ValueError(f"无法解析脚本: {script_path}")
+    platform_name, preset = load_preset(platform_name)
+    params = hpl_parameters(info["nodes"], ranks_per_node or info["tasks_per_node"], preset,
+                            mem_fraction=mem_fraction, sweep=sweep)
+    params["platform"] = platform_name
+    text = render_hpl_dat(params)
+    if out_path:
+        with open(out_path, 'w') as f:
+            f.write(text)
+        logger.info(f"已生成 {out_path}: N={params['ns']} NB={params['nbs']} "
+                    f"P×Q={['%dx%d' % grid for grid in params['grids']]}（共 {params['runs']} 组）")
+    return text, params
+
+
+def parse_arguments(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='按作业申请的节点与进程数生成 HPL.dat')
+    parser.add_argument('script', help='SLURM 脚本（读取 --nodes 与 --ntasks-per-node）')
+    parser.add_argument('-o', '--output', type=str, default=None, help='输出文件，默认输出到标准输出')
+    parser.add_argument('--platform', type=str, default=None, help='平台名称，默认取 platform_config.yaml 的 platform_name')
+    parser.add_argument('--ranks-per-node', type=int, default=None, help='每节点 MPI 进程数，默认取脚本的 --ntasks-per-node')
+    parser.add_argument('--mem-fraction', type=float, default=None, help='N 占用的内存比例，默认取平台预设')
+    parser.add_argument('--sweep', action='store_true', help='列出多组 N/NB/进程网格用于调优（HPL 依次运行全部组合）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None, prog=None):
+    args = parse_arguments(argv, prog)
+    try:
+        text, _ = generate_hpl_dat(args.script, args.output, platform_name=args.platform,
+                                   ranks_per_node=args.ranks_per_node, mem_fraction=args.mem_fraction,
+                                   sweep=args.sweep)
+    except (OSError, ValueError) as e:
+        logger.error(f"生成 HPL.dat 失败: {e}")
+        return 1
+    if not args.output:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,11 +7,16 @@ from perfbench.utils.logger import get_logger
 logger = get_logger()
 
 
-def start_monitoring_on_login(jobid, interval, output_dir):
+def start_monitoring_on_login(jobid, interval, output_dir, engine="bash"):
     """
     在登录节点上启动后台监控脚本，轮询 sacct/seff/sinfo/sstat 等命令并写入输出目录。
+    engine="async" 时改用 perfbench.utils.async_monitor 引擎。
     返回后台进程 pid。
     """
+    if engine == "async":
+        from perfbench.utils.monitoring import start_async_monitor
+        return start_async_monitor(jobid, interval, output_dir)
+
     os.makedirs(output_dir, exist_ok=True)
     monitor_sh = os.path.join(output_dir, 'monitor_login.sh')
     monitor_pid = os.path.join(output_dir, 'monitor_login.pid')
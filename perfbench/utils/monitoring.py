@@ -2,14 +2,26 @@
 
 import os
 import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
 from perfbench.utils.logger import get_logger
+from perfbench.utils.scheduler import SACCT_FORMAT, SSTAT_FORMAT, get_backend
 
 logger = get_logger()
 
+# 可选的登录节点监控引擎
+MONITOR_ENGINES = ("async", "bash")
 
-def generate_monitoring_script(original_script, script_info, interval, output_dir):
+# perfbench 包所在的目录，用于以 `python -m` 方式启动异步监控进程
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate_monitoring_script(original_script, script_info, interval, output_dir, node_interval=None):
     """
     生成包含监控代码的SLURM脚本
+    node_interval: 不为 None 时注入计算节点 /proc 采样器（每节点一个，采样间隔为 node_interval 秒）
     """
     import os
     # 读取原始脚本内容
@@ -21,6 +33,8 @@ def generate_monitoring_script(original_script, script_info, interval, output_di
 echo "PerfBench: job started on $(hostname)" > {output_dir}/job_node_info.txt
 echo "SLURM_JOB_ID=${{SLURM_JOB_ID}}" >> {output_dir}/job_node_info.txt
 """
+    if node_interval is not None:
+        env_setup += generate_node_sampler_code(node_interval, output_dir)
     # 确保存在 shebang
     shebang_found = False
     if len(lines) > 0 and lines[0].startswith('#!'):
@@ -51,6 +65,25 @@ echo "SLURM_JOB_ID=${{SLURM_JOB_ID}}" >> {output_dir}/job_node_info.txt
     os.chmod(output_script, 0o755)
     return output_script
 
+def generate_node_sampler_code(node_interval, output_dir):
+    """
+    生成启动计算节点采样器的脚本段：
+    - srun --ntasks-per-node=1 --overlap 在分配的每个节点上各启动一个采样器，与用户的作业步共享资源
+    - 作业脚本退出时（trap EXIT）向采样器发送 SIGTERM，采样器写完缓冲区后退出
+    - 作业被取消或超时时，slurmd 同样先向作业步发送 SIGTERM
+    """
+    return f"""
+# PerfBench 计算节点采样器（每节点一个）
+PERFBENCH_PYTHON={sys.executable}
+[ -x "$PERFBENCH_PYTHON" ] || PERFBENCH_PYTHON=python3
+PYTHONPATH={PACKAGE_ROOT}${{PYTHONPATH:+:$PYTHONPATH}} srun --overlap --nodes=${{SLURM_JOB_NUM_NODES:-1}} --ntasks-per-node=1 \\
+    --cpu-bind=none --kill-on-bad-exit=0 --output={output_dir}/node_sampler_%N.log \\
+    "$PERFBENCH_PYTHON" -m perfbench.utils.node_sampler --outdir {output_dir} --interval {node_interval} &
+PERFBENCH_SAMPLER_PID=$!
+trap 'kill -TERM $PERFBENCH_SAMPLER_PID 2>/dev/null; wait $PERFBENCH_SAMPLER_PID 2>/dev/null' EXIT
+"""
+
+
 def generate_monitoring_code(interval, output_dir):
     """
     生成监控代码段
@@ -58,12 +91,28 @@ def generate_monitoring_code(interval, output_dir):
     return f"# PerfBench: login-node based monitoring will be started by the tool. Interval={interval}s\n"
 
 
-def start_monitoring_on_login(jobid, interval, output_dir):
+def start_monitoring_on_login(jobid, interval, output_dir, engine="async", **options):
     """
-    在登录节点上启动一个后台监控脚本，定期使用 sacct/seff/sinfo/sstat 等命令采集与 jobid 相关的数据。
+    在登录节点上启动一个后台监控进程，定期使用 sacct/seff/sinfo/sstat 等命令采集与 jobid 相关的数据。
 
-    生成并启动的脚本会把日志写到 output_dir，并将监控进程的 PID 写入 monitor_login.pid。
+    engine:
+        - "async": 常驻的 asyncio 监控引擎（见 perfbench.utils.async_monitor），探针并发执行、无节拍漂移
+        - "bash":  原有的 monitor_login.sh 轮询脚本
+
+    两种引擎都会把日志写到 output_dir，并将监控进程的 PID 写入 monitor_login.pid。
+    options 为 async 引擎的附加参数（如 adaptive/min_interval/max_interval），bash 引擎忽略。
     """
+    if engine == "async":
+        return start_async_monitor(jobid, interval, output_dir, **options)
+    if engine == "bash" and get_backend().in_process:
+        logger.warning(f"调度器后端 {get_backend().name} 在进程内运行，bash 监控引擎无法访问，改用 async 引擎")
+        return start_async_monitor(jobid, interval, output_dir, **options)
+    if engine != "bash":
+        raise ValueError(f"不支持的监控引擎: {engine}（可选: {', '.join(MONITOR_ENGINES)}）")
+    ignored = [name for name, value in options.items() if value not in (None, False)]
+    if ignored:
+        logger.warning(f"bash 监控引擎不支持以下参数，已忽略: {', '.join(ignored)}")
+
     os.makedirs(output_dir, exist_ok=True)
     monitor_sh = os.path.join(output_dir, 'monitor_login.sh')
     monitor_pid = os.path.join(output_dir, 'monitor_login.pid')
@@ -78,12 +127,12 @@ mkdir -p "$OUTDIR"
 
 while true; do
     ts=$(date +%Y%m%d_%H%M%S)
-    # sacct 输出（汇总）
-    sacct -j $JOBID --format=JobID,JobName%20,State,Elapsed,MaxRSS,AllocCPUs -P > "$OUTDIR/sacct_$ts.log" 2>&1
+    # sacct 输出（作业、数组任务与全部作业步）
+    sacct -j $JOBID --format={SACCT_FORMAT} -P > "$OUTDIR/sacct_$ts.log" 2>&1
     # sinfo 当前集群节点状态
     sinfo -N -o "%N %t %f" > "$OUTDIR/sinfo_$ts.log" 2>&1 || true
-    # sstat（步骤级别资源）
-    sstat -j $JOBID --format=JobID,MaxRSS,AveRSS,MaxVMSize -P > "$OUTDIR/sstat_$ts.log" 2>&1 || true
+    # sstat（全部作业步的资源）
+    sstat --allsteps -j $JOBID --format={SSTAT_FORMAT} -P > "$OUTDIR/sstat_$ts.log" 2>&1 || true
     # scontrol 节点资源
     scontrol show job $JOBID > "$OUTDIR/scontrol_$ts.log" 2>&1 || true
 
@@ -106,10 +155,81 @@ done
         f.write(script)
     os.chmod(monitor_sh, 0o755)
 
-    import subprocess
     p = subprocess.Popen([monitor_sh], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     with open(monitor_pid, 'w') as f:
         f.write(str(p.pid))
 
     logger.info(f"登录节点监控脚本已启动 (pid={p.pid})，输出目录: {output_dir}")
-    return p.pid
\ No newline at end of file
+    return p.pid
+
+
+def start_async_monitor(jobid, interval, output_dir, **options):
+    """
+    以独立会话启动 asyncio 监控引擎进程，使其在 PerfBench 主流程退出后继续运行。
+
+    options 按名称转换为引擎的命令行参数（max_interval=60 -> --max-interval 60，True 为开关参数，None/False 忽略）。
+    引擎自身的运行日志写入 output_dir/monitor_login.log。
+    """
+    return start_async_monitor_group([(jobid, output_dir)], interval, output_dir, **options)
+
+
+def start_async_monitor_group(jobs, interval, log_dir, **options):
+    """
+    启动一个 asyncio 监控引擎进程，在同一事件循环中监控多个作业（扩展性扫描时使用）。
+    jobs 为 [(jobid, output_dir), ...]，每个作业的采样写入各自的 output_dir；
+    引擎的运行日志与 PID 写入 log_dir/monitor_login.log、log_dir/monitor_login.pid；
+    PID 同时写入每个作业的 output_dir，等待作业时（job_waiter.monitor_alive）据此判断监控仍在运行。
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    monitor_pid = os.path.join(log_dir, 'monitor_login.pid')
+    monitor_log = os.path.join(log_dir, 'monitor_login.log')
+
+    backend = get_backend()
+    if backend.in_process:
+        return start_monitor_thread(backend, jobs, interval, monitor_pid, **options)
+
+    cmd = [sys.executable, '-m', 'perfbench.utils.async_monitor', '--interval', str(interval)]
+    for jobid, output_dir in jobs:
+        os.makedirs(output_dir, exist_ok=True)
+        cmd.extend(['--jobid', str(jobid), '--outdir', os.path.abspath(output_dir)])
+    for name, value in options.items():
+        if value is None or value is False:
+            continue
+        flag = '--' + name.replace('_', '-')
+        cmd.extend([flag] if value is True else [flag, str(value)])
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (PACKAGE_ROOT, env.get('PYTHONPATH')) if p)
+
+    with open(monitor_log, 'a') as log:
+        p = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env, start_new_session=True)
+    write_pid_files(monitor_pid, jobs, p.pid)
+
+    logger.info(f"登录节点异步监控引擎已启动 (pid={p.pid})，监控 {len(jobs)} 个作业，日志目录: {log_dir}")
+    return p.pid
+
+
+def start_monitor_thread(backend, jobs, interval, monitor_pid, **options):
+    """
+    进程内的调度器后端（模拟器）无法被独立的监控进程访问：在本进程的后台线程中运行监控引擎，
+    PID 文件记录本进程的 PID（等待作业时据此判断监控仍在运行）
+    """
+    from perfbench.utils.async_monitor import run_monitors
+
+    for _, output_dir in jobs:
+        os.makedirs(output_dir, exist_ok=True)
+    thread = threading.Thread(target=run_monitors, args=(jobs, interval), kwargs=dict(options, backend=backend),
+                              name="perfbench-monitor", daemon=True)
+    thread.start()
+    write_pid_files(monitor_pid, jobs, os.getpid())
+    logger.info(f"异步监控引擎已在后台线程中启动（调度器后端: {backend.name}），监控 {len(jobs)} 个作业")
+    return os.getpid()
+
+
+def write_pid_files(monitor_pid, jobs, pid):
+    """
+    把监控进程的 PID 写入 monitor_pid 以及每个作业 output_dir 下的 monitor_login.pid
+    """
+    paths = [monitor_pid] + [os.path.join(output_dir, 'monitor_login.pid') for _, output_dir in jobs]
+    for path in OrderedDict.fromkeys(os.path.abspath(path) for path in paths):
+        with open(path, 'w') as f:
+            f.write(str(pid))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+计算节点常驻的 /proc 采样器。
+
+由 generate_monitoring_script 注入的 `srun --ntasks-per-node=1 --overlap` 在作业分配的每个节点上启动一个实例
+（每节点一个，而不是每个 rank 一个），以亚秒级间隔读取：
+- /proc/stat:     CPU 累计节拍（user/nice/system/idle/iowait/irq/softirq/steal）
+- /proc/meminfo:  MemTotal/MemAvailable/Cached/Dirty（KB）
+- /proc/net/dev:  除 lo 以外所有网卡的收发字节数与包数之和
+
+采样写入预分配的 int64 缓冲区（array 模块，只用标准库，计算节点无需 numpy），
+缓冲区写满或收到 SIGTERM/SIGINT/SIGHUP 时整块写入 job_dir/node_samples/<节点名>.bin，
+退出时另写 <节点名>.json 记录采样次数与采样器自身的 CPU 开销。
+
+文件格式：MAGIC(8 字节) + uint32 表头长度 + 表头（以 \\n 分隔的字段名）+ 按行排列的 int64 记录。
+所有计数器均为累计值，利用率与速率由读取方差分得到（见 Result.get_node_samples）。
+
+用法：
+    python -m perfbench.utils.node_sampler --outdir /path/to/job_dir [--interval 0.5] [--proc-root /proc]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from array import array
+
+NODE_SAMPLES_DIR = "node_samples"
+MAGIC = b"PBNODE\x00\x01"
+HEADER_LENGTH = struct.Struct("<I")
+
+CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+MEMINFO_FIELDS = ("MemTotal", "MemAvailable", "Cached", "Dirty")
+NET_FIELDS = ("rx_bytes", "rx_packets", "tx_bytes", "tx_packets")
+# 每条记录的字段顺序
+FIELDS = (("ts_ms",)
+          + tuple(f"cpu_{name}" for name in CPU_FIELDS)
+          + tuple(f"mem_{name}" for name in MEMINFO_FIELDS)
+          + tuple(f"net_{name}" for name in NET_FIELDS))
+
+DEFAULT_INTERVAL = 0.5
+# 默认每 240 次采样（0.5 秒间隔下约 2 分钟）整块写盘一次
+DEFAULT_FLUSH_SAMPLES = 240
+
+
+class ProcFile:
+    """
+    常开的 /proc 文件：每次从偏移 0 重新读取，避免每次采样都 open/close
+    """
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        chunks = []
+        while True:
+            chunk = os.read(self.fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def parse_cpu(data):
+    """
+    /proc/stat 首行（cpu 汇总）-> CPU_FIELDS 顺序的节拍数，内核较旧缺少的字段补 0
+    """
+    line = data.split(b"\n", 1)[0].split()
+    values = [int(v) for v in line[1:1 + len(CPU_FIELDS)]]
+    return values + [0] * (len(CPU_FIELDS) - len(values))
+
+
+def parse_meminfo(data):
+    """
+    /proc/meminfo -> MEMINFO_FIELDS 顺序的 KB 数，缺失的字段为 -1
+    """
+    found = {}
+    for line in data.split(b"\n"):
+        key, _, rest = line.partition(b":")
+        if rest:
+            found[key.decode()] = rest.split()[0]
+    return [int(found[name]) if name in found else -1 for name in MEMINFO_FIELDS]
+
+
+def parse_net_dev(data):
+    """
+    /proc/net/dev -> 除 lo 外全部网卡的 (rx_bytes, rx_packets, tx_bytes, tx_packets) 之和
+    """
+    rx_bytes = rx_packets = tx_bytes = tx_packets = 0
+    for line in data.split(b"\n")[2:]:
+        name, _, rest = line.partition(b":")
+        if not rest or name.strip() == b"lo":
+            continue
+        fields = rest.split()
+        rx_bytes += int(fields[0])
+        rx_packets += int(fields[1])
+        tx_bytes += int(fields[8])
+        tx_packets += int(fields[9])
+    return [rx_bytes, rx_packets, tx_bytes, tx_packets]
+
+
+def node_name():
+    # srun 启动的任务带有 SLURMD_NODENAME，与 sinfo/scontrol 中的节点名一致
+    return os.environ.get("SLURMD_NODENAME") or socket.gethostname().split(".")[0]
+
+
+class NodeSampler:
+    """
+    单节点采样器：预分配 flush_samples 行的缓冲区，写满后整块追加到输出文件
+    """
+
+    def __init__(self, output_dir, interval=DEFAULT_INTERVAL, proc_root="/proc",
+                 flush_samples=DEFAULT_FLUSH_SAMPLES, node=None):
+        self.interval = float(interval)
+        self.node = node or node_name()
+        self.sample_dir = os.path.join(output_dir, NODE_SAMPLES_DIR)
+        os.makedirs(self.sample_dir, exist_ok=True)
+        self.path = os.path.join(self.sample_dir, f"{self.node}.bin")
+        self.files = [ProcFile(os.path.join(proc_root, "stat")),
+                      ProcFile(os.path.join(proc_root, "meminfo")),
+                      ProcFile(os.path.join(proc_root, "net", "dev"))]
+        self.width = len(FIELDS)
+        self.capacity = int(flush_samples)
+        self.buffer = array('q', bytes(8 * self.width * self.capacity))
+        self.count = 0
+        self.samples = 0
+        self.flushes = 0
+        self.errors = 0
+        self.stopping = False
+        self.output = open(self.path, 'ab')
+        if self.output.tell() == 0:
+            header = "\n".join(FIELDS).encode()
+            self.output.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+            self.output.flush()
+
+    def sample(self):
+        """
+        采集一次，写入缓冲区；缓冲区写满时整块写盘
+        """
+        stat, meminfo, net_dev = (f.read() for f in self.files)
+        row = ([int(time.time() * 1000)] + parse_cpu(stat)
+               + parse_meminfo(meminfo) + parse_net_dev(net_dev))
+        start = self.count * self.width
+        self.buffer[start:start + self.width] = array('q', row)
+        self.count += 1
+        self.samples += 1
+        if self.count == self.capacity:
+            self.flush()
+
+    def flush(self):
+        if self.count == 0:
+            return
+        self.output.write(memoryview(self.buffer)[:self.count * self.width])
+        self.output.flush()
+        self.count = 0
+        self.flushes += 1
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self, duration=None):
+        """
+        按单调时钟上的绝对截止时间采样，直到收到停止信号或超过 duration 秒
+        """
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.stop)
+        start = deadline = time.monotonic()
+        try:
+            while not self.stopping:
+                try:
+                    self.sample()
+                except (OSError, ValueError, IndexError):
+                    self.errors += 1
+                if duration is not None and time.monotonic() - start >= duration:
+                    break
+                deadline += self.interval
+                now = time.monotonic()
+                if deadline <= now:
+                    # 被调度延迟时跳过错过的节拍，不连续补采
+                    deadline += (int((now - deadline) // self.interval) + 1) * self.interval
+                time.sleep(deadline - now)
+        finally:
+            self.close()
+
+    def close(self):
+        self.flush()
+        self.output.close()
+        for f in self.files:
+            f.close()
+        summary = {
+            "node": self.node,
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            # 采样器自身消耗的 CPU 时间，用于评估开销
+            "cpu_seconds": time.process_time(),
+        }
+        with open(os.path.join(self.sample_dir, f"{self.node}.json"), 'w') as f:
+            json.dump(summary, f)
+
+
+def load_node_file(path):
+    """
+    读取一个节点的采样文件，返回 {字段名: array('q')}；末尾不完整的记录被丢弃
+    """
+    with open(path, 'rb') as f:
+        return parse_node_data(f.read(), path)
+
+
+def parse_node_data(data, path):
+    """
+    解析节点采样文件的内容（path 只用于报错信息）
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError(f"不是节点采样文件: {path}")
+    offset = len(MAGIC)
+    (header_len,) = HEADER_LENGTH.unpack_from(data, offset)
+    offset += HEADER_LENGTH.size
+    fields = data[offset:offset + header_len].decode().split("\n")
+    offset += header_len
+    width = len(fields)
+    usable = (len(data) - offset) // (8 * width) * (8 * width)
+    values = array('q')
+    values.frombytes(data[offset:offset + usable])
+    return {name: values[i::width] for i, name in enumerate(fields)}
+
+
+def load_node_samples(output_dir):
+    """
+    读取 job_dir（目录或归档）下全部节点的采样，返回 {节点名: {字段名: array('q')}}
+    """
+    # 只在登录节点读取时用到，采样器本身在计算节点上启动时不加载
+    from perfbench.utils.archive import list_job_files, read_job_file
+
+    samples = {}
+    for name in list_job_files(output_dir, NODE_SAMPLES_DIR):
+        if name.endswith(".bin"):
+            member = f"{NODE_SAMPLES_DIR}/{name}"
+            samples[name[:-len(".bin")]] = parse_node_data(read_job_file(output_dir, member),
+                                                           os.path.join(output_dir, member))
+    return samples
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 计算节点 /proc 采样器')
+    parser.add_argument('--outdir', required=True, help='输出目录（job_dir）')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help=f'采样间隔（秒），默认 {DEFAULT_INTERVAL}')
+    parser.add_argument('--proc-root', default='/proc', help='proc 文件系统路径（测试时可指向伪造的目录树）')
+    parser.add_argument('--flush-samples', type=int, default=DEFAULT_FLUSH_SAMPLES, help='缓冲多少次采样后整块写盘')
+    parser.add_argument('--duration', type=float, default=None, help='最长采样时间（秒），默认直到收到停止信号')
+    parser.add_argument('--node', default=None, help='节点名，默认取 SLURMD_NODENAME 或主机名')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    sampler = NodeSampler(args.outdir, interval=args.interval, proc_root=args.proc_root,
+                          flush_samples=args.flush_samples, node=args.node)
+    sampler.run(duration=args.duration)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控自身开销的统计与自动限流。
+
+- ProbeStats:     每个探针的调用次数、非零退出/超时次数、输出字节数与耗时直方图，定期写入 job_dir/probe_stats.json
+- OverheadBudget: 开销预算（探针累计耗时占墙钟时间的比例上限、最近窗口内探针耗时的 p99 上限），
+                  超出预算时逐级限流：先停掉可选探针 sinfo、再停掉 scontrol、之后每级把采样间隔加倍；
+                  连续一个窗口都低于预算的一半时逐级恢复
+- 每一次限流/恢复决策追加写入 job_dir/throttle_log.csv，并记录到监控日志
+
+探针累计耗时是各探针耗时之和（同一节拍内并发执行的探针分别计入），近似反映监控对 slurmctld/slurmdbd 造成的 RPC 负载。
+"""
+
+import bisect
+import csv
+import json
+import os
+import time
+from collections import deque
+
+from perfbench.utils.archive import read_job_file
+
+STATS_FILE = "probe_stats.json"
+THROTTLE_LOG_FILE = "throttle_log.csv"
+THROTTLE_LOG_FIELDS = ("ts_ms", "action", "level", "dropped", "interval_factor", "probe_fraction", "p99_s", "reason")
+
+# 耗时直方图的桶上界（秒），最后一个桶收纳更慢的调用
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+# 超出预算时按顺序停掉的可选探针（sacct/sstat/squeue 决定作业状态与指标，不能停）
+OPTIONAL_PROBES = ("sinfo", "scontrol")
+# 可选探针全部停掉后，每级把采样间隔加倍，最多 MAX_STRETCH 倍
+MAX_STRETCH = 8
+
+DEFAULT_WINDOW = 20
+# 窗口中至少有这么多个节拍才做决策
+MIN_WINDOW_TICKS = 5
+
+
+class ProbeCounters:
+    """
+    单个探针的累计统计
+    """
+    __slots__ = ("calls", "errors", "timeouts", "skipped", "output_bytes", "latency_sum", "latency_max", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.output_bytes = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+
+    def quantile(self, q):
+        """
+        由直方图估计分位数（取所在桶的上界；落在最后一个桶时取观测到的最大值）
+        """
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.histogram):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "output_bytes": self.output_bytes,
+            "latency_sum_s": round(self.latency_sum, 6),
+            "latency_max_s": round(self.latency_max, 6),
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "p99_s": self.quantile(0.99),
+            "histogram": list(self.histogram),
+        }
+
+
+class ProbeStats:
+    """
+    全部探针的统计。record() 记录一次执行结果，skip() 记录一次因限流跳过
+    """
+
+    def __init__(self, output_dir=None):
+        self.path = os.path.join(output_dir, STATS_FILE) if output_dir else None
+        self.probes = {}
+        self.ticks = 0
+        self.started = time.monotonic()
+        self.probe_seconds = 0.0
+
+    def counters(self, name):
+        counters = self.probes.get(name)
+        if counters is None:
+            counters = self.probes[name] = ProbeCounters()
+        return counters
+
+    def record(self, result):
+        """
+        result: async_monitor.ProbeResult
+        """
+        counters = self.counters(result.name)
+        counters.calls += 1
+        if result.timed_out:
+            counters.timeouts += 1
+        elif result.returncode != 0:
+            counters.errors += 1
+        counters.output_bytes += len(result.output.encode('utf-8', errors='replace')) if result.output else 0
+        counters.latency_sum += result.latency
+        counters.latency_max = max(counters.latency_max, result.latency)
+        counters.histogram[min(bisect.bisect_left(LATENCY_BUCKETS, result.latency), len(LATENCY_BUCKETS) - 1)] += 1
+        self.probe_seconds += result.latency
+
+    def skip(self, name):
+        self.counters(name).skipped += 1
+
+    def to_dict(self, budget=None):
+        wall = time.monotonic() - self.started
+        data = {
+            "ticks": self.ticks,
+            "wall_seconds": round(wall, 3),
+            "probe_seconds": round(self.probe_seconds, 6),
+            "probe_fraction": self.probe_seconds / wall if wall > 0 else None,
+            "buckets_s": [b if b != float("inf") else None for b in LATENCY_BUCKETS],
+            "probes": {name: counters.to_dict() for name, counters in sorted(self.probes.items())},
+        }
+        if budget is not None:
+            data["throttle"] = budget.to_dict()
+        return data
+
+    def write(self, budget=None):
+        """
+        原子地写入 probe_stats.json
+        """
+        if self.path is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(budget), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class OverheadBudget:
+    """
+    开销预算与逐级限流
+
+    max_fraction: 探针累计耗时占墙钟时间的比例上限（如 0.05 表示 5%），None 表示不限制
+    p99_ceiling:  最近窗口内探针耗时 p99 的上限（秒），None 表示不限制
+    window:       参与评估的最近节拍数；每次调整后窗口清空，等新的测量值积累后再评估
+    optional:     可以按顺序停掉的探针，默认 OPTIONAL_PROBES
+    """
+
+    def __init__(self, max_fraction=None, p99_ceiling=None, window=DEFAULT_WINDOW, output_dir=None,
+                 optional=OPTIONAL_PROBES):
+        self.max_fraction = max_fraction
+        self.p99_ceiling = p99_ceiling
+        self.window = max(int(window), MIN_WINDOW_TICKS)
+        self.optional = tuple(optional)
+        self.level = 0
+        self.max_level = len(self.optional) + MAX_STRETCH.bit_length() - 1
+        self.ticks = deque(maxlen=self.window)
+        self.decisions = 0
+        self.log_path = os.path.join(output_dir, THROTTLE_LOG_FILE) if output_dir else None
+
+    @property
+    def enabled(self):
+        return self.max_fraction is not None or self.p99_ceiling is not None
+
+    @property
+    def dropped(self):
+        return self.optional[:min(self.level, len(self.optional))]
+
+    @property
+    def interval_factor(self):
+        return 2 ** max(self.level - len(self.optional), 0)
+
+    def measure(self):
+        """
+        返回窗口内的 (探针累计耗时占比, 探针耗时 p99)
+        """
+        if len(self.ticks) < 2:
+            return None, None
+        span = self.ticks[-1][1] - self.ticks[0][0]
+        probe_seconds = sum(sum(latencies) for _, _, latencies in self.ticks)
+        latencies = sorted(l for _, _, tick in self.ticks for l in tick)
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else None
+        return (probe_seconds / span if span > 0 else None), p99
+
+    def update(self, tick_start, tick_end, latencies, ts_ms):
+        """
+        记录一个节拍（单调时钟上的开始/结束时间与各探针耗时），必要时调整限流级别。
+        返回本次的决策（字典），没有调整时返回 None
+        """
+        if not self.enabled:
+            return None
+        self.ticks.append((tick_start, tick_end, list(latencies)))
+        if len(self.ticks) < MIN_WINDOW_TICKS:
+            return None
+        fraction, p99 = self.measure()
+        over = []
+        if self.max_fraction is not None and fraction is not None and fraction > self.max_fraction:
+            over.append(f"探针耗时占比 {fraction:.1%} > {self.max_fraction:.1%}")
+        if self.p99_ceiling is not None and p99 is not None and p99 > self.p99_ceiling:
+            over.append(f"探针耗时 p99 {p99:.3f}s > {self.p99_ceiling:.3f}s")
+        if over and self.level < self.max_level:
+            return self.change(+1, "; ".join(over), fraction, p99, ts_ms)
+        # 整个窗口都明显低于预算才恢复一级，避免在预算边缘来回切换
+        relaxed = (len(self.ticks) == self.window
+                   and (self.max_fraction is None or (fraction is not None and fraction < self.max_fraction / 2))
+                   and (self.p99_ceiling is None or (p99 is not None and p99 < self.p99_ceiling / 2)))
+        if not over and relaxed and self.level > 0:
+            return self.change(-1, "连续一个窗口低于预算的一半", fraction, p99, ts_ms)
+        return None
+
+    def change(self, step, reason, fraction, p99, ts_ms):
+        self.level += step
+        self.ticks.clear()
+        self.decisions += 1
+        decision = {
+            "ts_ms": int(ts_ms),
+            "action": "throttle" if step > 0 else "relax",
+            "level": self.level,
+            "dropped": list(self.dropped),
+            "interval_factor": self.interval_factor,
+            "probe_fraction": fraction,
+            "p99_s": p99,
+            "reason": reason,
+        }
+        self.write_decision(decision)
+        return decision
+
+    def write_decision(self, decision):
+        if self.log_path is None:
+            return
+        is_new = not os.path.exists(self.log_path)
+        with open(self.log_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(THROTTLE_LOG_FIELDS)
+            writer.writerow((decision["ts_ms"], decision["action"], decision["level"], " ".join(decision["dropped"]),
+                             decision["interval_factor"],
+                             "" if decision["probe_fraction"] is None else f"{decision['probe_fraction']:.4f}",
+                             "" if decision["p99_s"] is None else f"{decision['p99_s']:.4f}",
+                             decision["reason"]))
+
+    def to_dict(self):
+        return {
+            "max_fraction": self.max_fraction,
+            "p99_ceiling_s": self.p99_ceiling,
+            "level": self.level,
+            "dropped": list(self.dropped),
+            "interval_factor": self.interval_factor,
+            "decisions": self.decisions,
+        }
+
+
+def load_probe_stats(output_dir):
+    """
+    读取 job_dir（目录或归档）中的探针统计，不存在时返回 None
+    """
+    data = read_job_file(output_dir, STATS_FILE)
+    if data is None:
+        return None
+    try:
+        return json.loads(data.decode('utf-8'))
+    except ValueError:
+        return None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PerfBench 自身的耗时剖析（--profile）。
+
+span(name) 记录一段操作的开始时间与耗时，stage(name) 记录 CLI 主流程的阶段（由 StepProgress 在切换步骤时调用）；
+结束时写出 Chrome trace-event 格式的 JSON（chrome://tracing 或 https://ui.perfetto.dev 打开），
+可选地同时写出 cProfile 的统计文件（python -m pstats 或 snakeviz 查看）。
+
+未启用时 span()/stage() 只做一次全局变量检查，不记录任何数据。
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+TRACE_FILE = "perfbench_trace.json"
+CPROFILE_FILE = "perfbench_profile.prof"
+
+# 当前进程的 Tracer，None 表示未启用
+_TRACER = None
+
+
+class Tracer:
+    """
+    收集 trace 事件（complete 事件 "ph": "X"，时间单位为微秒）
+    """
+
+    def __init__(self, cprofile=False):
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.stage_name = None
+        self.stage_start = None
+        self.lock = threading.Lock()
+        self.profiler = cProfile.Profile() if cprofile else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def add(self, name, start_us, cat, args=None):
+        thread = threading.current_thread()
+        event = {"name": name, "cat": cat, "ph": "X", "ts": round(start_us, 3),
+                 "dur": round(self.now_us() - start_us, 3), "pid": self.pid, "tid": thread.ident}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    def stage(self, name):
+        """
+        结束当前阶段并开始新的阶段；name 为 None 时只结束当前阶段
+        """
+        if self.stage_name is not None:
+            self.add(self.stage_name, self.stage_start, "stage")
+        self.stage_name = name
+        self.stage_start = self.now_us() if name is not None else None
+
+    def trace(self):
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "perfbench"}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                     for tid, name in self.threads.items()]
+        return {"traceEvents": metadata + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+    def write(self, out_dir):
+        """
+        写出 trace JSON（以及 cProfile 统计），返回写出的文件路径列表
+        """
+        self.stage(None)
+        os.makedirs(out_dir, exist_ok=True)
+        paths = [os.path.join(out_dir, TRACE_FILE)]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f, ensure_ascii=False)
+        if self.profiler is not None:
+            self.profiler.disable()
+            paths.append(os.path.join(out_dir, CPROFILE_FILE))
+            self.profiler.dump_stats(paths[1])
+        return paths
+
+
+def start(cprofile=False):
+    """
+    启用剖析，返回 Tracer
+    """
+    global _TRACER
+    _TRACER = Tracer(cprofile=cprofile)
+    return _TRACER
+
+
+def stop(out_dir):
+    """
+    停止剖析并把结果写入 out_dir，返回写出的文件路径列表（未启用时为空）
+    """
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    if tracer is None:
+        return []
+    return tracer.write(out_dir)
+
+
+def enabled():
+    return _TRACER is not None
+
+
+@contextmanager
+def span(name, cat="op", **args):
+    """
+    记录 with 块的耗时；args 作为事件参数写入 trace
+    """
+    tracer = _TRACER
+    if tracer is None:
+        yield
+        return
+    start_us = tracer.now_us()
+    try:
+        yield
+    finally:
+        tracer.add(name, start_us, cat, args)
+
+
+def traced(name=None, cat="op"):
+    """
+    装饰器：记录函数每次调用的耗时
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return func(*args, **kwargs)
+            with span(label, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage(name):
+    """
+    CLI 主流程进入新阶段（未启用时不做任何事）
+    """
+    tracer = _TRACER
+    if tracer is not None:
+        tracer.stage(name)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import sys
 import time
+from perfbench.utils import profiler
 
 def simple_progress_bar(current, total, status_text=""):
     bar_len = 40
@@ -19,9 +20,10 @@ class StepProgress:
         self.steps = steps
         self.current = 0
     def next(self, status=None):
-        self.current += 1
-        if self.current > len(self.steps):
-            self.current = len(self.steps)
+        if self.current < len(self.steps):
+            self.current += 1
+            # --profile 时每个步骤记为 trace 中的一个阶段
+            profiler.stage(self.steps[self.current-1])
         self.show(status)
     def show(self, status=None):
         step_text = f"步骤 {self.current}/{len(self.steps)}: {self.steps[self.current-1]}"
@@ -30,6 +32,7 @@ class StepProgress:
         simple_progress_bar(self.current, len(self.steps), step_text)
     def finish(self):
         self.current = len(self.steps)
+        profiler.stage(None)
         self.show("完成")
         sys.stdout.write('\n')
         sys.stdout.flush()
@@ -1,8 +1,16 @@
 import os
+import re
 import glob
+import bisect
+import itertools
 import yaml
+import numpy as np
 from pathlib import Path
 from perfbench.utils.logger import get_logger
+from perfbench.utils import sample_store, slurm_types, rollup, archive, profiler
+from perfbench.utils.sampling import load_sampling_timeline
+from perfbench.utils.node_sampler import load_node_samples
+from perfbench.utils.columnar import ColumnTable, RowsView, save_tables, load_tables
 
 logger = get_logger() # 获取logger实例
 
@@ -14,97 +22,660 @@ supported_CMD = [
     "scontrol",
 ]
 
+# 增量解析检查点存放在 out_dir 下的该目录中
+CHECKPOINT_DIR = ".perfbench_cache"
+CHECKPOINT_VERSION = 3
+LEGACY_CHECKPOINT_SUFFIXES = (".ckpt.json", ".tables.jsonl")
+
+# 待转换的原始行累积到该数量时批量转换进列存表，限制解析长作业时的峰值内存
+FLUSH_ROWS = 8192
+
+# SLURM 作业号：<job>[_<数组任务>][+<异构分量>][.<作业步>]
+# 例如 123、123_4、123_[1-10]（未展开的待调度数组）、123+1、123_4.batch、123.0
+JOBID_PATTERN = re.compile(
+    r'^(?P<job>\d+)(?:_(?P<array_task>\d+|\[[^\]]*\]))?(?:\+(?P<het>\d+))?(?:\.(?P<step>.+))?$'
+)
+
+
+def parse_jobid(jobid: str):
+    """
+    将 sacct/sstat 的 JobID 拆分为层级字段：
+    {"job": "123", "array_task": "4", "het": None, "step": "batch"}
+    无法识别时返回 None
+    """
+    match = JOBID_PATTERN.match(jobid.strip()) if jobid else None
+    if not match:
+        return None
+    return match.groupdict()
+
+
+def parse_pipe_table(text):
+    """
+    解析 `-P` 格式（以 | 分隔）的 sacct/sstat 输出，返回 (表头列表, 数据行字段列表)
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) <= 1:
+        return [], []
+    headers = [h.strip() for h in lines[0].split('|')]
+    if "JobID" not in headers: # 错误输出（例如作业尚未开始时 sstat 的报错）
+        return [], []
+    rows = [line.split('|') for line in lines[1:]]
+    return headers, rows
+
+
+def parse_sinfo_table(text):
+    """
+    解析 `sinfo -N -o "%N %t %f"` 的输出（以空白分隔，最后一列可能含逗号列表）
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) <= 1:
+        return [], []
+    headers = lines[0].split()
+    if not headers or headers[0] != "NODELIST":
+        return [], []
+    rows = [line.split(None, len(headers) - 1) for line in lines[1:]]
+    return headers, rows
+
+
+def parse_seff_table(text):
+    """
+    解析 seff 的 "键: 值" 输出，返回单行表
+    """
+    headers, row = [], []
+    for line in text.splitlines():
+        key, sep, value = line.partition(':')
+        if sep and key.strip():
+            headers.append(key.strip())
+            row.append(value.strip())
+    if "Job ID" not in headers:
+        return [], []
+    return headers, [row]
+
+
+SCONTROL_PAIR_PATTERN = re.compile(r'(?:^|\s)([A-Za-z][\w:/]*)=(\S*)')
+
+
+def parse_scontrol_table(text):
+    """
+    解析 `scontrol show job` 的 Key=Value 输出；数组作业会输出多条以空行分隔的记录，每条记录一行
+    """
+    records = []
+    for block in re.split(r'\n\s*\n', text):
+        pairs = SCONTROL_PAIR_PATTERN.findall(block)
+        if pairs:
+            records.append(dict(pairs))
+    records = [r for r in records if "JobId" in r]
+    if not records:
+        return [], []
+    headers = []
+    for record in records:
+        headers.extend(k for k in record if k not in headers)
+    rows = [[record.get(h, "") for h in headers] for record in records]
+    return headers, rows
+
+
+# 各命令的输出解析函数：文本 -> (表头, 数据行)
+TABLE_PARSERS = {
+    "sacct": parse_pipe_table,
+    "sstat": parse_pipe_table,
+    "sinfo": parse_sinfo_table,
+    "seff": parse_seff_table,
+    "scontrol": parse_scontrol_table,
+}
+
+# 记录作业本身的命令及其 (作业号, 状态, 运行时间) 列，按优先顺序；
+# 记账存储关闭时监控不执行 sacct，改用 scontrol show job
+JOB_COLUMNS = {
+    "sacct": ("JobID", "State", "Elapsed"),
+    "scontrol": ("JobId", "JobState", "RunTime"),
+}
+
+
 class Result:
-    def __init__(self, cmd_name, out_dir, interval: int):
+    def __init__(self, cmd_name, out_dir, interval: int, incremental: bool = False):
         """
         cmd_name: 该result对象对应的命令名称
-        out_dir: 本次测试中输出的log文件存放的路径
+        out_dir: 本次测试中输出的log文件存放的路径，也可以是 `perfbench archive` 生成的归档（直接随机读取，不解压）
+        incremental: 增量模式。列存表（类型化列 + 驻留词表）与消费位置持久化到 {out_dir}/.perfbench_cache 中，
+                     新建对象时以 mmap 直接载入检查点，只解析其后新增的采样（归档只读，忽略该选项）
         """
         self.cmd_name = cmd_name
         self.out_dir = out_dir
-        self.data = [] # 用于存放数据字典的列表
+        # 列存表：汇总行（sacct 每次采样一行，对应作业本身；其余命令每条记录一行）
+        # 有转换规则的字段为类型化数组（见 slurm_types.COLUMN_CONVERTERS），其余字段为驻留字符串
+        self.table = ColumnTable()
+        # sacct 的全部行（含作业步），用于按作业层级取序列；其余命令的所有行都是汇总行，与 table 共用
+        self.step_table = ColumnTable() if cmd_name == "sacct" else self.table
+        # 作业层级：JobID -> {"job", "array_task", "het", "step"}
+        self.steps = {}
+        # 尚未转换入列存表的采样：[(ts_ms, 表头, 数据行), ...]
+        self.pending = []
+        self.pending_rows = 0
         self.interval = interval
+        self.archive = archive.open_archive(out_dir) if archive.is_archive(out_dir) else None
+        if self.archive is not None:
+            incremental = False
+        # 存在 samples.idx 时从时序存储读取，否则回退到按节拍落盘的 log 文件（归档中总是时序存储）
+        if self.archive is not None:
+            self.use_store = self.archive.exists(sample_store.INDEX_FILE)
+        else:
+            self.use_store = sample_store.has_store(out_dir)
+        # 已消费到的位置：时序存储为下一个索引项下标，log 文件为最后一个已解析的时间戳
+        self.position = None
+        self.sample_count = 0 # 已解析的采样次数
+        self.row_count = 0 # 已解析的行数
+        self.incremental = incremental
+        self.saved_samples = None # 检查点中的采样次数，没有新采样时不重写检查点
+        # 分层聚合（见 perfbench.utils.rollup）：层级名 -> (文件状态, 数据)，文件变化时重新载入
+        self.rollups = {}
+        if incremental:
+            self.load_checkpoint()
         self.parse_log_files()
+        if cmd_name in rollup.ROLLUP_COMMANDS:
+            for tier, _ in rollup.TIERS:
+                self.rollup_table(tier)
         
     def parse_log_files(self):
         """
-        对{outDir}路径下的所有由{cmdName}产生的log文件进行分析
+        对{outDir}路径下的所有由{cmdName}产生的log文件进行分析（只解析上次之后新增的采样）
         """
         try:
-            if self.cmd_name == "sacct":
-                self.parse_sacct()
+            if self.cmd_name in TABLE_PARSERS:
+                with profiler.span(f"parse_{self.cmd_name}"):
+                    self.parse_command(self.cmd_name)
             else:
                 pass
         except Exception as e:
             logger.error(f"日志文件解析失败: {str(e)}")
             return None
+        finally:
+            if self.incremental:
+                self.save_checkpoint()
+
+    def refresh(self):
+        """
+        解析自上次以来新增的采样，返回新增的采样次数
+        """
+        before = self.sample_count
+        self.parse_log_files()
+        return self.sample_count - before
+
+    def checkpoint_path(self):
+        return os.path.join(self.out_dir, CHECKPOINT_DIR, self.cmd_name + ".ckpt")
+
+    def load_checkpoint(self):
+        """
+        载入检查点：消费位置 + 列存表（mmap 映射，不解析已消费的采样）。
+        检查点与当前数据源（时序存储/log 文件）不一致或已损坏时丢弃，从头解析。
+        """
+        path = self.checkpoint_path()
+        try:
+            ckpt, tables = load_tables(path)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"检查点已损坏，重新解析: {path}（{e}）")
+            return
+        if (not isinstance(ckpt, dict) or ckpt.get("version") != CHECKPOINT_VERSION
+                or ckpt.get("cmd") != self.cmd_name or ckpt.get("use_store") != self.use_store
+                or len(tables) != (2 if self.cmd_name == "sacct" else 1)):
+            logger.info(f"检查点与当前数据源不一致，重新解析: {path}")
+            return
+        self.table = tables[0]
+        self.step_table = tables[-1]
+        for job_id in ckpt.get("steps", []):
+            self.add_step(job_id)
+        self.row_count = len(self.step_table)
+        self.position = ckpt.get("position")
+        self.sample_count = self.saved_samples = ckpt.get("samples", 0)
+
+    def save_checkpoint(self):
+        """
+        把列存表与消费位置原子地写入检查点（单个文件，载入时直接映射）；没有新采样时跳过
+        """
+        if self.sample_count == self.saved_samples:
+            return
+        self.flush_pending()
+        path = self.checkpoint_path()
+        ckpt = {
+            "version": CHECKPOINT_VERSION,
+            "cmd": self.cmd_name,
+            "use_store": self.use_store,
+            "position": self.position,
+            "samples": self.sample_count,
+            "steps": list(self.steps),
+        }
+        tables = [self.table] if self.step_table is self.table else [self.table, self.step_table]
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            save_tables(path, tables, ckpt)
+            self.saved_samples = self.sample_count
+            # 旧版本检查点（逐条 JSON 记录的解析结果）不再使用
+            for suffix in LEGACY_CHECKPOINT_SUFFIXES:
+                legacy = os.path.join(os.path.dirname(path), self.cmd_name + suffix)
+                if os.path.exists(legacy):
+                    os.remove(legacy)
+        except OSError as e:
+            logger.warning(f"写入检查点失败: {str(e)}")
+
+    def reset(self):
+        """
+        清空所有已解析的数据
+        """
+        self.table = ColumnTable()
+        self.step_table = ColumnTable() if self.cmd_name == "sacct" else self.table
+        self.steps = {}
+        self.pending, self.pending_rows = [], 0
+        self.row_count = 0
+
+    def list_log_files(self, cmd_name=None):
+        """
+        返回按时间戳排序的 {cmd_name}_<ts>.log 文件列表
+        """
+        cmd_name = cmd_name or self.cmd_name
+        pattern = os.path.join(self.out_dir, f"{cmd_name}_*.log")
+        # 时间戳格式固定（YYYYMMDD_HHMMSS[_mmm]），按文件名排序即按时间排序
+        return sorted(glob.glob(pattern))
+
+    def iter_samples(self, cmd_name=None):
+        """
+        按时间顺序返回 {cmd_name} 尚未消费的采样 (ts_ms, time_stamp, 输出文本)，time_stamp 格式为 YYYYMMDD_HHMMSS[_mmm]。
+        每条采样被调用方处理完后才推进 self.position，中途异常时不会丢失采样。
+        """
+        cmd_name = cmd_name or self.cmd_name
+        if self.use_store:
+            with self.open_reader() as reader:
+                for i, ts_ms, offset, _, _ in reader.entries(cmd_name, start_index=self.position or 0):
+                    yield ts_ms, sample_store.ts_ms_to_str(ts_ms), reader.read(offset)[2]
+                    self.sample_count += 1
+                    self.position = i + 1
+                # 其他命令的索引项也已扫描过，下次从索引末尾开始
+                self.position = max(self.position or 0, len(reader))
+            return
+        prefix_len = len(cmd_name) + 1
+        file_paths = self.list_log_files(cmd_name)
+        names = [os.path.basename(p)[prefix_len:-4] for p in file_paths]
+        start = bisect.bisect_right(names, self.position) if self.position else 0
+        for file_path, time_stamp in zip(file_paths[start:], names[start:]):
+            with open(file_path, 'r', encoding='utf-8') as file:
+                text = file.read()
+            try:
+                ts_ms = sample_store.str_to_ts_ms(time_stamp)
+            except ValueError:
+                ts_ms = 0
+            yield ts_ms, time_stamp, text
+            self.sample_count += 1
+            self.position = time_stamp
+
+    def open_reader(self):
+        """
+        时序存储的 SegmentReader：目录中 mmap 两个文件，归档中 mmap 对应的字节范围
+        """
+        if self.archive is not None:
+            return self.archive.segment_reader()
+        return sample_store.SegmentReader(self.out_dir)
+
+    def parse_command(self, cmd_name):
+        """
+        解析 {cmd_name} 新增的采样：文本按命令解析为表并登记为待转换的采样，每累积 FLUSH_ROWS 行整批转换进列存表
+        """
+        table_parser = TABLE_PARSERS[cmd_name]
+        for ts_ms, time_stamp, text in self.iter_samples(cmd_name):
+            headers, rows = table_parser(text)
+            if rows:
+                self.ingest(ts_ms, time_stamp, headers, rows)
+                if self.pending_rows >= FLUSH_ROWS:
+                    self.flush_pending()
+        self.flush_pending()
+        if self.sample_count == 0:
+            raise Exception(f"未找到 {cmd_name} 的采样数据: {self.out_dir}") # 抛出异常
+
+    def ingest(self, ts_ms, time_stamp, headers, rows):
+        """
+        并入一次采样解析出的表：只登记到待转换的采样中，转置与类型转换在 flush_pending 中整批进行
+        """
+        self.pending.append((ts_ms, headers, rows))
+        self.pending_rows += len(rows)
+        self.row_count += len(rows)
+
+    def flush_pending(self):
+        """
+        把待转换的采样整批转置为列，再批量转换（数值/时长/分类列为类型化数组，其余驻留为字符串编码）并追加进列存表。
+        表头相同的相邻采样合并为一段，每段只转置一次
+        """
+        if not self.pending_rows:
+            return
+        samples, n = self.pending, self.pending_rows
+        self.pending, self.pending_rows = [], 0
+
+        counts = np.fromiter((len(rows) for _, _, rows in samples), dtype=np.int64, count=len(samples))
+        time_ms = np.repeat(np.fromiter((ts_ms for ts_ms, _, _ in samples), dtype=np.int64, count=len(samples)),
+                            counts)
+        # 每段：(行数, 字段名 -> 值序列)；段内缺失的字段在拼接时补空串
+        segments, names = [], {}
+        for headers, group in itertools.groupby(samples, key=lambda sample: sample[1]):
+            rows = [row for _, _, sample_rows in group for row in sample_rows]
+            width = len(headers)
+            if any(length != width for length in set(map(len, rows))):
+                # 字段数不一致的行截断或补空串
+                rows = [row[:width] + [""] * (width - len(row)) if len(row) != width else row for row in rows]
+            # 展平后按步长切片即为各列，比 zip(*rows) 少构造一层元组
+            flat = list(itertools.chain.from_iterable(rows))
+            segments.append((len(rows), {header: flat[i::width] for i, header in enumerate(headers)}))
+            names.update(dict.fromkeys(headers))
+        columns = {}
+        for name in names:
+            if len(segments) == 1:
+                columns[name] = segments[0][1][name]
+                continue
+            values = []
+            for count, segment in segments:
+                values.extend(segment.get(name) or [""] * count)
+            columns[name] = values
+
+        if self.cmd_name in ("sacct", "sstat") and "JobID" in columns:
+            for job_id in dict.fromkeys(columns["JobID"]):
+                self.add_step(job_id)
+
+        arrays = {"time_ms": time_ms}
+        strings, categories = {}, {}
+        for name, values in columns.items():
+            converted = slurm_types.convert_column(name, values)
+            if converted is None:
+                strings[name] = values
+                continue
+            arrays[name] = converted
+            if name in slurm_types.COLUMN_CATEGORIES:
+                categories[name] = slurm_types.COLUMN_CATEGORIES[name]
+
+        if self.step_table is self.table:
+            self.table.append(n, arrays, strings, categories)
+            return
+        self.step_table.append(n, arrays, strings, categories)
+        # sacct 只有每次采样的第一行（作业本身）是汇总行
+        idx = np.concatenate(([0], np.cumsum(counts)[:-1]))[counts > 0]
+        summary_rows = idx.tolist()
+        self.table.append(
+            len(idx),
+            {name: values[idx] for name, values in arrays.items()},
+            {name: [values[i] for i in summary_rows] for name, values in strings.items()},
+            categories,
+        )
+
+    @property
+    def data(self):
+        """
+        汇总行的只读“行字典列表”视图（按需从列存表构造，兼容旧接口），额外带 time_stamp 字段
+        """
+        return RowsView(self.table, {"time_stamp": lambda row: sample_store.ts_ms_to_str(row["time_ms"])})
+
+    def get_column(self, column_name: str, start_ms=None, end_ms=None, steps: bool = False, decode: bool = False,
+                   resolution: str = "auto", agg: str = "mean"):
+        """
+        返回 [start_ms, end_ms) 范围内某列的 (time_ms, 值)，均为列存表的视图（decode=True 或拼接了聚合数据时除外）。
+        steps=True 时取包含作业步的全部行；字符串列与分类列默认返回编码，decode=True 时解码为字符串。
+        resolution: "auto" 在原始采样已被保留策略丢弃的时间段自动改用分层聚合（1 分钟，再早为 10 分钟），
+                    "raw" 只取原始采样，"1m"/"10m" 只取对应层级的聚合
+        agg: 聚合数据取哪个统计量（min/max/mean/last），分类列总是取 last；聚合行的时间为桶内最后一次采样的时间
+        列不存在时返回 (None, None)
+        """
+        table = self.step_table if steps else self.table
+        if resolution != "raw" and column_name in slurm_types.COLUMN_CONVERTERS and self.rollups:
+            return self.stitch_column(table, column_name, start_ms, end_ms, decode, resolution, agg,
+                                      summary_only=not steps)
+        rows = table.time_slice(start_ms, end_ms)
+        values = table.column(column_name, rows)
+        if values is None:
+            return None, None
+        if decode:
+            values = table.decode(column_name, values)
+        return table.column("time_ms", rows), values
+
+    def rollup_table(self, tier):
+        """
+        本命令在某一聚合层级上的数据（{字段: 数组}），没有聚合文件时返回 None。
+        聚合中出现的 JobID 同样登记到作业层级中（其原始采样可能已被丢弃）
+        """
+        stamp = archive.job_file_stamp(self.out_dir, os.path.basename(rollup.rollup_path(self.out_dir, tier)))
+        if stamp is None:
+            self.rollups.pop(tier, None)
+            return None
+        cached = self.rollups.get(tier)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        data = rollup.load_rollup(self.out_dir, tier, self.cmd_name)
+        self.rollups[tier] = (stamp, data)
+        if data is not None:
+            for job_id in np.unique(data["job_id"]).tolist():
+                self.add_step(job_id)
+        return data
+
+    def rollup_rows(self, tier, column_name, mask=None):
+        """
+        某一层级中 column_name 的全部聚合行下标（按桶时间排序），mask 为附加的行筛选条件
+        """
+        data = self.rollup_table(tier)
+        if data is None:
+            return None, None
+        selected = data["column"] == column_name
+        if mask is not None:
+            selected &= mask(data)
+        return data, np.flatnonzero(selected)
+
+    def stitch_rows(self, raw_times, column_name, start_ms, end_ms, resolution, mask=None):
+        """
+        选出覆盖 [start_ms, end_ms) 的各段聚合：返回 [(data, 行下标), ...]，按时间先后排列。
+        auto：原始采样覆盖的时间段之前用 1 分钟聚合，1 分钟聚合覆盖的时间段之前用 10 分钟聚合（只取完整落在边界之前的桶）
+        """
+        lo = start_ms if start_ms is not None else np.iinfo(np.int64).min
+        hi = end_ms if end_ms is not None else np.iinfo(np.int64).max
+        if resolution != "auto":
+            data, rows = self.rollup_rows(resolution, column_name, mask)
+            if data is None:
+                return []
+            last_ms = data["last_ms"][rows]
+            return [(data, rows[(last_ms >= lo) & (last_ms < hi)])]
+        bound = min(hi, int(raw_times[0])) if raw_times is not None and len(raw_times) else hi
+        pieces = []
+        for tier, width in rollup.TIERS:
+            data, rows = self.rollup_rows(tier, column_name, mask)
+            if data is None or not len(rows):
+                continue
+            bucket_ms = data["bucket_ms"][rows]
+            last_ms = data["last_ms"][rows]
+            pieces.append((data, rows[(bucket_ms + width <= bound) & (last_ms >= lo)]))
+            bound = min(bound, int(bucket_ms[0]))
+        return pieces[::-1]
+
+    def stitch_column(self, table, column_name, start_ms, end_ms, decode, resolution, agg, summary_only):
+        """
+        get_column 的分层版本：聚合数据在前，原始采样在后，拼接为一条时间序列
+        """
+        if resolution not in ("auto",) + tuple(rollup.TIER_WIDTHS):
+            raise ValueError(f"不支持的分辨率: {resolution}")
+        rows = table.time_slice(start_ms, end_ms) if resolution == "auto" else slice(0, 0)
+        raw_times = table.column("time_ms", rows)
+        raw_values = table.column(column_name, rows)
+        mask = (lambda data: data["summary"]) if summary_only else None
+        pieces = self.stitch_rows(table.column("time_ms"), column_name, start_ms, end_ms, resolution, mask)
+        return self.join_pieces(table, column_name, pieces, raw_times, raw_values, decode, agg)
+
+    def join_pieces(self, table, column_name, pieces, raw_times, raw_values, decode, agg):
+        """
+        把若干段聚合与原始采样拼接为 (time_ms, 值)
+        """
+        if agg not in rollup.AGGREGATES:
+            raise ValueError(f"不支持的聚合统计量: {agg}")
+        categorical = column_name in slurm_types.COLUMN_CATEGORIES
+        field = "last" if categorical else agg
+        times = [data["last_ms"][rows] for data, rows in pieces]
+        values = [data[field][rows] for data, rows in pieces]
+        if not any(len(t) for t in times):
+            if raw_values is None:
+                return None, None
+            return raw_times, table.decode(column_name, raw_values) if decode else raw_values
+        if raw_values is not None:
+            times.append(raw_times)
+            values.append(raw_values)
+        time_ms = np.concatenate(times)
+        values = np.concatenate(values)
+        if categorical:
+            values = values.astype(np.int16)
+            if decode:
+                values = np.asarray(slurm_types.COLUMN_CATEGORIES[column_name], dtype=object)[values]
+        return time_ms, values
+
+    def get_series(self, column_name: str, summary_only: bool = False):
+        """
+        返回 (time_ms, 类型化序列)；summary_only=True 时只保留汇总行（sacct 中即作业本身）
+        """
+        return self.get_column(column_name, steps=not summary_only)
+
+    def add_step(self, job_id):
+        """
+        把 JobID 登记到作业层级中
+        """
+        if job_id in self.steps:
+            return
+        ids = parse_jobid(job_id)
+        if ids is not None:
+            self.steps[job_id] = ids
+
+    def get_hierarchy(self):
+        """
+        返回 作业 -> 数组任务/异构分量 -> 作业步 的层级结构：
+        {"123": {"4": ["123_4", "123_4.batch", "123_4.0"], ...}}
+        非数组、非异构作业的任务键为 None
+        """
+        tree = {}
+        for job_id, entry in self.steps.items():
+            task = entry["array_task"] if entry["array_task"] is not None else entry["het"]
+            tree.setdefault(entry["job"], {}).setdefault(task, []).append(job_id)
+        return tree
+
+    def get_step_series(self, job_id: str, column_name: str, resolution: str = "auto", agg: str = "mean"):
+        """
+        返回指定作业步某一列的 (time_ms, 值) 序列；作业步或列不存在时返回 (None, None)。
+        resolution/agg 同 get_column：原始采样已被丢弃的时间段使用分层聚合
+        """
+        code = self.step_table.code_of("JobID", job_id)
+        values = self.step_table.column(column_name)
+        if code is not None and values is not None:
+            mask = self.step_table.column("JobID") == code
+            raw_times, raw_values = self.step_table.column("time_ms")[mask], values[mask]
+        else:
+            raw_times, raw_values = self.step_table.column("time_ms", slice(0, 0)), None
+        if resolution == "raw" or column_name not in slurm_types.COLUMN_CONVERTERS or not self.rollups:
+            return (raw_times, raw_values) if raw_values is not None else (None, None)
+        if resolution != "auto":
+            raw_times, raw_values = raw_times[:0], (raw_values[:0] if raw_values is not None else None)
+        pieces = self.stitch_rows(raw_times, column_name, None, None, resolution,
+                                  lambda data: data["job_id"] == job_id)
+        return self.join_pieces(self.step_table, column_name, pieces, raw_times, raw_values, False, agg)
     
     def get_column_by_name(self, column_name: str):
         """
-        返回带时间戳的指定列的结果列表
-        """
-        res_list = []
-        for row in self.data:
-            res_list.append(
-                {
-                    "time_stamp": row["time_stamp"],
-                    column_name: row[column_name]
-                }
-            )
-        return res_list
+        返回带时间戳的指定列：(time_ms, 值)，均为列存表的视图
+        """
+        return self.get_column(column_name)
     
     def parse_sacct(self):
-        pattern = os.path.join(self.out_dir, "sacct_*.log")
-        sacct_files = glob.glob(pattern)
-        if not sacct_files:
-            raise Exception # 抛出异常
-        for file_path in sacct_files:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                # 处理文件逻辑
-                lines = [line.strip() for line in file.readlines() if line.strip()]
-                if len(lines) <= 1: # 排除空行
-                    continue
-                header_line = lines[0] # 获取表头
-                headers = [h.strip() for h in header_line.split('|')]
-                data = lines[1].split('|')
-                filename = os.path.basename(file_path)
-                time_stamp = filename[6:-4] # 获取时间戳
-                row_dict = {
-                    "JobID": None,
-                    "JobName": None,
-                    "State": None,
-                    "Elapsed": None,
-                    "MaxRSS": None,
-                    "AllocCPUS": None,
-                    "time_stamp": time_stamp, # 格式：{YYYYMMDD_hhmmss}
-                }
-                for i, header in enumerate(headers):
-                    row_dict[header] = data[i]
-            self.data.append(row_dict)
-        return
+        self.parse_command("sacct")
     
     def get_elapsed_time(self):
-        if self.cmd_name == "sacct":
-            # print("The elapsed time is:" + self.data[-1]["Elapsed"])
-            from datetime import datetime
-            dt = datetime.strptime(self.data[-1]["Elapsed"], "%H:%M:%S")
-            elapsed_seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
-            print(f"Elapsed time in seconds: {elapsed_seconds}")
+        if self.cmd_name in JOB_COLUMNS:
+            # 取最后一次采样中作业本身的 Elapsed（scontrol 为 RunTime，均支持 D-HH:MM:SS）
+            column_name = JOB_COLUMNS[self.cmd_name][2]
+            _, elapsed = self.get_column(column_name)
+            if elapsed is not None:
+                elapsed = elapsed[~np.isnan(elapsed)]
+            if elapsed is None or elapsed.size == 0:
+                logger.warning(f"{self.out_dir} 中没有有效的 {column_name} 采样，无法确定作业运行时间")
+                return None
+            elapsed_seconds = int(elapsed[-1])
+            logger.info(f"作业运行时间: {elapsed_seconds} 秒")
             return elapsed_seconds
         logger.warning("正在尝试从错误的日志中提取作业完成时间信息")
         return None
              
     def parse_sstat(self):
-        pass
+        self.parse_command("sstat")
     
     def parse_sinfo(self):
-        pass
+        self.parse_command("sinfo")
     
     def parse_seff(self):
-        pass
+        self.parse_command("seff")
     
     def parse_scontrol(self):
-        pass
+        self.parse_command("scontrol")
+
+    def get_sampling_timeline(self):
+        """
+        返回监控引擎记录的实际采样时间线 (time_ms, 间隔秒数)；
+        自适应模式下采样间隔并不固定，报告应以此代替 self.interval。没有时间线时返回 (None, None)
+        """
+        timeline = load_sampling_timeline(self.out_dir)
+        if not timeline:
+            return None, None
+        time_ms = np.fromiter((t["ts_ms"] for t in timeline), dtype=np.int64, count=len(timeline))
+        intervals = np.fromiter((t["interval_s"] for t in timeline), dtype=np.float64, count=len(timeline))
+        return time_ms, intervals
+
+    def get_node_state_counts(self):
+        """
+        sinfo：返回 (每次采样的 time_ms, 计数矩阵)，计数矩阵形状为 [采样次数, len(NODE_STATES)]，
+        列下标即 slurm_types.NODE_STATES 中的状态编码
+        """
+        time_ms, states = self.get_series("STATE")
+        if time_ms is None:
+            return None, None
+        sample_times, sample_idx = np.unique(time_ms, return_inverse=True)
+        counts = np.zeros((len(sample_times), len(slurm_types.NODE_STATES)), dtype=np.int32)
+        np.add.at(counts, (sample_idx.reshape(-1), states), 1)
+        return sample_times, counts
+
+    def get_node_samples(self):
+        """
+        计算节点采样器的数据：返回 {节点名: {字段名: 数组}}。
+        除原始累计计数器外，附加相邻采样之间的派生量（长度比采样次数少 1，时间取区间终点）：
+        - cpu_util:  CPU 利用率（0~1，非 idle/iowait 节拍占比）
+        - mem_used_kb: MemTotal - MemAvailable
+        - net_rx_bps / net_tx_bps: 收发速率（字节/秒）
+        """
+        nodes = {}
+        for node, fields in load_node_samples(self.out_dir).items():
+            columns = {name: np.frombuffer(values, dtype=np.int64) for name, values in fields.items()}
+            time_ms = columns["ts_ms"]
+            if len(time_ms) < 2:
+                nodes[node] = columns
+                continue
+            cpu_names = [name for name in columns if name.startswith("cpu_")]
+            total = np.diff(np.sum([columns[name] for name in cpu_names], axis=0))
+            idle = np.diff(columns["cpu_idle"] + columns["cpu_iowait"])
+            seconds = np.diff(time_ms) / 1000.0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns["cpu_util"] = np.where(total > 0, 1.0 - idle / total, np.nan)
+                columns["net_rx_bps"] = np.diff(columns["net_rx_bytes"]) / seconds
+                columns["net_tx_bps"] = np.diff(columns["net_tx_bytes"]) / seconds
+            columns["rate_time_ms"] = time_ms[1:]
+            columns["mem_used_kb"] = columns["mem_MemTotal"] - columns["mem_MemAvailable"]
+            nodes[node] = columns
+        return nodes
+
+def load_job_result(job_dir, interval):
+    """
+    载入记录作业本身状态与运行时间的解析结果（增量模式）：优先 sacct，
+    没有 sacct 采样（记账存储关闭）时改用 scontrol show job。都没有采样时返回 None
+    """
+    for cmd_name in JOB_COLUMNS:
+        result = Result(cmd_name=cmd_name, out_dir=job_dir, interval=interval, incremental=True)
+        if result.row_count:
+            if cmd_name != "sacct":
+                logger.warning(f"{job_dir} 中没有 sacct 采样（记账存储可能已关闭），作业状态与运行时间改用 {cmd_name} 的数据")
+            return result
+    return None
+
 
 def get_platform_config():
     """
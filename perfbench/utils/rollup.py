@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长作业监控数据的分层聚合与保留策略。
+
+原始采样只在时序存储中保留最近 raw_retention 秒；更早的 sacct/sstat 数值列先汇总为两级聚合：
+    rollup_1m.csv   1 分钟桶（默认保留 7 天）
+    rollup_10m.csv  10 分钟桶（永久保留）
+每行为 (命令, 桶起点, 桶内最后一次采样时间, JobID, 是否汇总行, 字段名, 有效样本数, min, max, mean, last)，
+分类列（State 等）的 last 为状态编码。sinfo/scontrol 为集群级或配置类快照，不做聚合，超出保留窗口后直接丢弃。
+
+聚合在监控进程中增量进行（RollupEngine.update 只处理上次之后完整结束的桶），进度与各聚合文件的有效长度记录在
+rollup_state.json 中：进程中途被杀时，重启后先把聚合文件截断到有效长度再继续，不会产生重复行。
+原始记录只有在两级聚合都已覆盖之后才会被压缩掉（SegmentWriter.compact）。
+
+Result.get_column/get_step_series 会按请求的时间范围自动拼接：保留窗口内用原始采样，之前用 1 分钟聚合，
+再之前用 10 分钟聚合。
+
+用法：
+    python -m perfbench.utils.rollup build /path/to/job_dir [--raw-retention 秒]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from perfbench.utils import slurm_types
+from perfbench.utils.archive import read_job_file
+from perfbench.utils.sample_store import SegmentReader, SegmentWriter, has_store
+
+# 聚合层级：(名称, 桶宽毫秒)，由细到粗
+TIERS = (("1m", 60000), ("10m", 600000))
+TIER_WIDTHS = dict(TIERS)
+# 各层级的保留时长（毫秒），None 表示永久保留
+TIER_RETENTION = {"1m": 7 * 86400 * 1000, "10m": None}
+
+ROLLUP_COMMANDS = ("sacct", "sstat")
+ROLLUP_FIELDS = ("cmd", "bucket_ms", "last_ms", "job_id", "summary", "column", "count", "min", "max", "mean", "last")
+AGGREGATES = ("min", "max", "mean", "last")
+
+STATE_FILE = "rollup_state.json"
+STATE_VERSION = 1
+
+# 原始采样至少保留一个最粗的桶宽，保证压缩前两级聚合都已覆盖
+MIN_RAW_RETENTION = max(TIER_WIDTHS.values()) / 1000.0
+# 两次聚合之间的最小间隔（秒）
+ROLLUP_PERIOD = 60.0
+
+
+def rollup_path(job_dir, tier):
+    return os.path.join(job_dir, f"rollup_{tier}.csv")
+
+
+def has_rollups(job_dir):
+    return any(os.path.exists(rollup_path(job_dir, tier)) for tier, _ in TIERS)
+
+
+def parse_samples(cmd_name, samples):
+    """
+    解析一段时间内的采样 [(ts_ms, 输出文本), ...]，返回 (time_ms, JobID 列表, 是否汇总行, {字段: 数值数组})；
+    只保留 slurm_types.COLUMN_CONVERTERS 中有转换规则的列。没有数据时返回 None
+    """
+    # 解析函数在 result_handler 中，延迟导入以避免循环依赖
+    from perfbench.utils.result_handler import TABLE_PARSERS
+
+    parser = TABLE_PARSERS[cmd_name]
+    time_ms, job_ids, summary = [], [], []
+    columns = {}
+    n = 0
+    for ts_ms, text in samples:
+        headers, rows = parser(text)
+        if not rows or "JobID" not in headers:
+            continue
+        job_idx = headers.index("JobID")
+        for i, name in enumerate(headers):
+            if name not in slurm_types.COLUMN_CONVERTERS:
+                continue
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [""] * n
+            column.extend(row[i].strip() if i < len(row) else "" for row in rows)
+        n += len(rows)
+        for column in columns.values():
+            if len(column) < n:
+                column.extend([""] * (n - len(column)))
+        time_ms.extend([ts_ms] * len(rows))
+        job_ids.extend(row[job_idx].strip() if job_idx < len(row) else "" for row in rows)
+        # 与 Result 一致：sacct 只有第一行（作业本身）是汇总行
+        summary.extend(i == 0 or cmd_name != "sacct" for i in range(len(rows)))
+    if not n:
+        return None
+    columns = {name: np.asarray(slurm_types.convert_column(name, values), dtype=np.float64)
+               for name, values in columns.items()}
+    return np.asarray(time_ms, dtype=np.int64), job_ids, summary, columns
+
+
+def slice_parsed(parsed, start_ms, end_ms):
+    """
+    从 parse_samples 的结果中取出 [start_ms, end_ms) 范围内的行（行按时间有序）
+    """
+    if parsed is None:
+        return None
+    time_ms, job_ids, summary, columns = parsed
+    lo, hi = np.searchsorted(time_ms, [start_ms, end_ms], side='left')
+    if lo == hi:
+        return None
+    return time_ms[lo:hi], job_ids[lo:hi], summary[lo:hi], {name: values[lo:hi] for name, values in columns.items()}
+
+
+def aggregate(parsed, cmd_name, width):
+    """
+    把 parse_samples 的结果按 (桶, JobID, 是否汇总行, 字段) 聚合，返回 ROLLUP_FIELDS 顺序的行列表。
+    NaN（缺失值）不参与统计
+    """
+    if parsed is None:
+        return []
+    time_ms, job_ids, summary, columns = parsed
+    n = len(time_ms)
+    buckets = time_ms // width * width
+    job_names, job_codes = np.unique(np.asarray(job_ids, dtype=str), return_inverse=True)
+    job_codes = job_codes.reshape(-1)
+    summary = np.asarray(summary, dtype=bool)
+    order = np.lexsort((time_ms, summary, job_codes, buckets))
+    keys = np.stack([buckets[order], job_codes[order], summary[order]], axis=1)
+    starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+    group_bucket = buckets[order][starts]
+    group_job = job_names[job_codes[order][starts]]
+    group_summary = summary[order][starts]
+    group_last_ms = np.maximum.reduceat(time_ms[order], starts)
+    position = np.arange(n)
+
+    rows = []
+    for name, values in columns.items():
+        values = values[order]
+        if name in slurm_types.COLUMN_CATEGORIES:
+            # 分类列的未知值编码为 0，不视为缺失
+            valid = np.ones(n, dtype=bool)
+        else:
+            valid = ~np.isnan(values)
+        count = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            low = np.fmin.reduceat(values, starts)
+            high = np.fmax.reduceat(values, starts)
+            mean = np.add.reduceat(np.where(valid, values, 0.0), starts) / count
+        last = values[np.maximum.reduceat(np.where(valid, position, 0), starts)]
+        for g in np.flatnonzero(count):
+            rows.append((cmd_name, int(group_bucket[g]), int(group_last_ms[g]), str(group_job[g]),
+                         int(group_summary[g]), name, int(count[g]),
+                         low[g].item(), high[g].item(), mean[g].item(), last[g].item()))
+    rows.sort(key=lambda row: (row[1], row[3], row[5]))
+    return rows
+
+
+def load_rollup(job_dir, tier, cmd_name=None):
+    """
+    载入 job_dir（目录或归档）中某一层级的聚合数据，返回 {字段: 数组}（按桶时间排序）；文件不存在时返回 None
+    """
+    data = read_job_file(job_dir, os.path.basename(rollup_path(job_dir, tier)))
+    if data is None:
+        return None
+    with io.StringIO(data.decode('utf-8', errors='replace'), newline='') as f:
+        records = [row for row in csv.reader(f)
+                   if len(row) == len(ROLLUP_FIELDS) and row[0] != "cmd" and (cmd_name is None or row[0] == cmd_name)]
+    columns = dict(zip(ROLLUP_FIELDS, zip(*records))) if records else {name: () for name in ROLLUP_FIELDS}
+    table = {
+        "cmd": np.asarray(columns["cmd"], dtype=str),
+        "bucket_ms": np.asarray(columns["bucket_ms"], dtype=np.int64),
+        "last_ms": np.asarray(columns["last_ms"], dtype=np.int64),
+        "job_id": np.asarray(columns["job_id"], dtype=str),
+        "summary": np.asarray(columns["summary"], dtype=np.int64).astype(bool),
+        "column": np.asarray(columns["column"], dtype=str),
+        "count": np.asarray(columns["count"], dtype=np.int64),
+    }
+    for name in AGGREGATES:
+        table[name] = np.asarray(columns[name], dtype=np.float64)
+    order = np.argsort(table["bucket_ms"], kind="stable")
+    return {name: values[order] for name, values in table.items()}
+
+
+class RollupEngine:
+    """
+    增量聚合 + 原始采样保留。由写入时序存储的监控进程周期性调用：
+        engine.update(now_ms)          聚合所有完整结束的桶
+        engine.expire(writer, now_ms)  压缩早于保留窗口（且已被聚合覆盖）的原始记录
+    raw_retention 为原始采样的保留时长（秒），None 表示只聚合、不丢弃原始采样
+    """
+
+    def __init__(self, job_dir, raw_retention=None):
+        self.job_dir = job_dir
+        if raw_retention is not None and raw_retention < MIN_RAW_RETENTION:
+            raw_retention = MIN_RAW_RETENTION
+        self.raw_retention = raw_retention
+        self.state = self.load_state()
+
+    def state_path(self):
+        return os.path.join(self.job_dir, STATE_FILE)
+
+    def load_state(self):
+        try:
+            with open(self.state_path(), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if not state or state.get("version") != STATE_VERSION:
+            state = {"version": STATE_VERSION, "rolled_until": {}, "sizes": {}}
+        # 截掉上次写入后、状态保存前被中断的部分
+        for tier, _ in TIERS:
+            path = rollup_path(self.job_dir, tier)
+            size = state["sizes"].get(tier, 0)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        return state
+
+    def save_state(self):
+        path = self.state_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, path)
+
+    def rolled_until(self):
+        """
+        所有层级都已聚合到的时间（毫秒），尚未聚合过时返回 None
+        """
+        values = [self.state["rolled_until"].get(tier) for tier, _ in TIERS]
+        return None if None in values else min(values)
+
+    def update(self, now_ms=None):
+        """
+        聚合 [上次进度, 当前时间所在桶的起点) 内的采样，返回新写入的聚合行数
+        """
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        written = 0
+        with SegmentReader(self.job_dir) as reader:
+            first_ms = reader.first_ts_ms()
+            if first_ms is None:
+                return 0
+            ranges = {}
+            for tier, width in TIERS:
+                start = self.state["rolled_until"].get(tier)
+                if start is None:
+                    start = first_ms // width * width
+                end = now_ms // width * width
+                if end > start:
+                    ranges[tier] = (start, end)
+            if not ranges:
+                return 0
+            # 各层级的待聚合范围相互重叠，只解析一次
+            lo = min(start for start, _ in ranges.values())
+            hi = max(end for _, end in ranges.values())
+            parsed = {cmd_name: parse_samples(cmd_name, reader.iter_samples(cmd_name, lo, hi))
+                      for cmd_name in ROLLUP_COMMANDS}
+        for tier, width in TIERS:
+            if tier not in ranges:
+                continue
+            start, end = ranges[tier]
+            rows = []
+            for cmd_name in ROLLUP_COMMANDS:
+                rows.extend(aggregate(slice_parsed(parsed[cmd_name], start, end), cmd_name, width))
+            path = rollup_path(self.job_dir, tier)
+            new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                out = csv.writer(f)
+                if new_file:
+                    out.writerow(ROLLUP_FIELDS)
+                out.writerows(rows)
+            self.state["rolled_until"][tier] = end
+            self.state["sizes"][tier] = os.path.getsize(path)
+            written += len(rows)
+        self.expire_tiers(now_ms)
+        self.save_state()
+        return written
+
+    def expire_tiers(self, now_ms):
+        """
+        丢弃超过层级保留时长的聚合行（重写文件）
+        """
+        for tier, width in TIERS:
+            retention = TIER_RETENTION.get(tier)
+            path = rollup_path(self.job_dir, tier)
+            if retention is None or not os.path.exists(path):
+                continue
+            cutoff = (now_ms - retention) // width * width
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                first = next(reader, None)
+                if first is None or int(first[1]) >= cutoff:
+                    continue
+                kept = [row for row in reader if int(row[1]) >= cutoff]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                out = csv.writer(f)
+                out.writerow(header)
+                out.writerows(kept)
+            os.replace(tmp_path, path)
+            self.state["sizes"][tier] = os.path.getsize(path)
+
+    def expire(self, writer, now_ms=None):
+        """
+        压缩早于保留窗口的原始记录，返回丢弃的记录条数。
+        截止时间对齐到最粗的桶宽，且不超过两级聚合的进度；可丢弃部分不足保留时长的 1/4 时暂不压缩，避免频繁重写。
+        """
+        if self.raw_retention is None:
+            return 0
+        rolled = self.rolled_until()
+        if rolled is None:
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        coarse = max(TIER_WIDTHS.values())
+        cutoff = min(now_ms - int(self.raw_retention * 1000), rolled) // coarse * coarse
+        with SegmentReader(self.job_dir) as reader:
+            first_ms = reader.first_ts_ms()
+        if first_ms is None or cutoff - first_ms < max(self.raw_retention * 1000 / 4, coarse):
+            return 0
+        return writer.compact(cutoff)
+
+
+def build(job_dir, raw_retention=None):
+    """
+    离线为已有的 job_dir 生成聚合（可选地压缩原始记录），返回 (聚合行数, 丢弃的记录条数)
+    """
+    engine = RollupEngine(job_dir, raw_retention)
+    written = engine.update()
+    dropped = 0
+    if raw_retention is not None:
+        with SegmentWriter(job_dir) as writer:
+            dropped = engine.expire(writer)
+    return written, dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 分层聚合与原始采样保留')
+    sub = parser.add_subparsers(dest='action')
+    p_build = sub.add_parser('build', help='为已有的作业输出目录生成 1 分钟/10 分钟聚合')
+    p_build.add_argument('job_dir', help='作业输出目录')
+    p_build.add_argument('--raw-retention', type=float, default=None,
+                         help='原始采样保留时长（秒），更早的记录在聚合后被丢弃；默认不丢弃')
+    args = parser.parse_args(argv)
+
+    if args.action == 'build':
+        if not has_store(args.job_dir):
+            sys.stderr.write(f"{args.job_dir} 中没有时序存储\n")
+            return 1
+        written, dropped = build(args.job_dir, args.raw_retention)
+        print(f"已写入 {written} 行聚合，丢弃 {dropped} 条原始记录")
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每个作业一个的追加写时序存储，取代“每个命令每个节拍一个 log 文件”的布局。
+
+job_dir 下只有两个文件：
+    samples.seg  段文件：文件头 + 连续的采样记录（记录头 + 命令输出，较大的输出用 zlib 压缩）
+    samples.idx  侧边时间戳索引：文件头 + 定长索引项，按追加顺序（即时间顺序）排列
+
+记录头 (RECORD_HEADER, 16 字节)：
+    int64  ts_ms       采样时间（Unix 毫秒）
+    uint8  cmd_id      命令编号，见 CMD_IDS
+    uint8  flags       FLAG_ZLIB 表示负载经过 zlib 压缩
+    uint16 reserved
+    uint32 length      负载字节数
+索引项 (INDEX_ENTRY, 24 字节)：
+    int64  ts_ms / uint64 offset（记录头在段文件中的偏移）/ uint8 cmd_id / 3 字节填充 / uint32 length
+
+写入顺序为先段文件、后索引；监控进程中途被杀时，索引最多落后段文件若干条记录，
+可用 rebuild_index() 从段文件重建。读取端基于 mmap，按索引二分查找时间范围，不做 glob。
+
+长作业可以在写入端调用 SegmentWriter.compact() 丢弃早于保留窗口的记录（旧数据先由 perfbench.utils.rollup
+汇总为分钟级聚合）。压缩后的索引使用 v2 文件头，额外记录已丢弃的记录条数（base）与丢弃截止时间：
+索引项的“逻辑下标”= base + 文件中的下标，压缩前后保持不变，Result 检查点中保存的消费位置依然有效。
+压缩时持有 samples.lock 的排他锁替换两个文件，读取端在 mmap 两个文件期间持有共享锁，不会看到新旧混杂的快照。
+
+用法：
+    python -m perfbench.utils.sample_store import /path/to/job_dir [--remove]
+"""
+
+import argparse
+import glob
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+from perfbench.utils.snapshot_cache import file_lock
+
+SEGMENT_FILE = "samples.seg"
+INDEX_FILE = "samples.idx"
+LOCK_FILE = "samples.lock"
+
+SEGMENT_MAGIC = b"PBSEG\x00\x01\x00"
+INDEX_MAGIC = b"PBIDX\x00\x01\x00"
+# 压缩过的索引：magic 之后是 INDEX_BASE（已丢弃的记录条数、丢弃截止时间）
+INDEX_MAGIC_V2 = b"PBIDX\x00\x02\x00"
+INDEX_BASE = struct.Struct("<Qq")
+
+RECORD_HEADER = struct.Struct("<qBBHI")
+INDEX_ENTRY = struct.Struct("<qQB3xI")
+
+FLAG_ZLIB = 0x01
+# 小于该长度的输出不压缩（压缩收益不足以抵消开销）
+COMPRESS_MIN_BYTES = 128
+
+# 命令编号一经写入文件即不可更改，新增命令只能追加
+CMD_IDS = {
+    "sacct": 1,
+    "sinfo": 2,
+    "sstat": 3,
+    "scontrol": 4,
+    "seff": 5,
+    "squeue": 6,
+    "job_end": 7,
+}
+CMD_NAMES = {v: k for k, v in CMD_IDS.items()}
+
+
+def has_store(job_dir):
+    """
+    job_dir 中是否存在时序存储
+    """
+    return os.path.exists(os.path.join(job_dir, INDEX_FILE))
+
+
+def ts_ms_to_str(ts_ms):
+    """
+    Unix 毫秒 -> YYYYMMDD_HHMMSS_mmm（本地时间，与监控日志文件名中的时间戳一致）
+    """
+    dt = datetime.fromtimestamp(ts_ms / 1000.0)
+    return f"{dt.strftime('%Y%m%d_%H%M%S')}_{int(ts_ms) % 1000:03d}"
+
+
+def str_to_ts_ms(time_stamp):
+    """
+    YYYYMMDD_HHMMSS 或 YYYYMMDD_HHMMSS_mmm -> Unix 毫秒
+    """
+    base, _, millis = time_stamp[:15], time_stamp[15:16], time_stamp[16:]
+    seconds = time.mktime(datetime.strptime(base, "%Y%m%d_%H%M%S").timetuple())
+    return int(seconds) * 1000 + (int(millis) if millis else 0)
+
+
+class SegmentWriter:
+    """
+    段文件的追加写入器（同一 job_dir 只允许一个写入者，即监控进程）
+    """
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        os.makedirs(job_dir, exist_ok=True)
+        self.open()
+
+    def open(self):
+        # 锁文件先于数据文件存在，读取端据此决定是否需要加锁
+        open(os.path.join(self.job_dir, LOCK_FILE), "a").close()
+        self.seg = open(os.path.join(self.job_dir, SEGMENT_FILE), "ab")
+        self.idx = open(os.path.join(self.job_dir, INDEX_FILE), "ab")
+        if self.seg.tell() == 0:
+            self.seg.write(SEGMENT_MAGIC)
+        if self.idx.tell() == 0:
+            self.idx.write(INDEX_MAGIC)
+
+    def append(self, cmd_name, ts_ms, text):
+        """
+        追加一条采样记录，返回记录在段文件中的偏移
+        """
+        cmd_id = CMD_IDS[cmd_name]
+        payload = text.encode("utf-8") if isinstance(text, str) else bytes(text)
+        flags = 0
+        if len(payload) >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(payload, 1)
+            if len(packed) < len(payload):
+                payload, flags = packed, FLAG_ZLIB
+
+        offset = self.seg.tell()
+        self.seg.write(RECORD_HEADER.pack(int(ts_ms), cmd_id, flags, 0, len(payload)))
+        self.seg.write(payload)
+        # 先保证记录落盘，再写索引，索引永远不会指向不完整的记录
+        self.seg.flush()
+        self.idx.write(INDEX_ENTRY.pack(int(ts_ms), offset, cmd_id, len(payload)))
+        self.idx.flush()
+        return offset
+
+    def compact(self, before_ms):
+        """
+        丢弃 ts < before_ms 的记录（压缩期间暂停写入），返回丢弃的记录条数
+        """
+        self.close()
+        try:
+            return compact_store(self.job_dir, before_ms)
+        finally:
+            self.open()
+
+    def close(self):
+        self.seg.close()
+        self.idx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_index_header(data):
+    """
+    解析索引文件头，返回 (文件头长度, base, 丢弃截止时间)；data 为文件开头的字节
+    """
+    magic = bytes(data[:len(INDEX_MAGIC)])
+    if magic == INDEX_MAGIC:
+        return len(INDEX_MAGIC), 0, None
+    if magic == INDEX_MAGIC_V2 and len(data) >= len(INDEX_MAGIC_V2) + INDEX_BASE.size:
+        base, dropped_until = INDEX_BASE.unpack_from(data, len(INDEX_MAGIC_V2))
+        return len(INDEX_MAGIC_V2) + INDEX_BASE.size, base, dropped_until
+    return None
+
+
+def _map_file(path):
+    """
+    只读 mmap 一个文件；空文件无法 mmap，返回 None
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SegmentReader:
+    """
+    基于 mmap 的只读访问。打开时对两个文件做快照，之后追加的记录需要重新打开才能看到。
+
+    entry()/bisect() 使用文件中的下标；entries() 与 len() 使用逻辑下标（含压缩时丢弃的记录，见模块说明）。
+    lock=False 供已持有排他锁的压缩过程使用。
+    """
+
+    def __init__(self, job_dir, lock=True):
+        self.job_dir = job_dir
+        if lock and os.path.exists(os.path.join(job_dir, LOCK_FILE)):
+            with file_lock(os.path.join(job_dir, LOCK_FILE), shared=True):
+                seg = _map_file(os.path.join(job_dir, SEGMENT_FILE))
+                idx = _map_file(os.path.join(job_dir, INDEX_FILE))
+        else:
+            seg = _map_file(os.path.join(job_dir, SEGMENT_FILE))
+            idx = _map_file(os.path.join(job_dir, INDEX_FILE))
+        self.attach(seg, idx)
+
+    @classmethod
+    def from_buffers(cls, seg, idx, name):
+        """
+        直接在内存缓冲区（如归档文件 mmap 的切片，见 perfbench.utils.archive）上构造只读访问，name 只用于报错信息
+        """
+        reader = cls.__new__(cls)
+        reader.job_dir = name
+        reader.attach(seg, idx)
+        return reader
+
+    def attach(self, seg, idx):
+        self.seg, self.idx = seg, idx
+        if self.seg is not None and self.seg[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError(f"无效的段文件: {os.path.join(self.job_dir, SEGMENT_FILE)}")
+        header = read_index_header(self.idx) if self.idx is not None else (len(INDEX_MAGIC), 0, None)
+        if header is None:
+            raise ValueError(f"无效的索引文件: {os.path.join(self.job_dir, INDEX_FILE)}")
+        self.header_size, self.base, self.dropped_until_ms = header
+        seg_size = len(self.seg) if self.seg is not None else 0
+        idx_size = len(self.idx) if self.idx is not None else self.header_size
+        count = (idx_size - self.header_size) // INDEX_ENTRY.size
+        # 丢弃指向段文件之外的索引项（写入中途的快照）
+        while count > 0:
+            _, offset, _, length = self.entry(count - 1)
+            if offset + RECORD_HEADER.size + length <= seg_size:
+                break
+            count -= 1
+        self.count = count
+
+    def __len__(self):
+        # 逻辑长度：包含压缩时丢弃的记录
+        return self.base + self.count
+
+    def entry(self, i):
+        """
+        返回文件中第 i 个索引项 (ts_ms, offset, cmd_id, length)
+        """
+        return INDEX_ENTRY.unpack_from(self.idx, self.header_size + i * INDEX_ENTRY.size)
+
+    def bisect(self, ts_ms, start=0):
+        """
+        返回第一个 ts >= ts_ms 的索引项下标
+        """
+        lo, hi = start, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry(mid)[0] < ts_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def entries(self, cmd_name=None, start_ms=None, end_ms=None, start_index=0):
+        """
+        按时间顺序遍历索引项，返回 (逻辑下标, ts_ms, offset, cmd_id, length)
+        start_ms/end_ms 为左闭右开的时间范围，start_index 为逻辑下标（早于 base 的部分已被丢弃）
+        """
+        cmd_id = CMD_IDS[cmd_name] if cmd_name else None
+        start = max(start_index - self.base, 0)
+        i = self.bisect(start_ms, start) if start_ms is not None else start
+        while i < self.count:
+            ts_ms, offset, entry_cmd, length = self.entry(i)
+            if end_ms is not None and ts_ms >= end_ms:
+                break
+            if cmd_id is None or entry_cmd == cmd_id:
+                yield self.base + i, ts_ms, offset, entry_cmd, length
+            i += 1
+
+    def first_ts_ms(self):
+        """
+        最早一条记录的时间，没有记录时返回 None
+        """
+        return self.entry(0)[0] if self.count else None
+
+    def read(self, offset):
+        """
+        读取 offset 处的一条记录，返回 (ts_ms, 命令名, 文本)
+        """
+        ts_ms, cmd_id, flags, _, length = RECORD_HEADER.unpack_from(self.seg, offset)
+        start = offset + RECORD_HEADER.size
+        payload = self.seg[start:start + length]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        elif not isinstance(payload, bytes):
+            payload = bytes(payload)
+        return ts_ms, CMD_NAMES.get(cmd_id), payload.decode("utf-8", errors="replace")
+
+    def iter_samples(self, cmd_name, start_ms=None, end_ms=None):
+        """
+        按时间顺序返回某个命令的 (ts_ms, 输出文本)
+        """
+        for _, ts_ms, offset, _, _ in self.entries(cmd_name, start_ms, end_ms):
+            yield ts_ms, self.read(offset)[2]
+
+    def close(self):
+        for m in (self.seg, self.idx):
+            if isinstance(m, memoryview):
+                m.release()
+            elif m is not None:
+                m.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_index(path, entries, base=0, dropped_until_ms=None):
+    """
+    写入完整的索引文件；base 不为 0 时使用 v2 文件头
+    """
+    with open(path, "wb") as f:
+        if base:
+            f.write(INDEX_MAGIC_V2)
+            f.write(INDEX_BASE.pack(base, int(dropped_until_ms or 0)))
+        else:
+            f.write(INDEX_MAGIC)
+        f.write(b"".join(entries))
+
+
+def compact_store(job_dir, before_ms, chunk_bytes=16 << 20):
+    """
+    丢弃 ts < before_ms 的全部记录（索引是时间有序的，被丢弃的总是一个前缀）：
+    把其余记录复制到新的段文件与索引中，再在排他锁下依次替换。返回丢弃的记录条数。
+    调用方须保证压缩期间没有写入者（见 SegmentWriter.compact）。
+    """
+    seg_path = os.path.join(job_dir, SEGMENT_FILE)
+    idx_path = os.path.join(job_dir, INDEX_FILE)
+    with file_lock(os.path.join(job_dir, LOCK_FILE)):
+        with SegmentReader(job_dir, lock=False) as reader:
+            drop = reader.bisect(before_ms)
+            if drop == 0:
+                return 0
+            entries = [reader.entry(i) for i in range(drop, reader.count)]
+            start = entries[0][1] if entries else len(reader.seg)
+            end = entries[-1][1] + RECORD_HEADER.size + entries[-1][3] if entries else start
+            shift = start - len(SEGMENT_MAGIC)
+            with open(seg_path + ".tmp", "wb") as f:
+                f.write(SEGMENT_MAGIC)
+                for pos in range(start, end, chunk_bytes):
+                    f.write(reader.seg[pos:min(pos + chunk_bytes, end)])
+            dropped_until = max(before_ms, reader.dropped_until_ms or 0)
+            write_index(idx_path + ".tmp",
+                        [INDEX_ENTRY.pack(ts_ms, offset - shift, cmd_id, length)
+                         for ts_ms, offset, cmd_id, length in entries],
+                        base=reader.base + drop, dropped_until_ms=dropped_until)
+        # 两个文件在同一把锁内替换，读取端不会拿到新段文件配旧索引
+        os.replace(seg_path + ".tmp", seg_path)
+        os.replace(idx_path + ".tmp", idx_path)
+    return drop
+
+
+def rebuild_index(job_dir):
+    """
+    扫描段文件重建索引（监控进程异常退出后使用），截断末尾不完整的记录，返回记录条数。
+    压缩过的存储保留原索引文件头中的 base。
+    """
+    seg_path = os.path.join(job_dir, SEGMENT_FILE)
+    idx_path = os.path.join(job_dir, INDEX_FILE)
+    base, dropped_until = 0, None
+    try:
+        with open(idx_path, "rb") as f:
+            header = read_index_header(f.read(len(INDEX_MAGIC_V2) + INDEX_BASE.size))
+        if header is not None:
+            _, base, dropped_until = header
+    except OSError:
+        pass
+    entries = []
+    with open(seg_path, "r+b") as f:
+        data = f.read()
+        if data[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            raise ValueError(f"无效的段文件: {seg_path}")
+        offset = len(SEGMENT_MAGIC)
+        while offset + RECORD_HEADER.size <= len(data):
+            ts_ms, cmd_id, _, _, length = RECORD_HEADER.unpack_from(data, offset)
+            if offset + RECORD_HEADER.size + length > len(data):
+                break
+            entries.append(INDEX_ENTRY.pack(ts_ms, offset, cmd_id, length))
+            offset += RECORD_HEADER.size + length
+        f.truncate(offset)
+    write_index(idx_path, entries, base=base, dropped_until_ms=dropped_until)
+    return len(entries)
+
+
+def import_log_dir(job_dir, remove=False, target_dir=None):
+    """
+    把旧布局中按节拍落盘的 <cmd>_<ts>.log 文件导入时序存储。
+
+    remove=True 时导入后删除原文件（job_end_*.log 作为作业结束标记保留）。
+    target_dir 不为 None 时写入该目录中的时序存储（打包归档时使用），默认写入 job_dir。
+    返回导入的记录数。
+    """
+    samples = []
+    for cmd_name in CMD_IDS:
+        for path in glob.glob(os.path.join(job_dir, f"{cmd_name}_*.log")):
+            time_stamp = os.path.basename(path)[len(cmd_name) + 1:-4]
+            try:
+                ts_ms = str_to_ts_ms(time_stamp)
+            except ValueError:
+                continue
+            samples.append((ts_ms, CMD_IDS[cmd_name], cmd_name, path))
+    # 同一时间戳内按命令编号排序，保证导入结果可复现
+    samples.sort()
+
+    with SegmentWriter(target_dir or job_dir) as writer:
+        for ts_ms, _, cmd_name, path in samples:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                writer.append(cmd_name, ts_ms, f.read())
+
+    if remove:
+        for _, _, cmd_name, path in samples:
+            if cmd_name != "job_end":
+                os.remove(path)
+    return len(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 时序存储工具')
+    sub = parser.add_subparsers(dest='action')
+    p_import = sub.add_parser('import', help='把按节拍落盘的 log 文件导入时序存储')
+    p_import.add_argument('job_dir', help='作业输出目录')
+    p_import.add_argument('--remove', action='store_true', help='导入后删除原 log 文件')
+    p_rebuild = sub.add_parser('rebuild-index', help='从段文件重建时间戳索引')
+    p_rebuild.add_argument('job_dir', help='作业输出目录')
+    args = parser.parse_args(argv)
+
+    if args.action == 'import':
+        if has_store(args.job_dir):
+            sys.stderr.write(f"{args.job_dir} 中已存在时序存储，拒绝重复导入\n")
+            return 1
+        count = import_log_dir(args.job_dir, remove=args.remove)
+        print(f"已导入 {count} 条记录到 {os.path.join(args.job_dir, SEGMENT_FILE)}")
+    elif args.action == 'rebuild-index':
+        count = rebuild_index(args.job_dir)
+        print(f"已重建索引，共 {count} 条记录")
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
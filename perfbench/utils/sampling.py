@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录节点监控的采样间隔策略与采样时间线。
+
+- FixedInterval:    固定使用 -t 指定的间隔
+- AdaptiveInterval: 作业排队或指标平稳时指数退避，状态变化、作业步增减或指标大幅变化时收紧到下限
+- SamplingTimeline: 每个节拍实际采用的间隔写入 job_dir/sampling_timeline.csv，报告据此得知真实采样周期
+"""
+
+import csv
+import io
+import os
+
+from perfbench.utils.archive import read_job_file
+
+TIMELINE_FILE = "sampling_timeline.csv"
+TIMELINE_FIELDS = ("ts_ms", "interval_s", "state", "reason")
+
+# 自适应模式默认的间隔上限（秒）
+DEFAULT_MAX_INTERVAL = 300.0
+
+
+class FixedInterval:
+    """
+    固定间隔策略
+    """
+
+    def __init__(self, interval):
+        self.current = float(interval)
+        self.floor = self.ceiling = self.current
+
+    def update(self, now, state, step_count=0, rss_bytes=0.0, cpu_seconds=0.0):
+        return self.current, "fixed"
+
+
+class AdaptiveInterval:
+    """
+    自适应间隔策略
+
+    floor:   间隔下限，状态变化或指标突变时收紧到该值（默认即用户的 -t）
+    ceiling: 间隔上限
+    factor:  退避倍数
+    flat_threshold:  指标相对变化低于该值视为平稳，继续退避
+    burst_threshold: 指标相对变化高于该值视为突变，收紧到下限
+    """
+
+    def __init__(self, floor, ceiling=DEFAULT_MAX_INTERVAL, factor=2.0,
+                 flat_threshold=0.01, burst_threshold=0.2):
+        self.floor = float(floor)
+        self.ceiling = max(float(ceiling), self.floor)
+        self.factor = float(factor)
+        self.flat_threshold = flat_threshold
+        self.burst_threshold = burst_threshold
+        self.current = self.floor
+        self.prev_state = None
+        self.prev_steps = None
+        self.prev_rss = None
+        self.prev_cpu = None
+        self.prev_time = None
+        self.prev_cpu_rate = None
+
+    @staticmethod
+    def relative_change(new, old):
+        if old is None or new is None:
+            return 0.0
+        scale = max(abs(old), abs(new))
+        return abs(new - old) / scale if scale > 0 else 0.0
+
+    def backoff(self):
+        self.current = min(self.current * self.factor, self.ceiling)
+
+    def tighten(self):
+        self.current = self.floor
+
+    def update(self, now, state, step_count=0, rss_bytes=0.0, cpu_seconds=0.0):
+        """
+        根据本节拍观测到的作业状态与指标计算下一个间隔，返回 (间隔秒数, 原因)
+
+        now:         单调时钟时间（秒）
+        state:       sacct 中作业本身的状态
+        step_count:  sacct 中的记录数（作业步出现/消失视为状态变化）
+        rss_bytes:   sstat 中全部作业步 MaxRSS 之和
+        cpu_seconds: sstat 中全部作业步累计 CPU 时间之和（换算为 CPU 使用速率后比较）
+        """
+        base_state = state.split()[0] if state else None
+        cpu_rate = None
+        if self.prev_cpu is not None and self.prev_time is not None and now > self.prev_time:
+            cpu_rate = max(cpu_seconds - self.prev_cpu, 0.0) / (now - self.prev_time)
+
+        if base_state != self.prev_state:
+            self.tighten()
+            reason = "state"
+        elif step_count != self.prev_steps:
+            self.tighten()
+            reason = "steps"
+        elif base_state == "PENDING":
+            self.backoff()
+            reason = "pending"
+        else:
+            delta = max(self.relative_change(rss_bytes, self.prev_rss),
+                        self.relative_change(cpu_rate, self.prev_cpu_rate))
+            if delta >= self.burst_threshold:
+                self.tighten()
+                reason = "delta"
+            elif delta <= self.flat_threshold:
+                self.backoff()
+                reason = "flat"
+            else:
+                reason = "steady"
+
+        self.prev_state = base_state
+        self.prev_steps = step_count
+        self.prev_rss = rss_bytes
+        self.prev_cpu = cpu_seconds
+        self.prev_time = now
+        if cpu_rate is not None:
+            self.prev_cpu_rate = cpu_rate
+        return self.current, reason
+
+
+class SamplingTimeline:
+    """
+    追加写入采样时间线（每个节拍一行）
+    """
+
+    def __init__(self, output_dir):
+        path = os.path.join(output_dir, TIMELINE_FILE)
+        is_new = not os.path.exists(path)
+        self.file = open(path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(TIMELINE_FIELDS)
+            self.file.flush()
+
+    def record(self, ts_ms, interval, state, reason):
+        self.writer.writerow((int(ts_ms), f"{interval:.3f}", state or "", reason))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def load_sampling_timeline(output_dir):
+    """
+    读取 job_dir（目录或归档）中的采样时间线，返回行字典列表；文件不存在时返回空列表
+    """
+    data = read_job_file(output_dir, TIMELINE_FILE)
+    if data is None:
+        return []
+    timeline = []
+    with io.StringIO(data.decode('utf-8', errors='replace'), newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                timeline.append({
+                    "ts_ms": int(row["ts_ms"]),
+                    "interval_s": float(row["interval_s"]),
+                    "state": row["state"],
+                    "reason": row["reason"],
+                })
+            except (KeyError, TypeError, ValueError):
+                continue
+    return timeline
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+调度器后端接口。
+
+PerfBench 对调度器的全部访问（提交、作业状态、记账、作业步统计、节点列表等）都经过 SchedulerBackend：
+- SlurmBackend（默认）：执行 sbatch/sacct/sstat/sinfo/scontrol/squeue/seff 子进程；
+- SimulatedSlurm（perfbench.utils.slurm_sim）：进程内的确定性离散事件模拟器，用于无集群时的大规模负载测试。
+
+查询类方法返回 (returncode, 输出文本)，输出与对应 SLURM 命令的文本格式一致，下游解析代码无需区分后端；
+in_process 为 False 的后端还提供 probe_argv()，异步监控引擎据此以子进程并发执行各探针。
+capabilities() 返回集群能力（见 perfbench.utils.capabilities），SlurmBackend 据此选择查询方式。
+
+进程内使用的后端由 set_backend() 设置，get_backend() 默认返回 SlurmBackend。
+"""
+
+import getpass
+import os
+import re
+import shutil
+import subprocess
+from perfbench.utils.snapshot_cache import run_command
+from perfbench.utils.capabilities import UNKNOWN, load_capabilities, sacct_format, supported
+
+# sacct 不加 -X，一次调用即可列出 作业 -> 数组任务/异构分量 -> 作业步 的全部记录；
+# JobIDRaw 用于把数组任务映射到 sstat 可识别的原始作业号
+SACCT_FORMAT = "JobID,JobIDRaw,JobName%20,State,Elapsed,TotalCPU,MaxRSS,AllocCPUs,NNodes"
+# sstat --allsteps：一次调用返回所有正在运行的作业步
+SSTAT_FORMAT = "JobID,MaxRSS,AveRSS,MaxVMSize,AveCPU,NTasks"
+
+# 监控探针（与 SLURM 命令同名）
+PROBES = ("sacct", "sinfo", "sstat", "scontrol", "squeue", "seff")
+
+# 登录节点上必须可用的命令
+REQUIRED_COMMANDS = ("sinfo", "squeue", "sbatch", "scancel")
+
+JOBID_PATTERN = re.compile(r"Submitted batch job (\d+)")
+# sbatch --parsable 的输出：jobid[;cluster]
+PARSABLE_JOBID_PATTERN = re.compile(r"^(\d+)(?:;\S+)?$", re.MULTILINE)
+
+# sbatch 的暂时性错误（控制器繁忙、通信失败），可以重试
+TRANSIENT_ERRORS = re.compile(
+    r"Socket timed out|Unable to contact slurm controller|temporarily unable|Resource temporarily unavailable"
+    r"|Zero Bytes were transmitted|Connection refused|Connection reset|Communication connection failure"
+    r"|slurm_persist_conn|Transport endpoint",
+    re.IGNORECASE)
+# 达到提交数上限（MaxSubmitJobs），等队列中的作业减少后重试
+SUBMIT_LIMIT_ERRORS = re.compile(r"MaxSubmitJob|job submit limit", re.IGNORECASE)
+
+DEFAULT_QUERY_TIMEOUT = 30
+
+# sacct State 字段中表示作业已终止的状态
+TERMINAL_STATES = (
+    "COMPLETED",
+    "FAILED",
+    "CANCELLED",
+    "TIMEOUT",
+    "OUT_OF_MEMORY",
+    "NODE_FAIL",
+    "PREEMPTED",
+    "BOOT_FAIL",
+    "DEADLINE",
+)
+
+
+def parse_sacct_state(output):
+    """
+    从 sacct -P 输出中取第一条记录（作业本身）的 State 字段
+    """
+    lines = [line for line in output.splitlines() if line.strip()]
+    if len(lines) < 2:
+        return None
+    headers = [h.strip() for h in lines[0].split('|')]
+    if "State" not in headers:
+        return None
+    fields = lines[1].split('|')
+    idx = headers.index("State")
+    return fields[idx].strip() if idx < len(fields) else None
+
+
+def is_terminal_state(state):
+    if not state:
+        return False
+    return any(s in state for s in TERMINAL_STATES)
+
+
+class SubmitError(RuntimeError):
+    """
+    sbatch 提交失败；transient 表示是否为可重试的暂时性错误
+    """
+
+    def __init__(self, message, transient=False, limit=False):
+        super().__init__(message)
+        self.transient = transient
+        self.limit = limit
+
+
+class SchedulerBackend:
+    """
+    调度器后端的接口。子类实现提交与各项查询；probe() 把监控探针名映射到对应的查询
+    """
+
+    name = None
+    # True 表示查询在本进程内完成（无需子进程），监控引擎直接调用 probe()
+    in_process = False
+
+    def submit(self, script_path, timeout=60):
+        """
+        提交脚本，返回 jobid；失败时抛出 SubmitError
+        """
+        raise NotImplementedError
+
+    def job_state(self, jobid):
+        """
+        返回 (状态, 是否已结束)；查询失败时返回 (None, False)
+        """
+        raise NotImplementedError
+
+    def accounting(self, jobid, timeout=None):
+        """
+        作业、数组任务与全部作业步的记账信息（sacct -P，字段见 SACCT_FORMAT）
+        """
+        raise NotImplementedError
+
+    def step_stats(self, jobids, timeout=None):
+        """
+        正在运行的作业步的资源统计（sstat --allsteps -P，字段见 SSTAT_FORMAT）
+        """
+        raise NotImplementedError
+
+    def nodes(self, timeout=None):
+        """
+        集群节点列表（sinfo -N -o "%N %t %f"）
+        """
+        raise NotImplementedError
+
+    def job_info(self, jobid, timeout=None):
+        """
+        作业详情（scontrol show job 的 Key=Value 文本）
+        """
+        raise NotImplementedError
+
+    def queue(self, jobid, timeout=None):
+        """
+        作业在队列中的记录（squeue -j -h），离队后为空
+        """
+        raise NotImplementedError
+
+    def efficiency(self, jobid, timeout=None):
+        """
+        作业结束后的效率汇总（seff）
+        """
+        raise NotImplementedError
+
+    def queued_jobs(self, user=None):
+        """
+        用户在队列中（排队+运行）的作业数，查询失败时返回 None
+        """
+        raise NotImplementedError
+
+    def cancel(self, jobid):
+        """
+        取消作业，返回是否成功
+        """
+        raise NotImplementedError
+
+    def missing_commands(self):
+        """
+        后端依赖但当前不可用的命令，空列表表示可用
+        """
+        return []
+
+    def capabilities(self):
+        """
+        集群能力字典（见 perfbench.utils.capabilities），默认全部未知（按支持处理）
+        """
+        return UNKNOWN
+
+    def probe(self, name, jobid, sstat_targets=None, timeout=None):
+        """
+        执行一个监控探针，返回 (returncode, 输出文本)
+        """
+        jobid = str(jobid)
+        if name == "sacct":
+            return self.accounting(jobid, timeout)
+        if name == "sinfo":
+            return self.nodes(timeout)
+        if name == "sstat":
+            return self.step_stats(sstat_targets or [jobid], timeout)
+        if name == "scontrol":
+            return self.job_info(jobid, timeout)
+        if name == "squeue":
+            return self.queue(jobid, timeout)
+        if name == "seff":
+            return self.efficiency(jobid, timeout)
+        raise ValueError(f"未知的探针: {name}")
+
+
+class SlurmBackend(SchedulerBackend):
+    """
+    通过 SLURM 命令行工具访问真实集群
+    """
+
+    name = "slurm"
+
+    def __init__(self):
+        self.caps = None
+
+    def capabilities(self):
+        # 每个进程只读取一次（指纹不变时读缓存文件，不执行探测命令）
+        if self.caps is None:
+            self.caps = load_capabilities()
+        return self.caps
+
+    def probe_argv(self, name, jobid, sstat_targets=None):
+        """
+        探针对应的命令（argv 列表，不经过 shell）。
+        sstat_targets: 需要采集作业步统计的原始作业号列表，合并为一次 sstat 调用；为空时只查询 jobid 本身
+        """
+        jobid = str(jobid)
+        if name == "sacct":
+            return ["sacct", "-j", jobid, f"--format={sacct_format(self.capabilities(), SACCT_FORMAT)}", "-P"]
+        if name == "sinfo":
+            return ["sinfo", "-N", "-o", "%N %t %f"]
+        if name == "sstat":
+            sstat_jobs = ",".join(sstat_targets) if sstat_targets else jobid
+            allsteps = ["--allsteps"] if supported(self.capabilities(), "sstat_allsteps") else []
+            return ["sstat"] + allsteps + ["-j", sstat_jobs, f"--format={SSTAT_FORMAT}", "-P"]
+        if name == "scontrol":
+            return ["scontrol", "show", "job", jobid]
+        if name == "squeue":
+            return ["squeue", "-j", jobid, "-h"]
+        if name == "seff":
+            return ["seff", jobid]
+        raise ValueError(f"未知的探针: {name}")
+
+    def probe(self, name, jobid, sstat_targets=None, timeout=None):
+        return run_command(self.probe_argv(name, jobid, sstat_targets), timeout)
+
+    def accounting(self, jobid, timeout=None):
+        return self.probe("sacct", jobid, timeout=timeout)
+
+    def step_stats(self, jobids, timeout=None):
+        return self.probe("sstat", jobids[0], [str(j) for j in jobids], timeout)
+
+    def nodes(self, timeout=None):
+        return run_command(self.probe_argv("sinfo", None), timeout)
+
+    def job_info(self, jobid, timeout=None):
+        return self.probe("scontrol", jobid, timeout=timeout)
+
+    def queue(self, jobid, timeout=None):
+        return self.probe("squeue", jobid, timeout=timeout)
+
+    def efficiency(self, jobid, timeout=None):
+        return self.probe("seff", jobid, timeout=timeout)
+
+    def submit(self, script_path, timeout=60):
+        """
+        在脚本所在目录执行一次 sbatch（cwd=，不修改进程的工作目录，可在多个线程中并发）
+        """
+        script_path = os.path.abspath(script_path)
+        # --parsable 只输出 jobid[;cluster]，不依赖提示文本的格式
+        parsable = ['--parsable'] if supported(self.capabilities(), "sbatch_parsable") else []
+        try:
+            result = subprocess.run(
+                ['sbatch'] + parsable + [os.path.basename(script_path)],
+                cwd=os.path.dirname(script_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise SubmitError(f"sbatch 超时（{timeout}s）", transient=True)
+        except OSError as e:
+            raise SubmitError(f"无法执行 sbatch: {e}")
+
+        if result.returncode != 0:
+            stderr = result.stderr.strip()
+            raise SubmitError(f"sbatch提交失败: {stderr}",
+                              transient=bool(TRANSIENT_ERRORS.search(stderr)),
+                              limit=bool(SUBMIT_LIMIT_ERRORS.search(stderr)))
+        output = result.stdout.strip()
+        match = JOBID_PATTERN.search(output) or PARSABLE_JOBID_PATTERN.search(output)
+        if not match:
+            raise SubmitError(f"作业提交成功，但无法解析jobid（输出: {output}）")
+        return match.group(1)
+
+    def job_state(self, jobid):
+        """
+        先查 squeue（作业仍在队列中），再查 sacct 的最终状态。
+        只有 squeue 正常返回且作业已离队、或 sacct 报告终止状态时才视为结束；
+        squeue 失败（slurmctld 暂时不可用，或作业记录已被清除）时由 sacct 判断，sacct 也无法判断时返回 (None, False)
+        """
+        returncode, output = run_command(['squeue', '-j', str(jobid), '-h', '-o', '%T'], DEFAULT_QUERY_TIMEOUT,
+                                         stderr=False)
+        left_queue = returncode == 0 and not output.strip()
+        if returncode == 0 and not left_queue:
+            return output.strip().splitlines()[0], False
+        state = self.final_state(jobid)
+        if is_terminal_state(state):
+            return state, True
+        if left_queue:
+            # 已离队但记账尚未写入终止状态（或记账存储关闭）
+            return "FINISHED", True
+        return None, False
+
+    def final_state(self, jobid):
+        """
+        sacct 中作业本身的状态；记账存储关闭、查询失败或还没有记录时返回 None
+        """
+        if not supported(self.capabilities(), "accounting_storage"):
+            return None
+        returncode, output = run_command(['sacct', '-j', str(jobid), '-X', '-n', '-P', '-o', 'State'],
+                                         DEFAULT_QUERY_TIMEOUT, stderr=False)
+        if returncode != 0 or not output.strip():
+            return None
+        return output.strip().splitlines()[0].split()[0]
+
+    def queued_jobs(self, user=None):
+        returncode, output = run_command(['squeue', '-u', user or getpass.getuser(), '-h', '-o', '%i'],
+                                         DEFAULT_QUERY_TIMEOUT, stderr=False)
+        if returncode != 0:
+            return None
+        return sum(1 for line in output.splitlines() if line.strip())
+
+    def cancel(self, jobid):
+        returncode, _ = run_command(['scancel', str(jobid)], DEFAULT_QUERY_TIMEOUT)
+        return returncode == 0
+
+    def missing_commands(self):
+        return [cmd for cmd in REQUIRED_COMMANDS if shutil.which(cmd) is None]
+
+
+_BACKEND = None
+
+
+def get_backend():
+    """
+    当前进程使用的调度器后端（默认 SlurmBackend）
+    """
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = SlurmBackend()
+    return _BACKEND
+
+
+def set_backend(backend):
+    """
+    设置当前进程使用的调度器后端，返回之前的后端（None 恢复默认）
+    """
+    global _BACKEND
+    previous, _BACKEND = _BACKEND, backend
+    return previous
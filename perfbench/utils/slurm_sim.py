@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内的 SLURM 离散事件模拟器（调度器后端，见 perfbench.utils.scheduler）。
+
+模型：
+- 集群有 nodes 个同构节点（每节点 cores_per_node 核、mem_per_node_gb 内存），作业按整节点分配；
+- 作业提交后经过 dispatch_delay（调度周期）进入待调度队列，按 FIFO + 贪心回填（不做预留，
+  只扫描队首 backfill_depth 个作业）分配空闲节点，排队时间由资源竞争自然产生；
+- 运行时间服从对数正态分布（均值 mean_runtime），超过 --time 限制的作业以 TIMEOUT 结束；
+  以 failure_rate / node_failure_rate 的概率在运行中途以 FAILED / NODE_FAIL 结束；
+- populate() 按泊松到达批量加入其他用户的作业，成千上万个作业也只需维护一个事件堆。
+
+确定性：每个作业的随机量由 (seed, jobid) 决定，与查询的顺序和频率无关；相同的种子与提交序列得到相同的调度结果。
+
+时钟：speedup=None 时为虚拟时钟，由 advance()/run_until_idle() 推进；
+否则模拟时间 = 创建以来的墙钟时间 × speedup，可以与真实的异步监控引擎一起运行（1 秒墙钟 = speedup 秒模拟时间）。
+
+查询输出与 SLURM 命令的文本格式一致（sacct/sstat 的 -P 管道表、sinfo -N、scontrol show job、squeue -h、seff），
+监控引擎和报告无需区分后端。
+
+用法（负载测试）：
+    # 只模拟调度，输出排队时间与作业状态统计
+    python -m perfbench.utils.slurm_sim --jobs 5000 --nodes 1024
+    # 同时在一个事件循环中监控其中 200 个作业并生成报告
+    python -m perfbench.utils.slurm_sim --jobs 5000 --nodes 1024 --monitor 200 --interval 1 --speedup 60 \\
+        --outdir /tmp/simload [--report]
+"""
+
+import argparse
+import bisect
+import getpass
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from perfbench.utils.scheduler import SchedulerBackend, SubmitError, SACCT_FORMAT, SSTAT_FORMAT
+from perfbench.utils.script_parser import parse_slurm_script
+
+DEFAULT_NODES = 1024
+DEFAULT_CORES_PER_NODE = 64
+DEFAULT_MEM_PER_NODE_GB = 256
+DEFAULT_MEAN_RUNTIME = 600.0
+DEFAULT_FAILURE_RATE = 0.02
+DEFAULT_NODE_FAILURE_RATE = 0.002
+DEFAULT_DISPATCH_DELAY = 1.0
+DEFAULT_BACKFILL_DEPTH = 200
+
+# 同一时刻的事件：先结束（释放节点），再提交，最后进入调度队列
+EVENT_END, EVENT_SUBMIT, EVENT_ELIGIBLE = 0, 1, 2
+
+QUEUED_STATES = ("PENDING", "RUNNING")
+STATE_CODES = {"PENDING": "PD", "RUNNING": "R"}
+NODE_FEATURES = "x86_64,avx512,ib"
+
+
+def format_duration(seconds):
+    """
+    秒 -> [D-]HH:MM:SS
+    """
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    text = f"{rest // 3600:02d}:{rest // 60 % 60:02d}:{rest % 60:02d}"
+    return f"{days}-{text}" if days else text
+
+
+def format_cpu(seconds):
+    """
+    秒 -> MM:SS.mmm（超过一小时为 [D-]HH:MM:SS，与 sacct TotalCPU / sstat AveCPU 一致）
+    """
+    minutes, rest = divmod(seconds, 60)
+    if minutes >= 60:
+        return format_duration(seconds)
+    return f"{int(minutes):02d}:{rest:06.3f}"
+
+
+def parse_time_limit(text):
+    """
+    sbatch --time 的取值 -> 秒：MM / MM:SS / HH:MM:SS / D-HH / D-HH:MM / D-HH:MM:SS；无法识别时返回 None
+    """
+    if not text or text.upper() in ("UNLIMITED", "INFINITE"):
+        return None
+    try:
+        days = 0
+        if "-" in text:
+            day_text, text = text.split("-", 1)
+            days = int(day_text)
+            parts = [int(p) for p in text.split(":")]
+            hours, minutes, seconds = (parts + [0, 0])[:3]
+        else:
+            parts = [int(p) for p in text.split(":")]
+            if len(parts) == 1:
+                hours, minutes, seconds = 0, parts[0], 0
+            elif len(parts) == 2:
+                hours, minutes, seconds = 0, parts[0], parts[1]
+            else:
+                hours, minutes, seconds = parts[:3]
+    except ValueError:
+        return None
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def hostlist(names, prefix="sim", width=5):
+    """
+    节点编号列表 -> SLURM 的压缩主机列表，如 sim[00001-00004,00009]
+    """
+    if not names:
+        return "(null)"
+    ranges = []
+    start = prev = names[0]
+    for n in names[1:]:
+        if n != prev + 1:
+            ranges.append((start, prev))
+            start = n
+        prev = n
+    ranges.append((start, prev))
+    parts = [f"{a + 1:0{width}d}" if a == b else f"{a + 1:0{width}d}-{b + 1:0{width}d}" for a, b in ranges]
+    if len(parts) == 1 and ranges[0][0] == ranges[0][1]:
+        return f"{prefix}{parts[0]}"
+    return f"{prefix}[{','.join(parts)}]"
+
+
+class SimJob:
+    """
+    模拟作业。end_state 与 runtime（实际运行时长）在创建时确定
+    """
+    __slots__ = ("jobid", "name", "user", "nodes", "tasks_per_node", "time_limit", "runtime", "end_state",
+                 "submit_time", "start_time", "end_time", "state", "node_ids", "steps",
+                 "rss_base_mb", "rss_slope_mb", "cpu_efficiency")
+
+    def elapsed(self, now):
+        if self.start_time is None:
+            return 0.0
+        return min(now, self.end_time) - self.start_time
+
+    @property
+    def cpus(self):
+        return self.nodes * self.tasks_per_node
+
+    @property
+    def finished(self):
+        return self.state is not None and self.state not in QUEUED_STATES
+
+
+class SimulatedSlurm(SchedulerBackend):
+    """
+    确定性的离散事件 SLURM 模拟器；所有查询先把模拟推进到当前时刻。线程安全
+    """
+
+    name = "sim"
+    in_process = True
+
+    def __init__(self, nodes=DEFAULT_NODES, cores_per_node=DEFAULT_CORES_PER_NODE,
+                 mem_per_node_gb=DEFAULT_MEM_PER_NODE_GB, seed=0, mean_runtime=DEFAULT_MEAN_RUNTIME,
+                 runtime_sigma=0.5, failure_rate=DEFAULT_FAILURE_RATE, node_failure_rate=DEFAULT_NODE_FAILURE_RATE,
+                 dispatch_delay=DEFAULT_DISPATCH_DELAY, backfill_depth=DEFAULT_BACKFILL_DEPTH, steps=2,
+                 speedup=None, first_jobid=1000, user=None):
+        self.node_count = int(nodes)
+        self.cores_per_node = int(cores_per_node)
+        self.mem_per_node_gb = int(mem_per_node_gb)
+        self.seed = seed
+        self.mean_runtime = float(mean_runtime)
+        self.runtime_sigma = float(runtime_sigma)
+        self.failure_rate = float(failure_rate)
+        self.node_failure_rate = float(node_failure_rate)
+        self.dispatch_delay = float(dispatch_delay)
+        self.backfill_depth = int(backfill_depth)
+        self.steps = int(steps)
+        self.speedup = speedup
+        self.user = user or getpass.getuser()
+        self.rng = random.Random(f"{seed}:background")
+        self.jobs = {}
+        self.next_jobid = int(first_jobid)
+        self.events = []
+        self.event_seq = 0
+        self.pending = []
+        # 空闲节点编号（升序），分配时取最小的若干个
+        self.free = list(range(self.node_count))
+        self.node_owner = [None] * self.node_count
+        self.time = 0.0
+        # 墙钟模式下 advance() 累加的偏移
+        self.offset = 0.0
+        self.wall_origin = time.monotonic()
+        self.epoch = time.time()
+        # 节点分配每变化一次 +1，用于缓存 sinfo 输出
+        self.version = 0
+        self.sinfo_cache = (None, None)
+        self.lock = threading.RLock()
+
+    # ---- 时钟与事件 ----
+
+    def now(self):
+        if self.speedup is None:
+            return self.time
+        return max(self.time, self.offset + (time.monotonic() - self.wall_origin) * self.speedup)
+
+    def wall_time(self, sim_time):
+        """
+        模拟时间 -> 墙钟时间戳（用于 scontrol 的 SubmitTime/StartTime 等）
+        """
+        return self.epoch + sim_time / (self.speedup or 1.0)
+
+    def push(self, when, kind, jobid):
+        heapq.heappush(self.events, (when, kind, self.event_seq, jobid))
+        self.event_seq += 1
+
+    def sync(self, until=None):
+        """
+        处理截止到 until（默认当前时刻）的全部事件
+        """
+        with self.lock:
+            target = self.now() if until is None else until
+            while self.events and self.events[0][0] <= target:
+                when, kind, _, jobid = heapq.heappop(self.events)
+                self.time = max(self.time, when)
+                job = self.jobs[jobid]
+                if kind == EVENT_END:
+                    self.end(job)
+                elif kind == EVENT_SUBMIT:
+                    job.state = "PENDING"
+                    self.push(when + self.dispatch_delay, EVENT_ELIGIBLE, jobid)
+                    continue
+                else:
+                    self.pending.append(job)
+                self.schedule()
+            self.time = max(self.time, target)
+
+    def advance(self, seconds):
+        """
+        时钟前进 seconds 秒（墙钟模式下整体平移，例如在监控开始前让集群先运行一段时间）
+        """
+        with self.lock:
+            if self.speedup is None:
+                self.sync(self.time + seconds)
+            else:
+                self.offset += seconds
+                self.sync()
+
+    def run_until_idle(self):
+        """
+        处理全部剩余事件（所有作业结束），返回结束时刻
+        """
+        with self.lock:
+            while self.events:
+                self.sync(self.events[0][0])
+            return self.time
+
+    def schedule(self):
+        """
+        FIFO + 贪心回填：依次扫描队首 backfill_depth 个作业，节点足够即启动
+        """
+        if not self.pending or not self.free:
+            return
+        started = []
+        for index, job in enumerate(self.pending[:self.backfill_depth]):
+            if job.nodes <= len(self.free):
+                self.start(job)
+                started.append(index)
+                if not self.free:
+                    break
+        for index in reversed(started):
+            del self.pending[index]
+
+    def start(self, job):
+        job.node_ids = self.free[:job.nodes]
+        del self.free[:job.nodes]
+        for n in job.node_ids:
+            self.node_owner[n] = job.jobid
+        job.state = "RUNNING"
+        job.start_time = self.time
+        job.end_time = self.time + job.runtime
+        self.version += 1
+        self.push(job.end_time, EVENT_END, job.jobid)
+
+    def end(self, job):
+        job.state = job.end_state
+        for n in job.node_ids:
+            self.node_owner[n] = None
+            bisect.insort(self.free, n)
+        self.version += 1
+
+    # ---- 作业 ----
+
+    def add_job(self, nodes=1, tasks_per_node=None, time_limit=None, name=None, user=None, submit_time=None,
+                runtime=None, end_state=None):
+        """
+        加入一个作业，返回 jobid（字符串）。submit_time 为模拟时间，默认当前时刻；
+        runtime/end_state 不给出时按作业自己的随机流抽取
+        """
+        with self.lock:
+            self.sync()
+            jobid = self.next_jobid
+            self.next_jobid += 1
+            if nodes > self.node_count:
+                raise SubmitError(f"sbatch提交失败: Requested node configuration is not available ({nodes} 个节点)")
+            rng = random.Random(f"{self.seed}:{jobid}")
+            job = SimJob()
+            job.jobid = jobid
+            job.name = name or f"job{jobid}"
+            job.user = user or self.user
+            job.nodes = int(nodes)
+            job.tasks_per_node = int(tasks_per_node or self.cores_per_node)
+            job.time_limit = time_limit
+            job.submit_time = self.now() if submit_time is None else float(submit_time)
+            job.start_time = job.end_time = None
+            job.state = None
+            job.node_ids = []
+            job.steps = self.steps
+            job.rss_base_mb = rng.uniform(200, 2000)
+            job.rss_slope_mb = rng.uniform(0.0, 2.0)
+            job.cpu_efficiency = rng.uniform(0.6, 0.98)
+
+            if runtime is None:
+                mu = math.log(self.mean_runtime) - self.runtime_sigma ** 2 / 2
+                runtime = max(1.0, rng.lognormvariate(mu, self.runtime_sigma))
+            draw = rng.random()
+            if end_state is None:
+                end_state = "COMPLETED"
+                if time_limit is not None and runtime > time_limit:
+                    runtime, end_state = float(time_limit), "TIMEOUT"
+                elif draw < self.node_failure_rate:
+                    runtime, end_state = runtime * rng.uniform(0.05, 0.95), "NODE_FAIL"
+                elif draw < self.node_failure_rate + self.failure_rate:
+                    runtime, end_state = runtime * rng.uniform(0.05, 0.95), "FAILED"
+            job.runtime = float(runtime)
+            job.end_state = end_state
+            self.jobs[jobid] = job
+            self.push(job.submit_time, EVENT_SUBMIT, jobid)
+            self.sync()
+            return str(jobid)
+
+    def populate(self, count, arrival_rate=None, max_nodes=None, users=16, start=None):
+        """
+        按泊松到达加入 count 个其他用户的作业（节点数为 2 的幂，小作业居多），返回 jobid 列表。
+        arrival_rate 默认使提交的负载约为集群容量的 1.2 倍；start 为到达过程的起点（模拟时间，默认当前时刻）
+        """
+        max_nodes = max(1, min(max_nodes or self.node_count // 16, self.node_count))
+        sizes = [2 ** k for k in range(int(math.log2(max_nodes)) + 1)]
+        weights = [1.0 / (k + 1) ** 1.5 for k in range(len(sizes))]
+        mean_nodes = sum(s * w for s, w in zip(sizes, weights)) / sum(weights)
+        if arrival_rate is None:
+            arrival_rate = 1.2 * self.node_count / (mean_nodes * self.mean_runtime)
+        when = self.now() if start is None else float(start)
+        jobids = []
+        for _ in range(int(count)):
+            when += self.rng.expovariate(arrival_rate)
+            nodes = self.rng.choices(sizes, weights)[0]
+            user = f"user{self.rng.randrange(users):03d}"
+            jobids.append(self.add_job(nodes=nodes, name=f"bg{nodes}n", user=user, submit_time=when,
+                                       time_limit=4 * self.mean_runtime))
+        return jobids
+
+    def submit(self, script_path, timeout=60):
+        info = parse_slurm_script(script_path)
+        if info is None:
+            raise SubmitError(f"sbatch提交失败: 无法读取脚本 {script_path}")
+        tasks_per_node = info.get("tasks_per_node") or 1
+        if info.get("cpus_per_task"):
+            tasks_per_node *= int(info["cpus_per_task"])
+        return self.add_job(nodes=int(info.get("nodes") or 1), tasks_per_node=min(tasks_per_node, self.cores_per_node),
+                            time_limit=parse_time_limit(info.get("time_limit")),
+                            name=info.get("job_name") or os.path.basename(script_path))
+
+    def lookup(self, jobid):
+        """
+        返回已提交的作业（尚未到达提交时刻的后台作业视为不存在）
+        """
+        self.sync()
+        try:
+            job = self.jobs.get(int(str(jobid).split(".")[0].split("_")[0]))
+        except ValueError:
+            return None
+        return job if job is not None and job.state is not None else None
+
+    # ---- 查询 ----
+
+    def job_state(self, jobid):
+        with self.lock:
+            job = self.lookup(jobid)
+            if job is None:
+                return None, False
+            return job.state, job.finished
+
+    def job_rows(self, job, now):
+        """
+        作业本身 + batch/extern + srun 作业步的字段字典
+        """
+        elapsed = job.elapsed(now)
+        rows = [{
+            "JobID": str(job.jobid), "JobIDRaw": str(job.jobid), "JobName": job.name, "State": job.state,
+            "Elapsed": format_duration(elapsed), "TotalCPU": format_cpu(elapsed * job.cpus * job.cpu_efficiency),
+            "MaxRSS": "", "AllocCPUs": str(job.cpus if job.start_time is not None else 0), "NNodes": str(job.nodes),
+        }]
+        if job.start_time is None:
+            return rows
+        step_state = "CANCELLED" if job.state == "TIMEOUT" else job.state
+        rss_mb = job.rss_base_mb + job.rss_slope_mb * elapsed
+        for name in ["batch", "extern"] + [str(i) for i in range(job.steps)]:
+            srun = name not in ("batch", "extern")
+            tasks = job.cpus if srun else 1
+            rows.append({
+                "JobID": f"{job.jobid}.{name}", "JobIDRaw": f"{job.jobid}.{name}", "JobName": "app" if srun else name,
+                "State": step_state if srun or name == "batch" else job.state, "Elapsed": format_duration(elapsed),
+                "TotalCPU": format_cpu(elapsed * tasks * job.cpu_efficiency if srun else 0.5),
+                "MaxRSS": f"{int(rss_mb * 1024 if srun else 12 * 1024)}K",
+                "AllocCPUs": str(job.cpus if srun else job.tasks_per_node),
+                "NNodes": str(job.nodes if srun else 1), "NTasks": str(tasks),
+                "AveRSS": f"{int(rss_mb * 900 if srun else 10 * 1024)}K",
+                "MaxVMSize": f"{int(rss_mb * 3 * 1024)}K",
+                "AveCPU": format_cpu(elapsed * job.cpu_efficiency if srun else 0.1),
+            })
+        return rows
+
+    @staticmethod
+    def table(fields, rows):
+        fields = [field.split("%")[0] for field in fields.split(",")]
+        lines = ["|".join(fields)]
+        lines.extend("|".join(row.get(field, "") for field in fields) for row in rows)
+        return "\n".join(lines) + "\n"
+
+    def accounting(self, jobid, timeout=None):
+        with self.lock:
+            job = self.lookup(jobid)
+            rows = self.job_rows(job, self.now()) if job is not None else []
+            return 0, self.table(SACCT_FORMAT, rows)
+
+    def step_stats(self, jobids, timeout=None):
+        with self.lock:
+            now = self.now()
+            rows, errors = [], []
+            for jobid in jobids:
+                job = self.lookup(jobid)
+                if job is None or job.state != "RUNNING":
+                    errors.append(f"sstat: error: couldn't get steps for job {jobid}\n")
+                    continue
+                rows.extend(row for row in self.job_rows(job, now)[1:] if not row["JobID"].endswith(".extern"))
+            if not rows:
+                return 1, "".join(errors)
+            return 0, "".join(errors) + self.table(SSTAT_FORMAT, rows)
+
+    def nodes(self, timeout=None):
+        with self.lock:
+            self.sync()
+            version, text = self.sinfo_cache
+            if version != self.version:
+                lines = ["NODELIST STATE AVAIL_FEATURES"]
+                lines.extend(f"sim{n + 1:05d} {'idle' if owner is None else 'alloc'} {NODE_FEATURES}"
+                             for n, owner in enumerate(self.node_owner))
+                text = "\n".join(lines) + "\n"
+                self.sinfo_cache = (self.version, text)
+            return 0, text
+
+    def job_info(self, jobid, timeout=None):
+        with self.lock:
+            job = self.lookup(jobid)
+            if job is None:
+                return 1, "slurm_load_jobs error: Invalid job id specified\n"
+            now = self.now()
+
+            def stamp(sim_time):
+                if sim_time is None:
+                    return "Unknown"
+                return datetime.fromtimestamp(self.wall_time(sim_time)).strftime("%Y-%m-%dT%H:%M:%S")
+
+            reason = "None" if job.start_time is not None else ("Priority" if self.pending else "Resources")
+            time_limit = format_duration(job.time_limit) if job.time_limit is not None else "UNLIMITED"
+            return 0, (f"JobId={job.jobid} JobName={job.name}\n"
+                       f"   UserId={job.user}(1000) GroupId=sim(1000) MCS_label=N/A\n"
+                       f"   Priority=4294901 Nice=0 Account=sim QOS=normal\n"
+                       f"   JobState={job.state} Reason={reason} Dependency=(null)\n"
+                       f"   Requeue=1 Restarts=0 BatchFlag=1 Reboot=0 ExitCode={0 if job.state != 'FAILED' else 1}:0\n"
+                       f"   RunTime={format_duration(job.elapsed(now))} TimeLimit={time_limit} TimeMin=N/A\n"
+                       f"   SubmitTime={stamp(job.submit_time)} EligibleTime={stamp(job.submit_time + self.dispatch_delay)}\n"
+                       f"   StartTime={stamp(job.start_time)} EndTime={stamp(job.end_time)} Deadline=N/A\n"
+                       f"   Partition=sim AllocNode:Sid=login01:4242\n"
+                       f"   NodeList={hostlist(job.node_ids)}\n"
+                       f"   NumNodes={job.nodes} NumCPUs={job.cpus} NumTasks={job.cpus} CPUs/Task=1 ReqB:S:C:T=0:0:*:*\n"
+                       f"   TRES=cpu={job.cpus},mem={job.nodes * self.mem_per_node_gb}G,node={job.nodes},billing={job.cpus}\n")
+
+    def queue(self, jobid, timeout=None):
+        with self.lock:
+            job = self.lookup(jobid)
+            if job is None:
+                return 1, "slurm_load_jobs error: Invalid job id specified\n"
+            if job.finished:
+                return 0, ""
+            nodelist = hostlist(job.node_ids) if job.node_ids else "(Priority)"
+            return 0, (f"{job.jobid:>8} sim {job.name[:8]:>8} {job.user[:8]:>8} {STATE_CODES[job.state]:>2} "
+                       f"{format_duration(job.elapsed(self.now())):>10} {job.nodes:>6} {nodelist}\n")
+
+    def efficiency(self, jobid, timeout=None):
+        with self.lock:
+            job = self.lookup(jobid)
+            if job is None:
+                return 1, "Job not found.\n"
+            elapsed = job.elapsed(self.now())
+            rss_gb = (job.rss_base_mb + job.rss_slope_mb * elapsed) / 1024
+            mem_gb = job.nodes * self.mem_per_node_gb
+            exit_code = 1 if job.state == "FAILED" else 0
+            return 0, (f"Job ID: {job.jobid}\nCluster: sim\nUser/Group: {job.user}/sim\n"
+                       f"State: {job.state} (exit code {exit_code})\nNodes: {job.nodes}\n"
+                       f"Cores per node: {job.tasks_per_node}\n"
+                       f"CPU Utilized: {format_duration(elapsed * job.cpus * job.cpu_efficiency)}\n"
+                       f"CPU Efficiency: {job.cpu_efficiency * 100:.2f}% of {format_duration(elapsed * job.cpus)} core-walltime\n"
+                       f"Job Wall-clock time: {format_duration(elapsed)}\n"
+                       f"Memory Utilized: {rss_gb:.2f} GB\n"
+                       f"Memory Efficiency: {rss_gb / mem_gb * 100:.2f}% of {mem_gb:.2f} GB "
+                       f"({self.mem_per_node_gb:.2f} GB/node)\n")
+
+    def queued_jobs(self, user=None):
+        with self.lock:
+            self.sync()
+            user = user or self.user
+            return sum(1 for job in self.jobs.values() if job.user == user and job.state in QUEUED_STATES)
+
+    # ---- 统计 ----
+
+    def summary(self):
+        """
+        当前时刻的调度统计：各状态作业数、已开始作业的排队时间分位数、节点利用率
+        """
+        with self.lock:
+            self.sync()
+            states = {}
+            waits = []
+            for job in self.jobs.values():
+                if job.state is None:
+                    continue
+                states[job.state] = states.get(job.state, 0) + 1
+                if job.start_time is not None:
+                    waits.append(job.start_time - job.submit_time)
+            waits.sort()
+
+            def pct(q):
+                return waits[min(len(waits) - 1, int(q * len(waits)))] if waits else None
+
+            return {
+                "sim_time_seconds": self.time,
+                "jobs": sum(states.values()),
+                "states": states,
+                "queue_wait_seconds": {"p50": pct(0.5), "p95": pct(0.95), "max": waits[-1] if waits else None},
+                "allocated_nodes": self.node_count - len(self.free),
+                "pending_jobs": len(self.pending),
+            }
+
+
+def write_load_script(path, nodes, time_limit):
+    with open(path, "w") as f:
+        f.write(f"#!/bin/bash\n#SBATCH --job-name=simload\n#SBATCH --nodes={nodes}\n"
+                f"#SBATCH --time={format_duration(time_limit)}\nsrun ./app\n")
+    return path
+
+
+def load_test(sim, jobs, monitor, interval, outdir, report=False, monitor_nodes=4):
+    """
+    在后台负载中提交 monitor 个作业，在同一事件循环中监控到全部结束，可选地为每个作业生成报告
+    """
+    from perfbench.utils.async_monitor import run_monitors
+
+    # 先让后台负载运行一个平均作业时长，集群进入繁忙状态后再提交被监控的作业
+    sim.populate(jobs)
+    sim.advance(sim.mean_runtime)
+    os.makedirs(outdir, exist_ok=True)
+    script = write_load_script(os.path.join(outdir, "simload.slurm"), monitor_nodes, 4 * sim.mean_runtime)
+    targets = [(sim.submit(script), os.path.join(outdir, f"job_{i:04d}")) for i in range(monitor)]
+    start = time.perf_counter()
+    states = run_monitors(targets, interval, backend=sim, snapshot_ttl=0)
+    result = {"monitored": monitor, "monitor_seconds": time.perf_counter() - start,
+              "final_states": {s: states.count(s) for s in set(states)}}
+    if report:
+        from perfbench.report.performance_report import generate_performance_report
+        start = time.perf_counter()
+        for _, job_dir in targets:
+            generate_performance_report(job_dir, interval)
+        result["report_seconds"] = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 进程内 SLURM 模拟器（负载测试）')
+    parser.add_argument('--jobs', type=int, default=1000, help='后台作业数，默认 1000')
+    parser.add_argument('--nodes', type=int, default=DEFAULT_NODES, help=f'集群节点数，默认 {DEFAULT_NODES}')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--mean-runtime', type=float, default=DEFAULT_MEAN_RUNTIME, help='平均运行时间（模拟秒）')
+    parser.add_argument('--failure-rate', type=float, default=DEFAULT_FAILURE_RATE, help='作业失败（FAILED）的概率')
+    parser.add_argument('--node-failure-rate', type=float, default=DEFAULT_NODE_FAILURE_RATE, help='NODE_FAIL 的概率')
+    parser.add_argument('--monitor', type=int, default=0, help='另外提交并监控的作业数（0 表示只模拟调度）')
+    parser.add_argument('--interval', type=float, default=1.0, help='监控采样间隔（墙钟秒）')
+    parser.add_argument('--speedup', type=float, default=60.0, help='监控时 1 秒墙钟对应的模拟秒数，默认 60')
+    parser.add_argument('--outdir', default=None, help='监控输出目录（--monitor 时必需）')
+    parser.add_argument('--report', action='store_true', help='监控结束后为每个作业生成性能报告')
+    args = parser.parse_args(argv)
+
+    options = dict(nodes=args.nodes, seed=args.seed, mean_runtime=args.mean_runtime,
+                   failure_rate=args.failure_rate, node_failure_rate=args.node_failure_rate)
+    if args.monitor:
+        if not args.outdir:
+            parser.error("--monitor 需要 --outdir")
+        sim = SimulatedSlurm(speedup=args.speedup, **options)
+        result = load_test(sim, args.jobs, args.monitor, args.interval, args.outdir, report=args.report)
+    else:
+        sim = SimulatedSlurm(**options)
+        sim.populate(args.jobs)
+        start = time.perf_counter()
+        sim.run_until_idle()
+        result = {"simulate_seconds": time.perf_counter() - start}
+    result["scheduler"] = sim.summary()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
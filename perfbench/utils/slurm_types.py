@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SLURM 命令输出字段的向量化类型转换。
+
+所有转换函数都接收字符串序列，一次性返回 NumPy 数组，适用于成千上万次采样的批量解析：
+- size_to_bytes:       1024K / 2.5G / "1.20 MB" -> 字节数（float64，缺失为 NaN）
+- duration_to_seconds: D-HH:MM:SS / HH:MM:SS / MM:SS.mmm -> 秒（float64，UNLIMITED 等为 NaN）
+- to_int / to_percent: 数值字段（int64 缺失为 -1 / float64 缺失为 NaN）
+- encode_job_states / encode_node_states: 状态字符串 -> 分类编码（int16，未知为 0）
+"""
+
+import numpy as np
+
+# 无单位的内存数值按 KB 解释（与 sacct/sstat 的默认单位一致）
+DEFAULT_SIZE_MULTIPLIER = 1024
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4, "P": 1024 ** 5}
+
+# 分类编码表：下标即编码，0 保留给无法识别的状态；编码一经发布只能追加
+JOB_STATES = (
+    "UNKNOWN",
+    "PENDING",
+    "RUNNING",
+    "SUSPENDED",
+    "COMPLETING",
+    "COMPLETED",
+    "CANCELLED",
+    "FAILED",
+    "TIMEOUT",
+    "NODE_FAIL",
+    "PREEMPTED",
+    "BOOT_FAIL",
+    "DEADLINE",
+    "OUT_OF_MEMORY",
+    "REQUEUED",
+    "RESIZING",
+    "REVOKED",
+    "CONFIGURING",
+    "STOPPED",
+)
+NODE_STATES = (
+    "unknown",
+    "idle",
+    "alloc",
+    "mix",
+    "comp",
+    "drain",
+    "drng",
+    "down",
+    "fail",
+    "failg",
+    "maint",
+    "resv",
+    "boot",
+    "futr",
+    "plnd",
+    "pow_dn",
+    "pow_up",
+    "npc",
+    "inval",
+)
+# sinfo 短状态后缀的标志字符（*: 无响应, ~: 省电, # 正在上电, ! 等待关机, % 正在关机, $ 维护, @ 等待重启, ^ 正在重启, - 已规划）
+NODE_STATE_FLAGS = "*~#!%$@^-+"
+
+JOB_STATE_CODES = {name: code for code, name in enumerate(JOB_STATES)}
+NODE_STATE_CODES = {name: code for code, name in enumerate(NODE_STATES)}
+
+
+def _str_array(values):
+    arr = np.asarray(values, dtype=str)
+    if arr.size == 0:
+        return arr.reshape(0)
+    return np.char.strip(arr)
+
+
+def _to_float(arr):
+    """
+    字符串数组 -> float64，空串与无法解析的值为 NaN。
+    整批转换失败时（混入 N/A 等值）才逐个回退。
+    """
+    if arr.size == 0:
+        return np.empty(0, dtype=np.float64)
+    filled = np.where(arr == "", "nan", arr)
+    try:
+        return filled.astype(np.float64)
+    except ValueError:
+        out = np.full(arr.shape, np.nan)
+        for i, value in enumerate(filled):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                pass
+        return out
+
+
+def size_to_bytes(values, default_multiplier=DEFAULT_SIZE_MULTIPLIER):
+    """
+    内存大小字符串 -> 字节数
+    支持 sacct/sstat 的 "1024K"、"2.50G"，以及 seff 的 "1.20 MB"、"512.00 B"
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.float64)
+    arr = np.char.upper(np.char.replace(arr, " ", ""))
+    has_b = np.char.endswith(arr, "B")
+    arr = np.char.rstrip(arr, "B")
+    multiplier = np.full(arr.shape, float(default_multiplier))
+    has_unit = np.zeros(arr.shape, dtype=bool)
+    for unit, factor in SIZE_UNITS.items():
+        mask = np.char.endswith(arr, unit)
+        multiplier[mask] = factor
+        has_unit |= mask
+    # 只带 "B" 不带数量级单位的值就是字节
+    multiplier[has_b & ~has_unit] = 1.0
+    number = np.char.rstrip(arr, "".join(SIZE_UNITS))
+    return _to_float(number) * multiplier
+
+
+def duration_to_seconds(values):
+    """
+    时长字符串 -> 秒
+    支持 D-HH:MM:SS、HH:MM:SS、MM:SS、MM:SS.mmm（TotalCPU/AveCPU）以及纯秒数；
+    UNLIMITED、INVALID 与空值为 NaN
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.float64)
+    parts = np.char.partition(arr, "-")
+    has_day = parts[:, 1] == "-"
+    days = np.where(has_day, parts[:, 0], "0")
+    clock = np.where(has_day, parts[:, 2], arr)
+    # 统一补齐为 H:M:S
+    colons = np.char.count(clock, ":")
+    clock = np.where(colons == 1, np.char.add("0:", clock), clock)
+    clock = np.where(colons == 0, np.char.add("0:0:", clock), clock)
+    hours = np.char.partition(clock, ":")
+    minutes = np.char.partition(hours[:, 2], ":")
+    return (_to_float(days) * 86400.0
+            + _to_float(hours[:, 0]) * 3600.0
+            + _to_float(minutes[:, 0]) * 60.0
+            + _to_float(minutes[:, 2]))
+
+
+def to_int(values):
+    """
+    整数字段 -> int64，缺失为 -1；区间形式（scontrol 的 NumNodes=2-2）取下限
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.int64)
+    number = _to_float(np.char.partition(arr, "-")[:, 0])
+    return np.where(np.isnan(number), -1, number).astype(np.int64)
+
+
+def to_percent(values):
+    """
+    百分比字段 -> float64，例如 seff 的 "25.00% of 00:00:04 core-walltime" -> 25.0
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.float64)
+    return _to_float(np.char.partition(arr, "%")[:, 0])
+
+
+def _encode(arr, codes):
+    if arr.size == 0:
+        return np.empty(0, dtype=np.int16)
+    # 先去重再查表：查表次数等于不同状态的个数，而不是行数
+    unique, inverse = np.unique(arr, return_inverse=True)
+    unique_codes = np.array([codes.get(u, 0) for u in unique], dtype=np.int16)
+    return unique_codes[inverse.reshape(-1)]
+
+
+def encode_job_states(values):
+    """
+    作业状态 -> JOB_STATES 编码，例如 "CANCELLED by 1000"、"COMPLETED (exit code 0)" 取首个单词
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.int16)
+    return _encode(np.char.upper(np.char.partition(arr, " ")[:, 0]), JOB_STATE_CODES)
+
+
+def encode_node_states(values):
+    """
+    sinfo 节点状态 -> NODE_STATES 编码，去掉 "idle*"、"drain~" 等后缀标志
+    """
+    arr = _str_array(values)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.int16)
+    return _encode(np.char.lower(np.char.rstrip(arr, NODE_STATE_FLAGS)), NODE_STATE_CODES)
+
+
+# 字段名 -> 转换函数（sacct/sstat 表头、sinfo 表头、scontrol 键名、seff 条目名）
+COLUMN_CONVERTERS = {
+    "MaxRSS": size_to_bytes,
+    "AveRSS": size_to_bytes,
+    "MaxVMSize": size_to_bytes,
+    "AveVMSize": size_to_bytes,
+    "Memory Utilized": size_to_bytes,
+    "Elapsed": duration_to_seconds,
+    "TotalCPU": duration_to_seconds,
+    "AveCPU": duration_to_seconds,
+    "RunTime": duration_to_seconds,
+    "TimeLimit": duration_to_seconds,
+    "CPU Utilized": duration_to_seconds,
+    "Job Wall-clock time": duration_to_seconds,
+    "AllocCPUS": to_int,
+    "NNodes": to_int,
+    "NTasks": to_int,
+    "NumNodes": to_int,
+    "NumCPUs": to_int,
+    "NumTasks": to_int,
+    "Nodes": to_int,
+    "Cores per node": to_int,
+    "CPU Efficiency": to_percent,
+    "Memory Efficiency": to_percent,
+    "State": encode_job_states,
+    "JobState": encode_job_states,
+    "STATE": encode_node_states,
+}
+
+
+# 分类列及其编码表
+COLUMN_CATEGORIES = {
+    "State": JOB_STATES,
+    "JobState": JOB_STATES,
+    "STATE": NODE_STATES,
+}
+
+
+def convert_column(name, values):
+    """
+    按字段名把一列字符串转换为类型化数组；没有对应转换规则时返回 None
+    """
+    converter = COLUMN_CONVERTERS.get(name)
+    if converter is None:
+        return None
+    # 采样间大量重复的取值（状态、每行共享的时长等）只转换一次，再按编码展开
+    unique = dict.fromkeys(values)
+    if len(unique) * 2 > len(values):
+        return converter(values)
+    for code, value in enumerate(unique):
+        unique[value] = code
+    inverse = np.fromiter(map(unique.__getitem__, values), dtype=np.intp, count=len(values))
+    return converter(list(unique))[inverse]
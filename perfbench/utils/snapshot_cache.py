@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录节点上的集群快照共享缓存。
+
+sinfo 之类与作业无关的集群级查询，在同一登录节点上的所有 PerfBench 监控实例之间共享：
+缓存项存放在 ~/.perfbench/cache 下，以命令行的哈希为键，超过 TTL 后由第一个发现过期的实例刷新。
+刷新时持有该键的文件锁（fcntl），其余实例等待锁释放后直接读取新结果，不会同时向 slurmctld 发起相同的 RPC。
+
+命中/未命中统计累计在 ~/.perfbench/cache/stats.json 中。
+
+用法：
+    python -m perfbench.utils.snapshot_cache stats
+    python -m perfbench.utils.snapshot_cache clear
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_DIR = os.path.expanduser('~/.perfbench/cache')
+STATS_FILE = "stats.json"
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """
+    对 path 加排他锁（shared=True 时为共享锁，阻塞等待），退出时释放
+    """
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def cache_key(argv):
+    return hashlib.sha1("\0".join(argv).encode('utf-8')).hexdigest()
+
+
+class SnapshotCache:
+    """
+    基于文件锁的 TTL 缓存
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 本实例的统计：命令名 -> {"hits", "misses"}
+        self.stats = {}
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def read_entry(self, key, ttl):
+        """
+        读取未过期的缓存项，过期或不存在时返回 None
+        """
+        try:
+            with open(self.entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > ttl:
+            return None
+        return entry
+
+    def write_entry(self, key, entry):
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def fetch(self, argv, ttl, timeout=None):
+        """
+        返回 (returncode, 输出文本, 是否命中)。
+        缓存未过期时直接返回；否则持锁执行命令并刷新缓存（stdout 与 stderr 合并）。
+        命令失败或超时的结果不写入缓存。
+        """
+        key = cache_key(argv)
+        entry = self.read_entry(key, ttl)
+        if entry is None:
+            with file_lock(self.entry_path(key) + ".lock"):
+                # 等锁期间可能已被其他实例刷新
+                entry = self.read_entry(key, ttl)
+                if entry is None:
+                    returncode, output = run_command(argv, timeout)
+                    if returncode == 0:
+                        self.write_entry(key, {
+                            "argv": list(argv),
+                            "created": time.time(),
+                            "returncode": returncode,
+                            "output": output,
+                        })
+                    self.record(argv[0], hit=False)
+                    return returncode, output, False
+        self.record(argv[0], hit=True)
+        return entry["returncode"], entry["output"], True
+
+    def record(self, name, hit):
+        """
+        累计命中/未命中次数：本实例内存中一份，stats.json 中跨实例累计一份
+        """
+        counters = self.stats.setdefault(name, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+        stats_path = os.path.join(self.cache_dir, STATS_FILE)
+        try:
+            with file_lock(stats_path + ".lock"):
+                stats = load_stats(self.cache_dir)
+                shared = stats.setdefault(name, {"hits": 0, "misses": 0})
+                shared["hits" if hit else "misses"] += 1
+                tmp_path = f"{stats_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f)
+                os.replace(tmp_path, stats_path)
+        except OSError:
+            pass
+
+
+def run_command(argv, timeout=None, stderr=True):
+    """
+    执行命令，返回 (returncode, 输出文本)；命令不存在返回 127，超时返回 None。
+    stderr=True 时 stderr 合并到输出中（等价于 2>&1），否则丢弃
+    """
+    try:
+        result = subprocess.run(argv, stdout=subprocess.PIPE, timeout=timeout,
+                                stderr=subprocess.STDOUT if stderr else subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return None, f"{argv[0]}: timed out after {timeout}s\n"
+    except OSError as e:
+        return 127, f"{argv[0]}: {e}\n"
+    return result.returncode, result.stdout.decode('utf-8', errors='replace')
+
+
+def load_stats(cache_dir=None):
+    """
+    读取跨实例累计的命中统计：命令名 -> {"hits", "misses"}
+    """
+    try:
+        with open(os.path.join(cache_dir or DEFAULT_CACHE_DIR, STATS_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def clear_cache(cache_dir=None):
+    """
+    删除所有缓存项与统计，返回删除的文件数
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json"):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PerfBench 集群快照共享缓存')
+    parser.add_argument('action', choices=['stats', 'clear'], help='stats: 显示命中统计；clear: 清空缓存')
+    parser.add_argument('--cache-dir', default=None, help=f'缓存目录，默认 {DEFAULT_CACHE_DIR}')
+    args = parser.parse_args(argv)
+
+    if args.action == 'stats':
+        stats = load_stats(args.cache_dir)
+        if not stats:
+            print("暂无缓存统计")
+        for name, counters in sorted(stats.items()):
+            total = counters["hits"] + counters["misses"]
+            ratio = counters["hits"] / total * 100 if total else 0.0
+            print(f"{name}: 命中 {counters['hits']} / 未命中 {counters['misses']}（命中率 {ratio:.1f}%）")
+    else:
+        print(f"已删除 {clear_cache(args.cache_dir)} 个缓存文件")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
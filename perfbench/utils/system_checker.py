@@ -3,8 +3,8 @@
 
 import os
 import platform
-import subprocess
 from perfbench.utils.logger import get_logger
+from perfbench.utils.scheduler import get_backend
 
 logger = get_logger()
 
@@ -39,21 +39,16 @@ def check_slurm_environment(force: bool = False):
 
 def check_slurm_commands():
     """
-    检查SLURM命令是否可用
+    检查SLURM命令是否可用（由调度器后端判断，模拟器等进程内后端不依赖命令行工具）
     """
-    commands = ['sinfo', 'squeue', 'sbatch', 'scancel']
-    for cmd in commands:
-        try:
-            result = subprocess.run(['which', cmd], 
-                                 stdout=subprocess.PIPE, 
-                                 stderr=subprocess.PIPE)
-            if result.returncode != 0:
-                logger.warning(f"未找到命令: {cmd}")
-                return False
-        except Exception as e:
-            logger.error(f"检查命令时出错 {cmd}: {str(e)}")
-            return False
-    return True
+    try:
+        missing = get_backend().missing_commands()
+    except Exception as e:
+        logger.error(f"检查命令时出错: {str(e)}")
+        return False
+    for cmd in missing:
+        logger.warning(f"未找到命令: {cmd}")
+    return not missing
 
 def get_architecture():
     """
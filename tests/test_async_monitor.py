@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.utils.async_monitor：在 SLURM 替身上监控一个作业，结束标记在其余监控数据之后写出
+"""
+
+import os
+
+import pytest
+
+from perfbench.bench.fake_slurm import FakeSlurm
+from perfbench.utils import async_monitor, capabilities, scheduler
+from perfbench.utils.overhead import STATS_FILE
+
+
+@pytest.fixture
+def fake_slurm(tmp_path, monkeypatch):
+    monkeypatch.setattr(capabilities, "DEFAULT_CAPABILITIES_FILE", str(tmp_path / "capabilities.json"))
+    previous = scheduler.set_backend(scheduler.SlurmBackend())
+    try:
+        with FakeSlurm(pending=0.3, runtime=1.0) as fake:
+            yield fake
+    finally:
+        scheduler.set_backend(previous)
+
+
+def test_job_end_marker_is_written_last(tmp_path, fake_slurm, monkeypatch):
+    script = tmp_path / "job.slurm"
+    script.write_text("#!/bin/bash\n#SBATCH -J t\n#SBATCH -N 2\nsrun hostname\n")
+    output_dir = str(tmp_path / "out")
+    seen = {}
+    write_file = async_monitor.AsyncMonitor.write_file
+
+    def recording_write_file(self, name, ts_ms, text):
+        if name == "job_end":
+            # 标记写出时，开销统计已落盘，时序存储已关闭
+            seen["stats"] = os.path.exists(os.path.join(output_dir, STATS_FILE))
+            seen["writer_open"] = self.writer is not None
+        return write_file(self, name, ts_ms, text)
+
+    monkeypatch.setattr(async_monitor.AsyncMonitor, "write_file", recording_write_file)
+    jobid = scheduler.get_backend().submit(str(script))
+    # 替身在运行结束的边界上可能先在 squeue 中消失，最终状态取决于同一节拍的 sacct，这里只检查写出顺序
+    assert async_monitor.run_monitor(jobid, 0.2, output_dir, raw_retention=60) in ("RUNNING", "COMPLETED")
+    assert seen == {"stats": True, "writer_open": False}
+    assert any(name.startswith("job_end_") for name in os.listdir(output_dir))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.utils.fom：HPL 与 LAMMPS 输出的解析及最终指标的选取
+"""
+
+import pytest
+
+from perfbench.utils.fom import HplParser, LammpsParser, summarize_fom
+
+HPL_OUTPUT = """\
+T/V                N    NB     P     Q               Time                 Gflops
+--------------------------------------------------------------------------------
+WR11C2R4       40000   192     2     4              42.17             1.0118e+03
+HPL_pdgesv() start time Mon Jan  1 00:00:00 2024
+||Ax-b||_oo/(eps*(||A||_oo*||x||_oo+||b||_oo)*N)=   2.63917393e-03 ...... PASSED
+WR11C2R4       40000   256     2     4              40.02   1.0662e+03   133.3
+||Ax-b||_oo/(eps*(||A||_oo*||x||_oo+||b||_oo)*N)=   1.20000000e+01 ...... FAILED
+"""
+
+LAMMPS_OUTPUT = """\
+Per MPI rank memory allocation (min/avg/max) = 3.3 | 3.3 | 3.3 Mbytes
+   Step          Temp          E_pair         TotEng         Press
+         0   1.44          -6.7733681     -4.6218056     -5.0244179
+       100   0.7598        -5.7584634     -4.6218056      0.2332126
+WARNING: something happened (src/fix.cpp:10)
+       200   0.7527        -5.7496785     -4.6218056      0.3145942
+Loop time of 2.5 on 4 procs for 200 steps with 32000 atoms
+
+Performance: 34560.000 tau/day, 80.000 timesteps/s, 2.5 Matom-step/s
+"""
+
+
+def parse_all(parser, text):
+    return [record for line in text.splitlines() for record in parser.parse_line(line)]
+
+
+def test_hpl_parser_results_and_checks():
+    records = parse_all(HplParser(), HPL_OUTPUT)
+    # 第二组残差检查未通过，只输出检查结果
+    assert records == [
+        ("gflops", 1011.8, "Gflops"), ("time", 42.17, "s"),
+        ("passed", 1.0, ""),
+        ("passed", 0.0, ""),
+    ]
+
+
+def test_hpl_headline_takes_best_passed_run():
+    records = [(i, "hpl", metric, value, unit)
+               for i, (metric, value, unit) in enumerate(parse_all(HplParser(), HPL_OUTPUT))]
+    headline = summarize_fom(records)["headline"]
+    assert headline["metric"] == "gflops"
+    assert headline["value"] == pytest.approx(1011.8)
+
+
+def test_hpl_result_without_check_is_not_reported():
+    parser = HplParser()
+    assert parse_all(parser, HPL_OUTPUT.splitlines()[2]) == []
+    # 下一组结果出现时，上一组仍未检查，丢弃
+    assert parse_all(parser, HPL_OUTPUT.splitlines()[5] + "\n" + HPL_OUTPUT.splitlines()[4]) == [
+        ("gflops", 1066.2, "Gflops"), ("time", 40.02, "s"), ("passed", 1.0, "")]
+
+
+def test_lammps_parser_steps_loop_and_performance():
+    records = parse_all(LammpsParser(), LAMMPS_OUTPUT)
+    assert [r for r in records if r[0] == "step"] == [("step", 0.0, "steps"), ("step", 100.0, "steps"),
+                                                       ("step", 200.0, "steps")]
+    values = {metric: value for metric, value, _ in records}
+    assert values["loop_time"] == 2.5
+    # Loop time 推算的速率被随后的 Performance 行覆盖（两者一致）
+    assert values["timesteps/s"] == pytest.approx(80.0)
+    assert values["tau/day"] == pytest.approx(34560.0)
+    assert values["Matom-step/s"] == pytest.approx(2.5)
+
+
+def test_lammps_parser_ignores_lines_outside_thermo_table():
+    parser = LammpsParser()
+    assert parser.parse_line("  100  0.75  -5.7") == []
+    assert parser.parse_line("") == []
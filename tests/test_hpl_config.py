@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.utils.hpl_config：进程网格与问题规模
+"""
+
+import pytest
+
+from perfbench.utils.hpl_config import DOUBLE_BYTES, hpl_parameters, near_square_grids, problem_size
+
+
+@pytest.mark.parametrize("ranks, count, expected", [
+    (8, 2, [(2, 4), (1, 8)]),
+    (16, 1, [(4, 4)]),
+    (7, 3, [(1, 7)]),
+    (36, 3, [(6, 6), (4, 9), (3, 12)]),
+])
+def test_near_square_grids(ranks, count, expected):
+    assert near_square_grids(ranks, count) == expected
+
+
+def test_problem_size_aligned_to_block():
+    total = 256 * 1024 ** 3
+    n = problem_size(total, 0.8, 192)
+    assert n % 192 == 0
+    assert n * n * DOUBLE_BYTES <= total * 0.8 < (n + 192) ** 2 * DOUBLE_BYTES
+    # 内存太小时至少一个块
+    assert problem_size(1024, 0.5, 256) == 256
+
+
+def test_hpl_parameters_rejects_bad_fraction():
+    preset = {"mem_fraction": 0.8, "mem_per_node_gb": 256, "nb": 192, "nb_candidates": [192]}
+    with pytest.raises(ValueError):
+        hpl_parameters(2, 64, preset, mem_fraction=1.5)
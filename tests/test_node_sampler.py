@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.utils.node_sampler：在伪造的 /proc 目录树上采样，检查整块写盘的缓冲区与停止时的收尾
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from perfbench.utils import node_sampler
+from perfbench.utils.node_sampler import NodeSampler, load_node_file, load_node_samples
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NET_DEV_HEADER = ("Inter-|   Receive                                                |  Transmit\n"
+                  " face |bytes    packets errs drop fifo frame compressed multicast|"
+                  "bytes    packets errs drop fifo colls carrier compressed\n")
+
+
+def write_proc(root, tick):
+    """
+    写入第 tick 次采样时的 /proc/{stat,meminfo,net/dev}；原地覆盖，采样器常开的文件描述符能读到新内容
+    """
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write(f"cpu  {100 + tick * 10} 0 {50 + tick} {1000 + tick * 5} {tick} 0 0 0 0 0\n"
+                f"cpu0 1 0 1 1 0 0 0 0 0 0\nintr 0\n")
+    with open(os.path.join(root, "meminfo"), "w") as f:
+        f.write(f"MemTotal:       1000000 kB\nMemFree:         200000 kB\n"
+                f"MemAvailable:    {600000 - tick * 1000} kB\nCached:          300000 kB\nDirty:              {tick} kB\n")
+    with open(os.path.join(root, "net", "dev"), "w") as f:
+        f.write(NET_DEV_HEADER
+                + "    lo: 999 9 0 0 0 0 0 0 999 9 0 0 0 0 0 0\n"
+                + f"  eth0: {1000 * tick} {10 * tick} 0 0 0 0 0 0 {2000 * tick} {20 * tick} 0 0 0 0 0 0\n"
+                + f"   ib0: {500} {5} 0 0 0 0 0 0 {700} {7} 0 0 0 0 0 0\n")
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    root = tmp_path / "proc"
+    (root / "net").mkdir(parents=True)
+    write_proc(str(root), 0)
+    return str(root)
+
+
+def test_buffer_flushes_when_full(tmp_path, proc_root):
+    job_dir = str(tmp_path / "job")
+    sampler = NodeSampler(job_dir, proc_root=proc_root, flush_samples=2, node="node01")
+    for tick in range(3):
+        write_proc(proc_root, tick)
+        sampler.sample()
+    # 第 2 次采样后缓冲区写满，整块写盘；第 3 次仍在缓冲区中
+    assert sampler.flushes == 1
+    assert sampler.count == 1
+    assert len(load_node_file(sampler.path)["ts_ms"]) == 2
+
+    sampler.close()
+    columns = load_node_file(sampler.path)
+    assert len(columns["ts_ms"]) == 3
+    assert list(columns["cpu_user"]) == [100, 110, 120]
+    assert list(columns["cpu_idle"]) == [1000, 1005, 1010]
+    assert list(columns["mem_MemTotal"]) == [1000000] * 3
+    assert list(columns["mem_MemAvailable"]) == [600000, 599000, 598000]
+    # lo 不计入，其余网卡求和
+    assert list(columns["net_rx_bytes"]) == [500, 1500, 2500]
+    assert list(columns["net_tx_packets"]) == [7, 27, 47]
+    with open(os.path.join(job_dir, node_sampler.NODE_SAMPLES_DIR, "node01.json")) as f:
+        summary = json.load(f)
+    assert summary["samples"] == 3
+    assert summary["flushes"] == 2
+    assert summary["errors"] == 0
+
+
+def test_truncated_record_is_dropped(tmp_path, proc_root):
+    job_dir = str(tmp_path / "job")
+    sampler = NodeSampler(job_dir, proc_root=proc_root, node="node01")
+    sampler.sample()
+    sampler.sample()
+    sampler.close()
+    with open(sampler.path, "ab") as f:
+        f.write(b"\x01" * 12)
+    samples = load_node_samples(job_dir)
+    assert list(samples) == ["node01"]
+    assert len(samples["node01"]["ts_ms"]) == 2
+
+
+def test_sigterm_flushes_and_exits_cleanly(tmp_path, proc_root):
+    job_dir = str(tmp_path / "job")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "perfbench.utils.node_sampler", "--outdir", job_dir, "--proc-root", proc_root,
+         "--interval", "0.02", "--node", "node01"],
+        cwd=REPO_ROOT)
+    summary_path = os.path.join(job_dir, node_sampler.NODE_SAMPLES_DIR, "node01.json")
+    bin_path = os.path.join(job_dir, node_sampler.NODE_SAMPLES_DIR, "node01.bin")
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(bin_path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    with open(summary_path) as f:
+        summary = json.load(f)
+    # 默认缓冲 240 次采样，停止时剩余的采样也被写盘
+    columns = load_node_file(bin_path)
+    assert summary["samples"] >= 2
+    assert len(columns["ts_ms"]) == summary["samples"]
+    assert list(columns["ts_ms"]) == sorted(columns["ts_ms"])
+    assert summary["errors"] == 0
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.utils.slurm_types：SLURM 字段的向量化类型转换
+"""
+
+import numpy as np
+import pytest
+
+from perfbench.utils import slurm_types
+from perfbench.utils.slurm_types import (duration_to_seconds, encode_job_states, encode_node_states, size_to_bytes,
+                                         to_int, to_percent)
+
+
+def test_duration_formats():
+    seconds = duration_to_seconds(["1-02:03:04", "02:03:04", "03:04", "01:02.500", "42", " 00:00:07 "])
+    assert seconds.tolist() == [93784.0, 7384.0, 184.0, 62.5, 42.0, 7.0]
+
+
+def test_duration_missing_values_are_nan():
+    seconds = duration_to_seconds(["UNLIMITED", "INVALID", "", "  ", "00:01:00"])
+    assert np.isnan(seconds[:4]).all()
+    assert seconds[4] == 60.0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1024K", 1024 ** 2),
+    ("2.5G", 2.5 * 1024 ** 3),
+    ("3M", 3 * 1024 ** 2),
+    ("1T", 1024 ** 4),
+    ("1.20 MB", 1.2 * 1024 ** 2),
+    ("512.00 B", 512.0),
+    ("100", 100 * 1024),  # 无单位按 KB
+    ("4k", 4096),
+])
+def test_size_units(text, expected):
+    assert size_to_bytes([text])[0] == pytest.approx(expected)
+
+
+def test_size_blank_is_nan():
+    values = size_to_bytes(["", "  ", "1K"])
+    assert np.isnan(values[:2]).all()
+    assert values[2] == 1024
+    assert size_to_bytes([]).shape == (0,)
+
+
+def test_int_and_percent():
+    assert to_int(["2-2", "", "16", "N/A"]).tolist() == [2, -1, 16, -1]
+    percent = to_percent(["25.00% of 00:00:04 core-walltime", ""])
+    assert percent[0] == 25.0
+    assert np.isnan(percent[1])
+
+
+def test_job_state_codes():
+    codes = encode_job_states(["COMPLETED", "CANCELLED by 1000", "running", "", "BOGUS", "OUT_OF_MEMORY"])
+    assert [slurm_types.JOB_STATES[c] for c in codes] == [
+        "COMPLETED", "CANCELLED", "RUNNING", "UNKNOWN", "UNKNOWN", "OUT_OF_MEMORY"]
+    assert codes.dtype == np.int16
+
+
+def test_node_state_codes_strip_flags():
+    codes = encode_node_states(["idle*", "drain~", "MIX", "alloc#", "down$", "weird"])
+    assert [slurm_types.NODE_STATES[c] for c in codes] == ["idle", "drain", "mix", "alloc", "down", "unknown"]
+
+
+def test_convert_column_repeated_values():
+    values = ["00:01:00", "", "1-00:00:00"] * 50 + ["00:00:05"]
+    assert np.array_equal(slurm_types.convert_column("Elapsed", values), duration_to_seconds(values), equal_nan=True)
+    states = ["RUNNING"] * 10 + ["COMPLETED"]
+    assert slurm_types.convert_column("State", states).tolist() == encode_job_states(states).tolist()
+    assert slurm_types.convert_column("JobName", states) is None
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+CLI 启动路径的导入耗时预算与重量级依赖（perfbench.bench.startup）
+"""
+
+from perfbench.bench import startup
+
+
+def test_startup_paths_within_budget():
+    result = startup.measure(repeat=3)
+    assert startup.check(result) == []
+
+
+def test_check_reports_heavy_modules_and_budget():
+    result = {
+        "cli_import_seconds": 0.2,
+        "heavy_modules": {"cli": [], "-s": ["numpy", "yaml"]},
+    }
+    failures = startup.check(result, budget_ms=150)
+    assert len(failures) == 2
+    assert "numpy, yaml" in failures[0]
+    assert "200.0ms" in failures[1]
+    assert startup.check(result, budget_ms=None) == failures[:1]
+
+
+def test_deferred_modules_are_detected():
+    # archive 依赖时序存储：若被 CLI 入口在模块级导入，检查应当报告出来
+    loaded = startup.heavy_modules_loaded("perfbench.utils.archive", startup.CLI_DEFERRED_MODULES)
+    assert "perfbench.utils.sample_store" in loaded
+    assert startup.heavy_modules_loaded("perfbench.utils.constants", startup.CLI_DEFERRED_MODULES) == []
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+perfbench.core.sweep：弱扩展规则的解析与求值
+"""
+
+import pytest
+
+from perfbench.core.sweep import evaluate_rule, parse_weak_rule
+
+
+def test_parse_weak_rule():
+    name, tree = parse_weak_rule("NX = 64*N")
+    assert name == "NX"
+    assert evaluate_rule(tree, 4) == 256
+    assert isinstance(evaluate_rule(parse_weak_rule("S=N**(1/3)*10")[1], 8), int)
+    assert evaluate_rule(parse_weak_rule("H=N/3")[1], 2) == pytest.approx(2 / 3)
+
+
+@pytest.mark.parametrize("text", ["64*N", "1X=N", "NX=__import__('os')", "NX=M*2", "NX=N+"])
+def test_parse_weak_rule_rejects_invalid(text):
+    with pytest.raises((ValueError, SyntaxError)):
+        parse_weak_rule(text)